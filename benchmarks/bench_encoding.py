@@ -0,0 +1,198 @@
+"""Comparaison One-Hot / categorielles natives pour LightGBM et CatBoost.
+
+- Memes clients synthetiques (`src.data.synthetic`), meme nettoyage, memes
+  hyperparametres que les essais fixes de `bench_pipeline`
+- Par taille, famille et encodage: temps d'encodage, taille de la matrice
+  d'entree, temps d'entrainement, pic memoire de l'entrainement et AUC test
+- Chaque mesure tourne dans un processus neuf (spawn): le pic RSS de
+  l'entrainement est remis a zero juste avant `fit` (Linux: /proc/self/clear_refs,
+  sinon pic du processus)
+- Resultats JSON horodates avec le commit git (benchmarks/results)
+
+Usage:
+    python -m benchmarks.bench_encoding [--sizes 7043 100000 500000]
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import OPTUNA_TRIALS, RAW_CSV, RESULTS_DIR, _customers, _git_commit
+from src.utils.logging import logger
+
+SIZES = (7_043, 100_000)
+FAMILIES = ("lightgbm", "catboost")
+ENCODINGS = ("onehot", "native")
+
+
+def _rss_mb(field: str) -> float | None:
+    """Champ memoire de /proc/self/status (VmRSS, VmHWM) en Mo, None hors Linux."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Remet le pic RSS (VmHWM) au RSS courant; False si non supporte."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _make_model(family: str, y: np.ndarray, native_init: dict[str, Any]) -> Any:
+    """Modele aux hyperparametres fixes, poids de classes equilibres comme train.py."""
+    n_pos = int(y.sum())
+    weights = {0: len(y) / (2 * (len(y) - n_pos)), 1: len(y) / (2 * n_pos)}
+    params = {**OPTUNA_TRIALS[family], **native_init}
+    if family == "lightgbm":
+        import lightgbm as lgb
+
+        return lgb.LGBMClassifier(**params, class_weight=weights, random_state=42, verbose=-1)
+    from catboost import CatBoostClassifier
+
+    return CatBoostClassifier(
+        **params,
+        class_weights=[weights[0], weights[1]],
+        random_seed=42,
+        verbose=False,
+        allow_writing_files=False,
+    )
+
+
+def measure(task: dict[str, Any]) -> dict[str, Any]:
+    """Une mesure (taille, famille, encodage), executee dans un processus neuf."""
+    from sklearn.metrics import roc_auc_score
+
+    from src.features.build_features import TelcoCleaner, make_preprocessor
+    from src.features.categorical import NativeCategoricalEncoder, native_model_params
+
+    reference = pd.read_csv(task["reference"]) if task["reference"] else None
+    n, family, encoding = task["rows"], task["family"], task["encoding"]
+    train = _customers(n, reference, seed=0)
+    test = _customers(max(n // 4, 1000), reference, seed=1)
+    y_train = (train.pop("Churn") == "Yes").to_numpy(dtype=int)
+    y_test = (test.pop("Churn") == "Yes").to_numpy(dtype=int)
+    cleaner = TelcoCleaner().fit(train)
+    train = cleaner.transform(train).drop(columns=["customerID"])
+    test = cleaner.transform(test).drop(columns=["customerID"])
+
+    t0 = time.perf_counter()
+    if encoding == "native":
+        encoder = NativeCategoricalEncoder().fit(train)
+        x_train = encoder.transform(train)
+        native_init, fit_params = native_model_params(family, encoder)
+        matrix_mb = x_train.memory_usage(index=False).sum() / 2**20
+    else:
+        encoder = make_preprocessor(train).fit(train)
+        x_train = encoder.transform(train)
+        native_init, fit_params = {}, {}
+        matrix_mb = x_train.nbytes / 2**20
+    encode_s = time.perf_counter() - t0
+    x_test = encoder.transform(test)
+    del train, test, cleaner
+
+    model = _make_model(family, y_train, native_init)
+    rss_before = _rss_mb("VmRSS")
+    exact_peak = _reset_peak_rss()
+    t0 = time.perf_counter()
+    model.fit(x_train, y_train, **fit_params)
+    fit_s = time.perf_counter() - t0
+    peak = _rss_mb("VmHWM")
+    t0 = time.perf_counter()
+    proba = model.predict_proba(x_test)[:, 1]
+    predict_s = time.perf_counter() - t0
+    return {
+        **{k: task[k] for k in ("rows", "family", "encoding")},
+        "n_features": int(x_train.shape[1]),
+        "matrix_mb": float(matrix_mb),
+        "encode_s": encode_s,
+        "fit_s": fit_s,
+        "fit_peak_mb": None if peak is None or rss_before is None else peak - rss_before,
+        "fit_peak_exact": exact_peak,
+        "predict_s": predict_s,
+        "test_auc": float(roc_auc_score(y_test, proba)),
+    }
+
+
+def run(sizes: tuple[int, ...] = SIZES, reference_csv: str | Path | None = None) -> dict[str, Any]:
+    """Toutes les mesures, chacune dans un processus neuf."""
+    reference_csv = reference_csv or (RAW_CSV if RAW_CSV.exists() else None)
+    tasks = [
+        {"rows": n, "family": f, "encoding": e, "reference": reference_csv and str(reference_csv)}
+        for n in sizes
+        for f in FAMILIES
+        for e in ENCODINGS
+    ]
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    # CatBoost ecrit catboost_info/ dans le dossier courant malgre allow_writing_files
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory() as tmp, ctx.Pool(1, maxtasksperchild=1) as pool:
+        os.chdir(tmp)
+        try:
+            for res in pool.imap(measure, tasks):
+                results.append(res)
+                logger.info(
+                    f"{res['family']:9s} {res['encoding']:7s} n={res['rows']:>8d} "
+                    f"fit {res['fit_s']:8.2f} s  pic {res['fit_peak_mb'] or 0:8.1f} Mo  "
+                    f"matrice {res['matrix_mb']:8.1f} Mo  AUC {res['test_auc']:.4f}"
+                )
+        finally:
+            os.chdir(cwd)
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "data": str(reference_csv or "parametric"),
+        "results": results,
+    }
+
+
+def summary(doc: dict[str, Any]) -> pd.DataFrame:
+    """Tableau One-Hot / natif cote a cote, avec le rapport des temps d'entrainement."""
+    df = pd.DataFrame(doc["results"])
+    table = df.pivot_table(
+        index=["rows", "family"],
+        columns="encoding",
+        values=["fit_s", "fit_peak_mb", "matrix_mb", "test_auc"],
+    )
+    table[("fit_speedup", "native")] = table[("fit_s", "onehot")] / table[("fit_s", "native")]
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    p.add_argument("--reference", type=str, default=None)
+    p.add_argument("--output", type=str, default=None)
+    args = p.parse_args()
+
+    doc = run(tuple(args.sizes), args.reference)
+    output = Path(args.output or RESULTS_DIR / f"encoding-{doc['commit'][:8]}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    logger.info(f"Resultats: {output}")
+    print(summary(doc).to_string(float_format="{:.3f}".format))
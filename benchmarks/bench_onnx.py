@@ -0,0 +1,93 @@
+"""Benchmark latence/debit: pipeline sklearn vs onnxruntime.
+
+- Exporte model.joblib + preprocessor.joblib + TelcoCleaner en ONNX
+- Verifie la parite des probabilites (tolerance 1e-6)
+- Mesure latence et debit par batch de 1, 100 et 10 000 clients
+
+Usage:
+    python -m benchmarks.bench_onnx [--output bench.json]
+"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.features.build_features import TelcoCleaner
+from src.models.onnx_pipeline import OnnxPipeline, export_pipeline
+from src.utils.logging import logger
+from src.utils.paths import DATA_DIR, PROCESSED_DIR
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def _time(fn: Callable[[pd.DataFrame], Any], df: pd.DataFrame) -> float:
+    """Meilleur temps (secondes) sur quelques repetitions."""
+    repeats = 5 if len(df) >= 10_000 else 50
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run() -> list[dict[str, Any]]:
+    """Execute le benchmark et retourne une ligne de resultats par batch."""
+    base = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    cleaner = TelcoCleaner().fit(base)
+    preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+    model = joblib.load(PROCESSED_DIR / "model.joblib")
+
+    def sklearn_path(df: pd.DataFrame) -> np.ndarray:
+        return model.predict_proba(preprocessor.transform(cleaner.transform(df)))[:, 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_pipeline(model, Path(tmp) / "pipeline.onnx", cleaner, preprocessor)
+        onnx_pipe = OnnxPipeline(path)
+
+    def onnx_path(df: pd.DataFrame) -> np.ndarray:
+        return onnx_pipe.predict_proba(df)[:, 1]
+
+    diff = float(np.abs(sklearn_path(base) - onnx_path(base)).max())
+    logger.info(f"Ecart max sklearn/ONNX = {diff:.2e}")
+
+    results = []
+    for size in BATCH_SIZES:
+        df = pd.concat([base] * int(np.ceil(size / len(base))), ignore_index=True).head(size)
+        sk = _time(sklearn_path, df)
+        ox = _time(onnx_path, df)
+        results.append(
+            {
+                "batch_size": size,
+                "sklearn_ms": sk * 1e3,
+                "onnx_ms": ox * 1e3,
+                "sklearn_rows_per_s": size / sk,
+                "onnx_rows_per_s": size / ox,
+            }
+        )
+        logger.info(
+            f"batch={size:>6d} sklearn={sk * 1e3:9.3f} ms onnx={ox * 1e3:9.3f} ms "
+            f"speedup={sk / ox:6.2f}x"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--output", type=str, default=None)
+    args = p.parse_args()
+    res = run()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
@@ -0,0 +1,247 @@
+"""Micro-benchmarks de chaque etape du pipeline sur donnees synthetiques.
+
+- Donnees: `src.data.synthetic` (reechantillonnage du CSV brut s'il est present,
+  sinon generateur parametrique), de 10k a 10M lignes
+- Etapes chronometrees: TelcoCleaner.fit / transform, ColumnTransformer.transform,
+  split, build (features), un essai Optuna par famille de modeles, predict_csv
+- Les etapes fichier (split, build, predict_csv) tournent dans des dossiers
+  temporaires (INTERIM_DIR / PROCESSED_DIR surcharges avant l'import de src)
+- Resultats JSON horodates avec le commit git, pour suivre les regressions:
+  `--compare` affiche le ratio de temps avec un resultat precedent
+
+Usage:
+    python -m benchmarks.bench_pipeline [--sizes 10000 100000 1000000] [--compare old.json]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.data.synthetic import generate_customers, resample_customers
+from src.utils.logging import logger
+
+RESULTS_DIR = Path(__file__).parent / "results"
+RAW_CSV = (
+    Path(__file__).resolve().parents[1] / "data" / "raw" / "WA_Fn-UseC_-Telco-Customer-Churn.csv"
+)
+TRANSFORM_SIZES = (10_000, 100_000, 1_000_000)
+FILE_SIZES = (10_000, 100_000)
+
+# Hyperparametres fixes (milieu des plages de recherche): un essai comparable par famille
+OPTUNA_TRIALS = {
+    "lightgbm": {
+        "n_estimators": 400,
+        "num_leaves": 32,
+        "learning_rate": 0.05,
+        "max_depth": 6,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "reg_alpha": 1e-3,
+        "reg_lambda": 1e-3,
+    },
+    "xgboost": {
+        "n_estimators": 400,
+        "learning_rate": 0.05,
+        "max_depth": 6,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "reg_alpha": 1e-3,
+        "reg_lambda": 1e-3,
+    },
+    "catboost": {"iterations": 400, "depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3.0},
+    "logreg": {"C": 1.0},
+}
+
+
+def _time(fn: Callable[[], Any], rows: int) -> float:
+    """Meilleur temps (secondes): plus de repetitions pour les petits volumes."""
+    repeats = 5 if rows <= 10_000 else 3 if rows <= 100_000 else 1
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+class Recorder:
+    """Collecte des mesures (etape, nombre de lignes, secondes)."""
+
+    def __init__(self) -> None:
+        self.results: list[dict[str, Any]] = []
+
+    def measure(self, stage: str, rows: int, fn: Callable[[], Any], **extra: Any) -> None:
+        seconds = _time(fn, rows)
+        self.results.append(
+            {
+                "stage": stage,
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_s": rows / seconds,
+                **extra,
+            }
+        )
+        label = f"{stage}[{extra['model']}]" if "model" in extra else stage
+        logger.info(f"{label:28s} n={rows:>9d} {seconds * 1e3:11.2f} ms {rows / seconds:14.0f} l/s")
+
+
+def _customers(n: int, reference: pd.DataFrame | None, seed: int = 0) -> pd.DataFrame:
+    if reference is None:
+        return generate_customers(n, seed=seed)
+    return resample_customers(reference, n, seed=seed)
+
+
+def bench_transforms(rec: Recorder, sizes: tuple[int, ...], reference: pd.DataFrame | None) -> None:
+    """TelcoCleaner.fit / transform et ColumnTransformer.transform en memoire."""
+    from src.features.build_features import TelcoCleaner, make_preprocessor
+
+    for n in sizes:
+        raw = _customers(n, reference).drop(columns=["Churn", "customerID"])
+        cleaner = TelcoCleaner()
+        rec.measure("cleaner_fit", n, partial(cleaner.fit, raw))
+        rec.measure("cleaner_transform", n, partial(cleaner.transform, raw))
+        clean = cleaner.transform(raw)
+        preprocessor = make_preprocessor(clean).fit(clean)
+        rec.measure("preprocessor_transform", n, partial(preprocessor.transform, clean))
+
+
+def bench_files(
+    rec: Recorder, sizes: tuple[int, ...], reference: pd.DataFrame | None, workdir: Path
+) -> None:
+    """split, build, essais Optuna et predict_csv sur fichiers temporaires."""
+    import joblib
+    import numpy as np
+    import optuna
+    from sklearn.linear_model import LogisticRegression
+
+    from src.data.split_dataset import split
+    from src.features.build_features import build
+    from src.models import train
+    from src.models.predict import predict_csv
+    from src.utils.paths import PROCESSED_DIR
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    families = {
+        "lightgbm": train.lgb,
+        "xgboost": train.xgb,
+        "catboost": train.CatBoostClassifier,
+        "logreg": True,
+    }
+    for n in sizes:
+        csv = workdir / f"raw_{n}.csv"
+        _customers(n, reference, seed=1).to_csv(csv, index=False)
+        rec.measure("split", n, partial(split, csv))
+        rec.measure("build", n, build)
+
+        n_train = len(np.load(PROCESSED_DIR / "y_train.npy"))
+        for family, params in OPTUNA_TRIALS.items():
+            if families[family] is None:
+                continue
+
+            def trial(family: str = family, params: dict = params) -> None:
+                study = optuna.create_study(direction="maximize")
+                study.enqueue_trial({"model": family, **params})
+                study.optimize(train.objective, n_trials=1)
+
+            rec.measure("optuna_trial", n_train, trial, model=family)
+
+        x_train, y_train = np.load(PROCESSED_DIR / "X_train.npy"), np.load(
+            PROCESSED_DIR / "y_train.npy"
+        )
+        joblib.dump(
+            LogisticRegression(max_iter=2000).fit(x_train, y_train), PROCESSED_DIR / "model.joblib"
+        )
+        out = workdir / f"pred_{n}.csv"
+        rec.measure("predict_csv", n, partial(predict_csv, str(csv), "local", str(out)))
+
+
+def run(
+    transform_sizes: tuple[int, ...] = TRANSFORM_SIZES,
+    file_sizes: tuple[int, ...] = FILE_SIZES,
+    reference_csv: str | Path | None = None,
+) -> dict[str, Any]:
+    """Execute toutes les etapes et retourne le document de resultats."""
+    if "src.utils.paths" in sys.modules:
+        raise RuntimeError("Lancer le benchmark dans un processus neuf (chemins deja importes)")
+    reference_csv = reference_csv or (RAW_CSV if RAW_CSV.exists() else None)
+    reference = pd.read_csv(reference_csv) if reference_csv else None
+    logger.info(f"Donnees synthetiques: {reference_csv or 'generateur parametrique'}")
+
+    rec = Recorder()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        os.environ["INTERIM_DIR"] = str(workdir / "interim")
+        os.environ["PROCESSED_DIR"] = str(workdir / "processed")
+        os.environ["USE_LOCAL_ARTIFACTS"] = "true"
+        os.environ["SCORING_BACKEND"] = "sklearn"
+        bench_transforms(rec, transform_sizes, reference)
+        # CatBoost ecrit catboost_info/ dans le dossier courant
+        cwd = Path.cwd()
+        os.chdir(workdir)
+        try:
+            bench_files(rec, file_sizes, reference, workdir)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "data": str(reference_csv or "parametric"),
+        "results": rec.results,
+    }
+
+
+def compare(current: dict[str, Any], previous: dict[str, Any]) -> pd.DataFrame:
+    """Ratio des temps (courant / precedent) par etape et taille."""
+    keys = ["stage", "rows", "model"]
+    cur = pd.DataFrame(current["results"]).reindex(columns=[*keys, "seconds"])
+    prev = pd.DataFrame(previous["results"]).reindex(columns=[*keys, "seconds"])
+    merged = cur.fillna({"model": ""}).merge(
+        prev.fillna({"model": ""}), on=keys, suffixes=("", "_previous")
+    )
+    merged["ratio"] = merged["seconds"] / merged["seconds_previous"]
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=list(TRANSFORM_SIZES))
+    p.add_argument("--file_sizes", type=int, nargs="+", default=list(FILE_SIZES))
+    p.add_argument("--reference", type=str, default=None)
+    p.add_argument("--output", type=str, default=None)
+    p.add_argument("--compare", type=str, default=None)
+    args = p.parse_args()
+
+    doc = run(tuple(args.sizes), tuple(args.file_sizes), args.reference)
+    output = Path(args.output or RESULTS_DIR / f"pipeline-{doc['commit'][:8]}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    logger.info(f"Resultats: {output}")
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(compare(doc, previous).to_string(index=False, float_format="{:.3f}".format))
@@ -0,0 +1,179 @@
+"""Nettoyage et feature engineering: backend pandas vs Polars (1M et 10M lignes).
+
+- Memes clients synthetiques (`src.data.synthetic.write_customers`), ecrits une
+  fois par taille en CSV dans un dossier temporaire
+- pandas: `read_csv` + `TelcoCleaner.transform`; Polars: `scan_csv` + plan du
+  cleaner en expressions paresseuses + `collect` (lecture et nettoyage fusionnes)
+- Puis la sortie alimente le ColumnTransformer existant (`to_pandas` pour Polars)
+  et l'encodeur natif (`encode` pandas vs `encode_native` Polars)
+- Chaque mesure tourne dans un processus neuf (spawn): pic RSS du processus, et
+  un manque de memoire est note comme echec sans arreter les autres mesures
+- `--clean-only`: lecture, nettoyage et encodage natif seulement (la matrice
+  One-Hot dense de 10M lignes depasse a elle seule quelques Go)
+- Resultats JSON horodates avec le commit git (benchmarks/results)
+
+Usage:
+    python -m benchmarks.bench_polars [--sizes 1000000 10000000] [--clean-only]
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from benchmarks.bench_encoding import _rss_mb
+from benchmarks.bench_pipeline import RAW_CSV, RESULTS_DIR, _customers, _git_commit
+from src.utils.logging import logger
+
+SIZES = (1_000_000, 10_000_000)
+BACKENDS = ("pandas", "polars")
+FIT_SAMPLE = 50_000
+
+
+def _fitted(reference: str | None) -> tuple[Any, Any, Any]:
+    """Cleaner, ColumnTransformer et encodeur natif fittes sur un petit echantillon."""
+    from src.features.build_features import TelcoCleaner, make_preprocessor
+    from src.features.categorical import NativeCategoricalEncoder
+
+    ref = pd.read_csv(reference) if reference else None
+    sample = _customers(FIT_SAMPLE, ref, seed=99)
+    cleaner = TelcoCleaner().fit(sample)
+    clean = cleaner.transform(sample).drop(columns=["Churn", "customerID"])
+    return cleaner, make_preprocessor(clean).fit(clean), NativeCategoricalEncoder().fit(clean)
+
+
+def measure(task: dict[str, Any]) -> dict[str, Any]:
+    """Une mesure (taille, backend), executee dans un processus neuf."""
+    cleaner, preprocessor, encoder = _fitted(task["reference"])
+    timings: dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    if task["backend"] == "polars":
+        from src.features import polars_backend
+
+        frame = polars_backend.transform(cleaner, polars_backend.scan_csv(task["csv"]))
+        timings["read_clean_s"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        polars_backend.encode_native(encoder, frame)
+        timings["encode_native_s"] = time.perf_counter() - t0
+        if task["full"]:
+            t0 = time.perf_counter()
+            clean = polars_backend.to_pandas(frame)
+            timings["to_pandas_s"] = time.perf_counter() - t0
+        del frame
+    else:
+        clean = cleaner.transform(pd.read_csv(task["csv"]))
+        timings["read_clean_s"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        encoder.encode(clean)
+        timings["encode_native_s"] = time.perf_counter() - t0
+        timings["to_pandas_s"] = 0.0
+
+    if task["full"]:
+        t0 = time.perf_counter()
+        preprocessor.transform(clean)
+        timings["preprocessor_s"] = time.perf_counter() - t0
+        timings["total_s"] = (
+            timings["read_clean_s"] + timings["to_pandas_s"] + timings["preprocessor_s"]
+        )
+    return {
+        "rows": task["rows"],
+        "backend": task["backend"],
+        **timings,
+        "peak_rss_mb": _rss_mb("VmHWM"),
+    }
+
+
+def run(
+    sizes: tuple[int, ...] = SIZES,
+    reference_csv: str | Path | None = None,
+    full: bool = True,
+) -> dict[str, Any]:
+    """Toutes les mesures, chacune dans un processus neuf."""
+    from src.data.synthetic import write_customers
+
+    reference_csv = reference_csv or (RAW_CSV if RAW_CSV.exists() else None)
+    reference = pd.read_csv(reference_csv) if reference_csv else None
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv = write_customers(Path(tmp) / f"customers_{n}.csv", n, reference=reference)
+            for backend in BACKENDS:
+                task = {
+                    "rows": n,
+                    "backend": backend,
+                    "csv": str(csv),
+                    "full": full,
+                    "reference": reference_csv and str(reference_csv),
+                }
+                try:
+                    with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                        res = pool.submit(measure, task).result()
+                except BrokenProcessPool:
+                    # Processus tue (memoire insuffisante): mesure notee en echec
+                    res = {"rows": n, "backend": backend, "error": "processus interrompu"}
+                    logger.warning(f"{backend:6s} n={n:>9d} echec (memoire insuffisante ?)")
+                else:
+                    logger.info(
+                        f"{backend:6s} n={n:>9d} lecture+nettoyage {res['read_clean_s']:7.2f} s  "
+                        f"encodage natif {res['encode_native_s']:6.2f} s  "
+                        f"pic {res['peak_rss_mb'] or 0:8.0f} Mo"
+                    )
+                results.append(res)
+            csv.unlink()
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "data": str(reference_csv or "parametric"),
+        "results": results,
+    }
+
+
+def summary(doc: dict[str, Any]) -> pd.DataFrame:
+    """Tableau pandas / Polars cote a cote, avec le gain sur lecture + nettoyage."""
+    df = pd.DataFrame([r for r in doc["results"] if "error" not in r])
+    table = df.pivot_table(
+        index="rows",
+        columns="backend",
+        values=[
+            v for v in ("read_clean_s", "encode_native_s", "total_s", "peak_rss_mb") if v in df
+        ],
+    )
+    if {"pandas", "polars"}.issubset(df["backend"]):
+        table[("clean_speedup", "polars")] = (
+            table[("read_clean_s", "pandas")] / table[("read_clean_s", "polars")]
+        )
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    p.add_argument("--reference", type=str, default=None)
+    p.add_argument("--output", type=str, default=None)
+    p.add_argument("--clean-only", action="store_true", help="Sans preprocessor One-Hot")
+    args = p.parse_args()
+
+    doc = run(tuple(args.sizes), args.reference, full=not args.clean_only)
+    output = Path(args.output or RESULTS_DIR / f"polars-{doc['commit'][:8]}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    logger.info(f"Resultats: {output}")
+    print(summary(doc).to_string(float_format="{:.3f}".format))
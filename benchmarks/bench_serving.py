@@ -0,0 +1,301 @@
+"""Test de charge et de latence de l'API de scoring.
+
+- Entraine des artefacts legers (TelcoCleaner + preprocessor + regression
+  logistique) sur des clients synthetiques, dans un dossier temporaire
+- Demarre `src.serving.api:app` (uvicorn) dans un sous-processus avec
+  USE_LOCAL_ARTIFACTS=true et PROCESSED_DIR pointant vers ces artefacts
+- Rejoue du trafic `Record` genere:
+  * boucle fermee: N clients concurrents enchainent les requetes
+  * boucle ouverte: arrivees de Poisson a debit fixe; la latence est mesuree
+    depuis l'instant d'arrivee prevu (pas d'omission coordonnee)
+- Rapporte debit et latences p50/p95/p99 par scenario (1 client et batch de
+  100 clients), compare a une baseline et echoue en cas de regression
+
+Usage:
+    python -m benchmarks.bench_serving [--output bench.json] [--update_baseline]
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from src.data.synthetic import generate_customers
+from src.features.build_features import TelcoCleaner, make_preprocessor
+from src.monitoring.drift import build_reference_profile
+from src.utils.logging import logger
+from src.utils.paths import PROJECT_ROOT
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "serving.json"
+
+
+@dataclass
+class Scenario:
+    """Un profil de trafic: taille des requetes et mode d'injection."""
+
+    name: str
+    batch_size: int
+    mode: str  # closed | open
+    concurrency: int = 1  # boucle fermee
+    requests: int = 0  # boucle fermee
+    rate: float = 0.0  # boucle ouverte, requetes/s
+    duration: float = 0.0  # boucle ouverte, secondes
+
+
+SCENARIOS = (
+    Scenario("single_closed_c1", 1, "closed", concurrency=1, requests=500),
+    Scenario("single_closed_c8", 1, "closed", concurrency=8, requests=800),
+    Scenario("batch100_closed_c4", 100, "closed", concurrency=4, requests=200),
+    Scenario("single_open_30rps", 1, "open", rate=30.0, duration=10.0),
+    Scenario("batch100_open_10rps", 100, "open", rate=10.0, duration=5.0),
+)
+
+
+def prepare_artifacts(out_dir: Path, n_train: int = 2000, seed: int = 0) -> Path:
+    """Artefacts de scoring entraines sur des clients synthetiques."""
+    raw = generate_customers(n_train, seed=seed)
+    y = (raw["Churn"] == "Yes").astype(int)
+    cleaner = TelcoCleaner()
+    train = cleaner.fit_transform(raw).drop(columns=["Churn", "customerID"])
+    preprocessor = make_preprocessor(train)
+    model = LogisticRegression(max_iter=1000).fit(preprocessor.fit_transform(train), y)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, out_dir / "model.joblib")
+    joblib.dump(preprocessor, out_dir / "preprocessor.joblib")
+    joblib.dump(cleaner, out_dir / "cleaner.joblib")
+    build_reference_profile(raw).save(out_dir / "reference_profile.json")
+    return out_dir
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def api_server(processed_dir: Path, timeout: float = 60.0) -> Iterator[tuple[str, int]]:
+    """Demarre l'API dans un sous-processus et attend qu'elle reponde."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "USE_LOCAL_ARTIFACTS": "true",
+        "PROCESSED_DIR": str(processed_dir),
+        "SCORING_BACKEND": "sklearn",
+    }
+    env.pop("MODEL_VARIANTS", None)
+    cmd = [sys.executable, "-m", "uvicorn", "src.serving.api:app"]
+    cmd += ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"L'API s'est arretee au demarrage (code {proc.returncode})")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/thresholds")
+                if conn.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError("L'API n'a pas demarre a temps")
+            time.sleep(0.2)
+        yield "127.0.0.1", port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def make_payloads(batch_size: int, n_payloads: int = 50, seed: int = 1) -> list[bytes]:
+    """Corps JSON de requetes /predict (clients synthetiques differents)."""
+    df = generate_customers(batch_size * n_payloads, seed=seed, with_target=False)
+    records = json.loads(df.drop(columns=["customerID"]).to_json(orient="records"))
+    return [
+        json.dumps(records[i : i + batch_size]).encode() for i in range(0, len(records), batch_size)
+    ]
+
+
+class _Client:
+    """Connexions HTTP persistantes, une par thread."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def post(self, body: bytes) -> bool:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            return response.status == 200
+        except OSError:
+            self._local.conn = None
+            return False
+
+
+def _closed_loop(client: _Client, payloads: list[bytes], sc: Scenario) -> tuple[list, int, float]:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(worker_id: int) -> None:
+        nonlocal errors
+        local, local_errors = [], 0
+        for i in range(worker_id, sc.requests, sc.concurrency):
+            t0 = time.perf_counter()
+            ok = client.post(payloads[i % len(payloads)])
+            local.append(time.perf_counter() - t0)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(sc.concurrency) as pool:
+        list(pool.map(worker, range(sc.concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _open_loop(client: _Client, payloads: list[bytes], sc: Scenario) -> tuple[list, int, float]:
+    rng = np.random.default_rng(0)
+    n = max(1, int(sc.rate * sc.duration))
+    arrivals = np.cumsum(rng.exponential(1.0 / sc.rate, n))
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def send(i: int, scheduled: float) -> None:
+        nonlocal errors
+        ok = client.post(payloads[i % len(payloads)])
+        # Latence depuis l'arrivee prevue: inclut l'attente si le serveur sature
+        latency = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(latency)
+            errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(64) as pool:
+        for i, offset in enumerate(arrivals):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i, scheduled)
+    return latencies, errors, time.perf_counter() - start
+
+
+def run_scenario(host: str, port: int, sc: Scenario) -> dict[str, Any]:
+    """Execute un scenario et retourne debit et percentiles de latence."""
+    payloads = make_payloads(sc.batch_size)
+    client = _Client(host, port)
+    for body in payloads[:5]:
+        client.post(body)  # echauffement
+    loop = _closed_loop if sc.mode == "closed" else _open_loop
+    latencies, errors, elapsed = loop(client, payloads, sc)
+    ms = np.asarray(latencies) * 1e3
+    result = {
+        **asdict(sc),
+        "n_requests": len(ms),
+        "errors": errors,
+        "throughput_rps": len(ms) / elapsed,
+        "rows_per_s": len(ms) * sc.batch_size / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+    logger.info(
+        f"{sc.name:22s} {result['throughput_rps']:8.1f} req/s  p50={result['p50_ms']:7.2f} ms  "
+        f"p95={result['p95_ms']:7.2f} ms  p99={result['p99_ms']:7.2f} ms  erreurs={errors}"
+    )
+    return result
+
+
+def run(scenarios: tuple[Scenario, ...] = SCENARIOS, n_train: int = 2000) -> list[dict[str, Any]]:
+    """Entraine les artefacts, demarre l'API et execute tous les scenarios."""
+    with tempfile.TemporaryDirectory() as tmp:
+        processed_dir = prepare_artifacts(Path(tmp), n_train=n_train)
+        with api_server(processed_dir) as (host, port):
+            return [run_scenario(host, port, sc) for sc in scenarios]
+
+
+def compare_to_baseline(
+    results: list[dict[str, Any]], baseline: dict[str, dict[str, float]], tolerance: float
+) -> list[str]:
+    """Regressions par rapport a la baseline (p95 et debit en boucle fermee)."""
+    regressions = []
+    for res in results:
+        name = res["name"]
+        if res["errors"]:
+            regressions.append(f"{name}: {res['errors']} requetes en erreur")
+        ref = baseline.get(name)
+        if ref is None:
+            continue
+        if res["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {res['p95_ms']:.2f} ms > {ref['p95_ms']:.2f} ms")
+        # En boucle ouverte le debit est impose par le taux d'arrivee
+        if res["mode"] == "closed" and res["throughput_rps"] < ref["throughput_rps"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{name}: debit {res['throughput_rps']:.1f} < {ref['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--output", type=str, default=None)
+    p.add_argument("--baseline", type=str, default=str(BASELINE_PATH))
+    p.add_argument("--tolerance", type=float, default=0.3)
+    p.add_argument("--update_baseline", action="store_true")
+    args = p.parse_args()
+
+    res = run()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        summary = {
+            r["name"]: {k: r[k] for k in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")}
+            for r in res
+        }
+        baseline_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        logger.info(f"Baseline mise a jour: {baseline_path}")
+    elif baseline_path.exists():
+        failures = compare_to_baseline(
+            res, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance
+        )
+        for msg in failures:
+            logger.error(f"REGRESSION {msg}")
+        if failures:
+            sys.exit(1)
+        logger.info(f"Aucune regression (tolerance {args.tolerance:.0%})")
+    else:
+        logger.warning(f"Pas de baseline ({baseline_path}): lancer avec --update_baseline")
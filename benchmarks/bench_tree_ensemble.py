@@ -0,0 +1,123 @@
+"""Benchmark de l'evaluateur NumPy d'arbres contre `predict_proba` natif.
+
+- Entraine LightGBM / XGBoost / CatBoost (si installes) sur X_train
+- Verifie la parite des probabilites sur X_test (tolerance 1e-6)
+- Mesure la latence par batch de 1, 64, 4096 et 1M lignes
+
+Usage:
+    python -m benchmarks.bench_tree_ensemble [--n_estimators 400] [--output bench.json]
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from src.models.tree_ensemble import TreeEnsemble
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+BATCH_SIZES = (1, 64, 4096, 1_000_000)
+
+
+def _load_data() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Charge les splits traites, ou genere des donnees synthetiques a defaut."""
+    if (PROCESSED_DIR / "X_test.npy").exists():
+        return (
+            np.load(PROCESSED_DIR / "X_train.npy"),
+            np.load(PROCESSED_DIR / "y_train.npy"),
+            np.load(PROCESSED_DIR / "X_test.npy"),
+        )
+    logger.info("Splits traites absents: donnees synthetiques")
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(7000, 40))
+    y = (X[:, 0] - X[:, 1] + 0.5 * X[:, 2] * X[:, 3] + rng.normal(size=7000) > 0.8).astype(int)
+    return X[:5600], y[:5600], X[5600:]
+
+
+def _models(n_estimators: int) -> dict[str, Any]:
+    """Instancie les GBDT disponibles."""
+    models: dict[str, Any] = {}
+    try:
+        import lightgbm as lgb
+
+        models["lightgbm"] = lgb.LGBMClassifier(n_estimators=n_estimators, verbose=-1)
+    except ImportError:
+        pass
+    try:
+        import xgboost as xgb
+
+        models["xgboost"] = xgb.XGBClassifier(n_estimators=n_estimators, max_depth=6)
+    except ImportError:
+        pass
+    try:
+        from catboost import CatBoostClassifier
+
+        models["catboost"] = CatBoostClassifier(
+            iterations=n_estimators, depth=6, verbose=False, allow_writing_files=False
+        )
+    except ImportError:
+        pass
+    return models
+
+
+def _time(fn: Callable[[np.ndarray], Any], x: np.ndarray) -> float:
+    """Meilleur temps (secondes) sur quelques repetitions."""
+    repeats = 1 if len(x) >= 100_000 else 20
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(x)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n_estimators: int = 400) -> list[dict[str, Any]]:
+    """Execute le benchmark et retourne une ligne de resultats par (modele, batch)."""
+    X_train, y_train, X_test = _load_data()
+    results = []
+    for name, clf in _models(n_estimators).items():
+        clf.fit(X_train, y_train)
+        ens = TreeEnsemble.from_model(clf)
+        expected = clf.predict_proba(X_test)[:, 1]
+        diff = float(np.abs(ens.predict_proba(X_test)[:, 1] - expected).max())
+        logger.info(f"{name}: {ens.n_trees} arbres, ecart max sur X_test = {diff:.2e}")
+        if diff > 1e-6:
+            raise AssertionError(f"Parite non respectee pour {name}: {diff:.2e}")
+
+        for size in BATCH_SIZES:
+            reps = int(np.ceil(size / len(X_test)))
+            x = np.tile(X_test, (reps, 1))[:size]
+            native = _time(clf.predict_proba, x)
+            numpy_ = _time(ens.predict_proba, x)
+            results.append(
+                {
+                    "model": name,
+                    "batch_size": size,
+                    "native_s": native,
+                    "numpy_s": numpy_,
+                    "speedup": native / numpy_,
+                }
+            )
+            logger.info(
+                f"{name:9s} batch={size:>9d} native={native * 1e3:10.3f} ms "
+                f"numpy={numpy_ * 1e3:10.3f} ms speedup={native / numpy_:6.2f}x"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--n_estimators", type=int, default=400)
+    p.add_argument("--output", type=str, default=None)
+    args = p.parse_args()
+    res = run(args.n_estimators)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
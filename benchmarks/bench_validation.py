@@ -0,0 +1,84 @@
+"""Benchmark de la validation des payloads `list[Record]`.
+
+- Chemin historique: un objet pydantic `Record` par client, `model_dump` par
+  client, puis `pd.DataFrame` sur la liste de dicts
+- Chemin colonnes: `TypeAdapter` sur le JSON brut (TypedDict) puis colonnes
+  numpy typees (src.serving.validation)
+- Verifie que les deux DataFrames sont identiques, puis mesure la latence par
+  payload de 1, 100 et 10 000 clients
+
+Usage:
+    python -m benchmarks.bench_validation [--output bench.json]
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pandas as pd
+from pydantic import TypeAdapter
+
+from src.serving.api import parse_records
+from src.serving.schema import Record
+from src.utils.logging import logger
+from src.utils.paths import DATA_DIR
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def _time(fn: Callable[[bytes], Any], body: bytes, size: int) -> float:
+    """Meilleur temps (secondes) sur quelques repetitions."""
+    repeats = 5 if size >= 10_000 else 200
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run() -> list[dict[str, Any]]:
+    """Execute le benchmark et retourne une ligne de resultats par taille."""
+    base = pd.read_csv(DATA_DIR / "synthetic_customers.csv").astype({"TotalCharges": str})
+    records = json.loads(base.to_json(orient="records"))
+    models = TypeAdapter(list[Record])
+
+    def pydantic_path(body: bytes) -> pd.DataFrame:
+        # Equivalent de FastAPI: json.loads, un modele par client, model_dump
+        items = models.validate_python(json.loads(body))
+        return pd.DataFrame([item.model_dump() for item in items])
+
+    results = []
+    for size in BATCH_SIZES:
+        body = json.dumps((records * (size // len(records) + 1))[:size]).encode()
+        pd.testing.assert_frame_equal(pydantic_path(body), parse_records.parse(body))
+        old = _time(pydantic_path, body, size)
+        new = _time(parse_records.parse, body, size)
+        results.append(
+            {
+                "batch_size": size,
+                "pydantic_ms": old * 1e3,
+                "columnar_ms": new * 1e3,
+                "speedup": old / new,
+            }
+        )
+        logger.info(
+            f"batch={size:>6d} pydantic={old * 1e3:9.3f} ms colonnes={new * 1e3:9.3f} ms "
+            f"speedup={old / new:6.2f}x"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--output", type=str, default=None)
+    args = p.parse_args()
+    res = run()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
@@ -0,0 +1,164 @@
+"""Backend Polars (optionnel) du nettoyage et du feature engineering.
+
+- Meme plan que TelcoCleaner (compile depuis configs/features.yaml) traduit en
+  expressions Polars: conversion numerique de TotalCharges, binarisation Yes/No
+  (les "No internet/phone service" valent 0), tenure_bucket, num_services,
+  total_spend_proxy, contract_paperless
+- Execution paresseuse et multi-thread (LazyFrame, de la lecture CSV au collect),
+  chaines en memoire Arrow au lieu d'objets Python
+- Sortie vers le preprocessor existant (`to_pandas`, sans pyarrow) ou vers
+  l'encodeur natif (`encode_native`: codes entiers calcules en Polars)
+- Choix dans `build_features` par FEATURE_BACKEND=polars (defaut pandas);
+  polars n'est importe que si ce backend est demande
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from src.features.categorical import NativeCategoricalEncoder
+    from src.features.telco_cleaner import TelcoCleaner
+
+
+def feature_backend() -> str:
+    """Backend du nettoyage dans build_features (FEATURE_BACKEND: pandas|polars)."""
+    return os.getenv("FEATURE_BACKEND", "pandas").lower()
+
+
+def scan_csv(path: str | Path) -> pl.LazyFrame:
+    """Lecture paresseuse d'un CSV brut (les cellules vides restent nulles)."""
+    import polars as pl
+
+    return pl.scan_csv(path, infer_schema_length=10_000)
+
+
+def _cast(column: str, kind: str, dtype: pl.DataType) -> pl.Expr:
+    """Conversion d'une colonne selon son type de schema (texte: espaces -> null)."""
+    import polars as pl
+
+    col = pl.col(column)
+    if kind == "int":
+        return col.cast(pl.Int64)
+    if dtype == pl.String:
+        return col.str.strip_chars().cast(pl.Float64, strict=False)
+    return col.cast(pl.Float64) if kind == "float" else col
+
+
+def _bucket(source: str, edges: tuple[float, ...], labels: list[str]) -> pl.Expr:
+    """Tranches [a, b) en Enum ordonne; manquant ou hors bornes -> null."""
+    import polars as pl
+
+    x = pl.col(source).cast(pl.Float64)
+    expr = pl.lit(None, dtype=pl.String)
+    for lo, hi, label in zip(edges[:-1], edges[1:], labels, strict=True):
+        expr = pl.when((x >= lo) & (x < hi)).then(pl.lit(label)).otherwise(expr)
+    return expr.cast(pl.Enum(labels))
+
+
+def _interaction(op: str, sources: tuple[str, ...]) -> pl.Expr:
+    """Produit (manquants -> 0) ou concatenation "a_b" (manquant -> "nan", comme pandas)."""
+    import polars as pl
+
+    if op == "product":
+        expr = pl.lit(1.0)
+        for c in sources:
+            expr = expr * pl.col(c).cast(pl.Float64).fill_null(0.0).fill_nan(0.0)
+        return expr
+    parts = [pl.col(c).cast(pl.String).fill_null("nan") for c in sources]
+    return pl.concat_str(parts, separator="_")
+
+
+def clean_lazy(cleaner: TelcoCleaner, frame: pl.LazyFrame | pl.DataFrame) -> pl.LazyFrame:
+    """Plan du cleaner fitte applique a un LazyFrame (colonnes absentes ignorees)."""
+    import polars as pl
+
+    lf = frame.lazy()
+    schema = lf.collect_schema()
+    present = set(schema.names())
+
+    # 1) Conversions et binarisation des colonnes brutes
+    converted = [
+        _cast(c, kind, schema[c]).alias(c) for c, kind in cleaner.casts_ if c in present
+    ] + [
+        (pl.col(c) == "Yes").fill_null(False).cast(pl.Int64).alias(c)
+        for c in cleaner.binary_cols_
+        if c in present
+    ]
+    # 2) Features derivees, calculees sur les colonnes converties
+    derived = [
+        _bucket(source, edges, labels).alias(name)
+        for name, (source, edges, labels) in cleaner.bins_.items()
+        if source in present
+    ]
+    services = [(pl.col(c) == 1).fill_null(False) for c in cleaner.service_cols_ if c in present]
+    derived.append(
+        (pl.sum_horizontal(services) if services else pl.lit(0))
+        .cast(pl.Int64)
+        .alias("num_services")
+    )
+    derived += [
+        _interaction(op, sources).alias(name)
+        for name, op, sources in cleaner.interactions_
+        if present.issuperset(sources)
+    ]
+    return lf.with_columns(converted).with_columns(derived)
+
+
+def transform(cleaner: TelcoCleaner, frame: pl.LazyFrame | pl.DataFrame) -> pl.DataFrame:
+    """Nettoyage complet (collect multi-thread)."""
+    return clean_lazy(cleaner, frame).collect()
+
+
+def to_pandas(df: pl.DataFrame) -> pd.DataFrame:
+    """DataFrame pandas identique a la sortie de TelcoCleaner.transform (sans pyarrow).
+
+    Chaines -> objets (null -> NaN, comme pandas), Enum -> Categorical ordonne,
+    entiers nullables -> float (NaN).
+    """
+    import polars as pl
+
+    data: dict[str, Any] = {}
+    for name, s in zip(df.columns, df.get_columns(), strict=True):
+        if isinstance(s.dtype, pl.Enum):
+            codes = s.to_physical().cast(pl.Int64).fill_null(-1).to_numpy()
+            data[name] = pd.Categorical.from_codes(
+                codes, categories=s.dtype.categories.to_list(), ordered=True
+            )
+        elif s.dtype == pl.String:
+            values = s.to_numpy()
+            if s.null_count():
+                values[s.is_null().to_numpy()] = np.nan
+            data[name] = values
+        else:
+            data[name] = s.to_numpy()
+    return pd.DataFrame(data, copy=False)
+
+
+def encode_native(
+    encoder: NativeCategoricalEncoder, df: pl.DataFrame
+) -> tuple[np.ndarray, np.ndarray]:
+    """Equivalent Polars de `NativeCategoricalEncoder.encode` (num float32, cat codes)."""
+    import polars as pl
+
+    # Dictionnaire Arrow des modalites apprises: inconnue ou manquante -> -1
+    codes = [
+        pl.col(c)
+        .cast(pl.String)
+        .cast(pl.Enum(encoder.categories_[c]), strict=False)
+        .to_physical()
+        .cast(pl.Int16)
+        .fill_null(-1)
+        .alias(c)
+        for c in encoder.categorical_features_
+    ]
+    cat = df.select(codes).to_numpy().astype(encoder.code_dtype_, copy=False)
+    num = df.select(encoder.numeric_features_).to_numpy().astype(np.float32, copy=False)
+    return num, cat.reshape(len(df), len(encoder.categorical_features_))
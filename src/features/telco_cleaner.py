@@ -1,93 +1,192 @@
-"""Module TelcoCleaner pour le deploiement.
-
-Ce module contient uniquement la classe TelcoCleaner sans dependances
-externes pour faciliter le chargement des artefacts sur Render.
+"""Nettoyage declaratif du dataset Telco, pilote par configs/features.yaml.
+
+- Le schema decrit les types des colonnes brutes, les colonnes binaires Yes/No,
+  les services comptes dans num_services, les tranches (tenure_bucket) et les
+  interactions (total_spend_proxy, contract_paperless)
+- Le plan est compile une seule fois au fit (listes de colonnes, bornes et
+  libelles des tranches) puis picke avec le cleaner: aucune introspection des
+  valeurs a chaque appel, le resultat d'une ligne ne depend pas du batch
+- Execution vectorisee sur des tableaux numpy: seules les colonnes du plan sont
+  recalculees, les autres sont reprises telles quelles
+- Entree DataFrame (sortie DataFrame, meme index et meme ordre de colonnes) ou
+  dict colonne -> valeurs (sortie dict de tableaux), pour le serving unitaire
+
+Le schema (PyYAML) n'est lu qu'au fit: le depickling pour le serving n'a besoin
+que de numpy, pandas et scikit-learn.
 """
 
 from __future__ import annotations
 
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
 import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 
+from src.utils.paths import CONFIGS_DIR
+
+FEATURES_SCHEMA_PATH = CONFIGS_DIR / "features.yaml"
+
+
+def _to_float(values: np.ndarray) -> np.ndarray:
+    return pd.to_numeric(values, errors="coerce").astype(np.float64, copy=False)
+
+
+def _to_numeric(values: np.ndarray) -> np.ndarray:
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _to_int(values: np.ndarray) -> np.ndarray:
+    return np.asarray(values).astype(np.int64)
+
+
+# Conversions par type du schema ("str": colonne inchangee)
+CASTS: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "float": _to_float,
+    "numeric": _to_numeric,
+    "int": _to_int,
+}
+INTERACTION_OPS = ("product", "concat")
+
+
+def load_schema(schema: str | Path | Mapping[str, Any] | None = None) -> dict[str, Any]:
+    """Schema des features: dict deja charge, chemin YAML ou configs/features.yaml."""
+    if isinstance(schema, Mapping):
+        return dict(schema)
+    import yaml
+
+    path = Path(schema) if schema is not None else FEATURES_SCHEMA_PATH
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def bin_labels(edges: tuple[float, ...]) -> list[str]:
+    """Libelles "[a,b)" des tranches (derniere borne np.inf)."""
+    return [f"[{edges[i]},{edges[i + 1]})" for i in range(len(edges) - 1)]
+
+
+def _cut(values: np.ndarray, edges: tuple[float, ...], labels: list[str]) -> pd.Categorical:
+    """Tranches [a, b) comme pd.cut(right=False); NaN, inf et < premiere borne -> NaN."""
+    x = np.asarray(values, dtype=np.float64)
+    codes = np.searchsorted(edges, x, side="right") - 1
+    codes[codes >= len(labels)] = -1
+    return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+
+def _interaction(op: str, arrays: list[np.ndarray]) -> np.ndarray:
+    """Produit (manquants -> 0) ou concatenation "a_b" des colonnes sources."""
+    if op == "product":
+        result: Any = 1.0
+        for values in arrays:
+            x = np.asarray(values, dtype=np.float64)
+            result = result * np.where(np.isnan(x), 0.0, x)
+        return result
+    parts = [np.asarray(values).astype(str).astype(object) for values in arrays]
+    result = parts[0]
+    for part in parts[1:]:
+        result = result + "_" + part
+    return result
+
 
 class TelcoCleaner(BaseEstimator, TransformerMixin):
     """Nettoyage et enrichissement specifiques au dataset Telco.
 
-    - Convertit TotalCharges en float (gestion d'espaces vides)
-    - Normalise "No internet/phone service" -> "No"
-    - Cree des features derivees: tenure buckets, num_services, total_spend_proxy
+    Attributs du plan compile au fit:
+    - casts_: [(colonne, type)] des conversions numeriques
+    - binary_cols_: colonnes Yes/No -> 1/0
+    - service_cols_: services comptes dans num_services
+    - bins_: {feature: (source, bornes avec np.inf, libelles)}
+    - interactions_: [(feature, operation, colonnes)]
     """
 
-    def __init__(self, tenure_bins: tuple[int, ...] = (0, 6, 12, 24, 48, 72)) -> None:
-        self.tenure_bins = tenure_bins
-        self.service_cols_: list[str] = []
-
-    def fit(self, X: pd.DataFrame, y: pd.Series | None = None) -> TelcoCleaner:  # noqa: N803
-        """Identifie les colonnes de services."""
-        svc_candidates = [
-            c
-            for c in X.columns
-            if any(
-                k in c.lower()
-                for k in [
-                    "phone",
-                    "internet",
-                    "security",
-                    "backup",
-                    "protection",
-                    "support",
-                    "tv",
-                    "movie",
-                    "lines",
-                ]
-            )
-        ]
-        blacklist = {"PhoneService", "PaperlessBilling"}
-        self.service_cols_ = [c for c in svc_candidates if c not in blacklist]
+    def __init__(self, schema: str | Path | Mapping[str, Any] | None = None) -> None:
+        self.schema = schema
+
+    def fit(self, X: Any, y: Any = None) -> TelcoCleaner:  # noqa: N803
+        """Compile le plan de transformation depuis le schema."""
+        self._compile(load_schema(self.schema))
         return self
 
-    def transform(self, df_in: pd.DataFrame) -> pd.DataFrame:
-        """Transforme le DataFrame avec nettoyage et feature engineering."""
-        df = df_in.copy()
-
-        # Convertir TotalCharges (espaces -> NaN -> float)
-        df["TotalCharges"] = pd.to_numeric(df["TotalCharges"].replace(" ", np.nan), errors="coerce")
-
-        # Normaliser "No internet/phone service" -> "No"
-        replace_vals = {"No internet service": "No", "No phone service": "No"}
-        df = df.replace(replace_vals)
-
-        # Binariser Yes/No -> 1/0 pour colonnes clairement binaires
-        bin_cols = [c for c in df.columns if df[c].dropna().isin(["Yes", "No"]).all()]
-        for c in bin_cols:
-            df[c] = (df[c] == "Yes").astype(int)
-
-        # SeniorCitizen est 0/1 deja numerique
-        if "SeniorCitizen" in df.columns:
-            df["SeniorCitizen"] = df["SeniorCitizen"].astype(int)
-
-        # Creer tenure buckets
-        if "tenure" in df.columns:
-            bins = list(self.tenure_bins) + [np.inf]
-            labels = [f"[{bins[i]},{bins[i+1]})" for i in range(len(bins) - 1)]
-            df["tenure_bucket"] = pd.cut(df["tenure"], bins=bins, labels=labels, right=False)
-
-        # Compter le nombre de services actifs (Yes)
-        services = [c for c in self.service_cols_ if c in df.columns]
-        if services:
-            df["num_services"] = df[services].apply(lambda r: int(sum(v == 1 for v in r)), axis=1)
-        else:
-            df["num_services"] = 0
-
-        # Depense cumulee proxy
-        if set(["tenure", "MonthlyCharges"]).issubset(df.columns):
-            df["total_spend_proxy"] = df["tenure"].fillna(0) * df["MonthlyCharges"].fillna(0)
-
-        # Interaction Contract x PaperlessBilling
-        if set(["Contract", "PaperlessBilling"]).issubset(df.columns):
-            df["contract_paperless"] = (
-                df["Contract"].astype(str) + "_" + df["PaperlessBilling"].astype(str)
+    def _compile(self, schema: Mapping[str, Any]) -> None:
+        columns = schema.get("columns", {})
+        unknown = {t for t in columns.values() if t != "str" and t not in CASTS}
+        if unknown:
+            raise ValueError(f"Types de colonnes inconnus dans le schema: {sorted(unknown)}")
+        self.casts_ = [(c, t) for c, t in columns.items() if t != "str"]
+        self.binary_cols_ = list(schema.get("binary", []))
+        self.service_cols_ = list(schema.get("services", []))
+
+        self.bins_: dict[str, tuple[str, tuple[float, ...], list[str]]] = {}
+        for name, spec in (schema.get("bins") or {}).items():
+            edges = (*spec["edges"], np.inf)
+            self.bins_[name] = (spec["source"], edges, bin_labels(edges))
+
+        self.interactions_: list[tuple[str, str, tuple[str, ...]]] = []
+        for name, spec in (schema.get("interactions") or {}).items():
+            if spec["op"] not in INTERACTION_OPS:
+                raise ValueError(f"Interaction {name}: operation inconnue {spec['op']!r}")
+            self.interactions_.append((name, spec["op"], tuple(spec["columns"])))
+
+        # Colonnes lues par le plan (extraction des seuls tableaux utiles)
+        self.inputs_ = list(
+            dict.fromkeys(
+                [c for c, _ in self.casts_]
+                + self.binary_cols_
+                + self.service_cols_
+                + [source for source, _, _ in self.bins_.values()]
+                + [c for _, _, cols in self.interactions_ for c in cols]
             )
-
-        return df
+        )
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Cleaners pickles avant le schema: plan compile depuis le schema par defaut."""
+        super().__setstate__(state)
+        if "casts_" not in state:
+            self.schema = None
+            self._compile(load_schema())
+            if "tenure_bins" in state:
+                edges = (*state["tenure_bins"], np.inf)
+                self.bins_["tenure_bucket"] = ("tenure", edges, bin_labels(edges))
+
+    def _apply(self, cols: Mapping[str, np.ndarray], n: int) -> dict[str, Any]:
+        """Colonnes converties ou creees par le plan (les autres ne sont pas lues)."""
+        out: dict[str, Any] = {}
+
+        def get(c: str) -> Any:
+            return out[c] if c in out else cols[c]
+
+        for c, kind in self.casts_:
+            if c in cols:
+                out[c] = CASTS[kind](cols[c])
+        for c in self.binary_cols_:
+            if c in cols:
+                out[c] = (np.asarray(cols[c], dtype=object) == "Yes").astype(np.int64)
+
+        for name, (source, edges, labels) in self.bins_.items():
+            if source in cols:
+                out[name] = _cut(get(source), edges, labels)
+
+        services = [np.asarray(get(c)) == 1 for c in self.service_cols_ if c in cols]
+        out["num_services"] = (
+            np.sum(services, axis=0, dtype=np.int64) if services else np.zeros(n, dtype=np.int64)
+        )
+
+        for name, op, sources in self.interactions_:
+            if all(c in cols for c in sources):
+                out[name] = _interaction(op, [get(c) for c in sources])
+        return out
+
+    def transform(self, X: pd.DataFrame | Mapping[str, Any]) -> Any:  # noqa: N803
+        """Applique le plan: DataFrame -> DataFrame, dict de colonnes -> dict de tableaux."""
+        if isinstance(X, pd.DataFrame):
+            cols = {c: X[c].to_numpy() for c in self.inputs_ if c in X.columns}
+            changed = self._apply(cols, len(X))
+            # Un seul assemblage: colonnes d'origine (converties en place), puis derivees
+            data = {c: changed[c] if c in changed else X[c].to_numpy() for c in X.columns}
+            data.update((c, v) for c, v in changed.items() if c not in data)
+            return pd.DataFrame(data, index=X.index, copy=False)
+        cols = {c: np.atleast_1d(np.asarray(v)) for c, v in X.items()}
+        n = len(next(iter(cols.values()))) if cols else 0
+        return {**cols, **self._apply(cols, n)}
@@ -0,0 +1,199 @@
+"""Compression post-entrainement du modele (precision reduite / troncature).
+
+- Regression logistique: coefficients en float32/float16, features en float32
+- GBDT: export `TreeEnsemble`, seuils et valeurs de feuilles en float32/float16,
+  indices de features compacts, troncature optionnelle de l'ensemble
+- Garde-fou: le modele compresse n'est promu que si l'AUC test (evaluate.py)
+  baisse de moins de la tolerance configuree
+- Rapport: empreinte memoire (taille serialisee) et debit de scoring
+- Modele promu ecrit en joblib (`model_compressed.joblib` dans le dossier du
+  modele MLflow et dans data/processed), servi si SERVE_COMPRESSED_MODEL=true
+
+Configuration par variables d'environnement:
+COMPRESSION_DTYPE (float32|float16|none), COMPRESSION_MAX_TREES,
+COMPRESSION_AUC_TOLERANCE.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import time
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+
+from src.models.evaluate import compute_metrics
+from src.models.tree_ensemble import TreeEnsemble
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+COMPRESSED_MODEL_PATH = PROCESSED_DIR / "model_compressed.joblib"
+COMPRESSED_ARTIFACT = "model_compressed.joblib"
+
+
+@dataclass
+class CompressionConfig:
+    """Configuration de la compression post-entrainement."""
+
+    dtype: str = "float32"
+    max_trees: int | None = None
+    auc_tolerance: float = 0.002
+
+    @classmethod
+    def from_env(cls) -> CompressionConfig:
+        """Lit la configuration depuis l'environnement."""
+        max_trees = os.getenv("COMPRESSION_MAX_TREES")
+        return cls(
+            dtype=os.getenv("COMPRESSION_DTYPE", cls.dtype).lower(),
+            max_trees=int(max_trees) if max_trees else None,
+            auc_tolerance=float(os.getenv("COMPRESSION_AUC_TOLERANCE", str(cls.auc_tolerance))),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.dtype != "none"
+
+
+@dataclass
+class CompressedLinearModel:
+    """Regression logistique binaire en precision reduite."""
+
+    coef: np.ndarray  # (n_features,)
+    intercept: float
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:  # noqa: N803
+        """Probabilites (n, 2); calcul en float32."""
+        x = np.asarray(X, dtype=np.float32)
+        logit = x @ self.coef.astype(np.float32) + np.float32(self.intercept)
+        p1 = 1.0 / (1.0 + np.exp(-logit.astype(np.float64)))
+        return np.column_stack([1.0 - p1, p1])
+
+
+@dataclass
+class CompressionReport:
+    """Resultat de la compression et decision de promotion."""
+
+    auc_original: float
+    auc_compressed: float
+    bytes_original: int
+    bytes_compressed: int
+    rows_per_s_original: float
+    rows_per_s_compressed: float
+    promoted: bool
+
+    @property
+    def auc_drop(self) -> float:
+        return self.auc_original - self.auc_compressed
+
+    def as_metrics(self) -> dict[str, float]:
+        """Metriques plates pour MLflow."""
+        return {
+            "compression_auc_original": self.auc_original,
+            "compression_auc_compressed": self.auc_compressed,
+            "compression_auc_drop": self.auc_drop,
+            "compression_bytes_original": float(self.bytes_original),
+            "compression_bytes_compressed": float(self.bytes_compressed),
+            "compression_size_ratio": self.bytes_compressed / max(1, self.bytes_original),
+            "compression_throughput_ratio": self.rows_per_s_compressed
+            / max(1e-12, self.rows_per_s_original),
+            "compression_promoted": float(self.promoted),
+        }
+
+
+def compress_model(model: Any, config: CompressionConfig) -> Any:
+    """Retourne une variante compressee du modele (LogReg ou GBDT)."""
+    dtype = np.dtype(config.dtype)
+    if hasattr(model, "coef_"):
+        coef = np.asarray(model.coef_)
+        if coef.shape[0] != 1:
+            raise ValueError("Seule la classification binaire est supportee")
+        return CompressedLinearModel(
+            coef=coef[0].astype(dtype), intercept=float(np.asarray(model.intercept_)[0])
+        )
+
+    ens = model if isinstance(model, TreeEnsemble) else TreeEnsemble.from_model(model)
+    if config.max_trees is not None and config.max_trees < ens.n_trees:
+        ens = _truncate(ens, config.max_trees)
+    n_features = int(ens.feature.max()) + 1 if len(ens.feature) else 1
+    return replace(
+        ens,
+        feature=ens.feature.astype(np.int16 if n_features < 2**15 else np.int32),
+        threshold=ens.threshold.astype(dtype),
+        value=ens.value.astype(dtype),
+        float32_inputs=True,
+    )
+
+
+def _truncate(ens: TreeEnsemble, n_trees: int) -> TreeEnsemble:
+    """Conserve les `n_trees` premiers arbres (arret anticipe du boosting)."""
+    end = int(ens.roots[n_trees])
+    is_leaf = ens.left[:end] == np.arange(end)
+    depth = _max_depth(ens.left[:end], ens.right[:end], ens.roots[:n_trees], is_leaf)
+    return replace(
+        ens,
+        feature=ens.feature[:end],
+        threshold=ens.threshold[:end],
+        left=ens.left[:end],
+        right=ens.right[:end],
+        default_left=ens.default_left[:end],
+        missing=ens.missing[:end],
+        value=ens.value[:end],
+        roots=ens.roots[:n_trees],
+        max_depth=depth,
+    )
+
+
+def _max_depth(left: np.ndarray, right: np.ndarray, roots: np.ndarray, is_leaf: np.ndarray) -> int:
+    """Profondeur maximale, niveau par niveau sur tous les arbres."""
+    frontier = roots.astype(np.int64)
+    depth = 0
+    while True:
+        frontier = frontier[~is_leaf[frontier]]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+def _footprint(model: Any) -> int:
+    """Taille serialisee (octets), comparable entre modele natif et compresse."""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _throughput(model: Any, x: np.ndarray, repeats: int = 3) -> float:
+    """Lignes scorees par seconde (meilleur de quelques repetitions)."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        model.predict_proba(x)
+        best = min(best, time.perf_counter() - t0)
+    return len(x) / best
+
+
+def compress_and_validate(
+    model: Any, X_test: np.ndarray, y_test: np.ndarray, config: CompressionConfig  # noqa: N803
+) -> tuple[Any, CompressionReport]:
+    """Compresse le modele et applique le garde-fou AUC sur le test set."""
+    compressed = compress_model(model, config)
+    auc_original = compute_metrics(y_test, model.predict_proba(X_test)[:, 1])["auc"]
+    auc_compressed = compute_metrics(y_test, compressed.predict_proba(X_test)[:, 1])["auc"]
+
+    bench = np.tile(X_test, (max(1, 50_000 // max(1, len(X_test))), 1))
+    report = CompressionReport(
+        auc_original=auc_original,
+        auc_compressed=auc_compressed,
+        bytes_original=_footprint(model),
+        bytes_compressed=_footprint(compressed),
+        rows_per_s_original=_throughput(model, bench),
+        rows_per_s_compressed=_throughput(compressed, bench),
+        promoted=auc_original - auc_compressed < config.auc_tolerance,
+    )
+    logger.info(
+        f"Compression {config.dtype}: AUC {auc_original:.4f} -> {auc_compressed:.4f} | "
+        f"taille {report.bytes_original} -> {report.bytes_compressed} octets | "
+        f"debit {report.rows_per_s_original:.0f} -> {report.rows_per_s_compressed:.0f} lignes/s | "
+        f"promu={report.promoted}"
+    )
+    return compressed, report
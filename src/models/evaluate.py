@@ -2,16 +2,179 @@
 """Évaluation sur le test set.
 
 - Charge meilleur modèle du dernier run (via MLflow run_id passé en env)
+- Intervalles de confiance bootstrap (AUC/AP/F1) vectorisés sur tous les réplicats
+- Métriques par segment (Contract, tenure_bucket, InternetService)
+- Probabilités calibrées (calibration.json du modèle) avant les seuils, ECE test
+  avant/après calibration
+- Seuils de décision choisis à l'entraînement (thresholds.json du modèle, prédictions
+  out-of-fold): le test set est seulement scoré à ces seuils, jamais utilisé pour les choisir
+- Log des métriques et du rapport par segment dans MLflow
 """
 from __future__ import annotations
 import os
+import re
 import numpy as np
+import pandas as pd
 import mlflow
-from sklearn.metrics import classification_report, roc_auc_score, average_precision_score
+from sklearn.metrics import classification_report, roc_auc_score, average_precision_score, f1_score
+from src.features.categorical import load_native_split, uses_native_categoricals
+from src.models.calibration import calibrate, calibration_metrics, load_calibrator
+from src.models.thresholds import CostMatrix, load_operating_points, metrics_at
+from src.monitoring.drift import save_score_profile
 from src.utils.paths import PROCESSED_DIR
 from src.utils.logging import logger
 from pathlib import Path
 
+SLICE_COLUMNS = ("Contract", "tenure_bucket", "InternetService")
+
+
+def compute_metrics(
+    y_true: np.ndarray, proba: np.ndarray, threshold: float = 0.5
+) -> dict[str, float]:
+    """AUC, AP et F1 (au seuil donné) d'un vecteur de probabilités."""
+    preds = (proba >= threshold).astype(int)
+    return {
+        "auc": float(roc_auc_score(y_true, proba)),
+        "ap": float(average_precision_score(y_true, proba)),
+        "f1": float(f1_score(y_true, preds)),
+    }
+
+
+def _weighted_metrics(pos: np.ndarray, neg: np.ndarray, above: np.ndarray) -> dict[str, np.ndarray]:
+    """AUC/AP/F1 à partir de comptes pondérés par groupe de scores ex aequo.
+
+    Args:
+    pos, neg: (B, G) comptes de positifs/négatifs par groupe, scores croissants
+    above: (G,) booléen, groupe prédit positif (score >= seuil)
+    """
+    n_pos = pos.sum(axis=1)
+    n_neg = neg.sum(axis=1)
+
+    # AUC de Mann-Whitney: négatifs strictement inférieurs + moitié des ex aequo
+    neg_before = np.cumsum(neg, axis=1) - neg
+    with np.errstate(divide="ignore", invalid="ignore"):
+        auc = (pos * (neg_before + 0.5 * neg)).sum(axis=1) / (n_pos * n_neg)
+
+        # AP: parcours des seuils par scores décroissants
+        tp = np.cumsum(pos[:, ::-1], axis=1)
+        fp = np.cumsum(neg[:, ::-1], axis=1)
+        precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 0.0)
+        ap = (pos[:, ::-1] * precision).sum(axis=1) / n_pos
+
+        tp_t = pos[:, above].sum(axis=1)
+        fp_t = neg[:, above].sum(axis=1)
+        f1 = 2 * tp_t / (2 * tp_t + fp_t + (n_pos - tp_t))
+    return {"auc": auc, "ap": ap, "f1": f1}
+
+
+def _tie_groups(proba: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tri unique des scores: ordre, débuts de groupes ex aequo et score par groupe."""
+    order = np.argsort(proba, kind="mergesort")
+    s = proba[order]
+    starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+    return order, starts, s[starts]
+
+
+def _score_cells(
+    y: np.ndarray, proba: np.ndarray, threshold: float, max_groups: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Comptes (positifs, négatifs) par groupe de scores croissants.
+
+    Groupes = scores distincts si leur nombre tient dans `max_groups`, sinon
+    quantiles de score (le seuil est toujours une borne, F1 reste exact).
+    """
+    _, _, uniq = _tie_groups(proba)
+    if len(uniq) <= max_groups:
+        edges = uniq[1:]
+    else:
+        qs = np.quantile(proba, np.linspace(0, 1, max_groups + 1)[1:-1])
+        edges = np.unique(np.r_[qs, threshold])
+    gid = np.searchsorted(edges, proba, side="right")
+    n_groups = len(edges) + 1
+    total = np.bincount(gid, minlength=n_groups)
+    pos = np.bincount(gid, weights=y, minlength=n_groups).astype(np.int64)
+    above = np.bincount(gid, weights=proba >= threshold, minlength=n_groups) == total
+    return pos, total - pos, above
+
+
+def bootstrap_metrics(
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    n_boot: int = 1000,
+    threshold: float = 0.5,
+    seed: int = 42,
+    max_groups: int = 8192,
+) -> dict[str, np.ndarray]:
+    """Réplicats bootstrap de AUC/AP/F1, tous calculés en une passe matricielle.
+
+    Les scores sont triés une seule fois et regroupés en cellules
+    (groupe de score x classe). Rééchantillonner n lignes avec remise revient
+    à tirer les comptes par cellule selon une multinomiale: on tire donc une
+    matrice (n_boot, cellules) en un appel, puis les métriques par rangs sont
+    calculées pour tous les réplicats à la fois. Le coût ne dépend plus de n.
+
+    Au-delà de `max_groups` scores distincts, les groupes sont des quantiles;
+    les réplicats sont alors recentrés sur l'estimation exacte.
+    """
+    y = np.asarray(y_true).astype(bool)
+    proba = np.asarray(proba, dtype=np.float64)
+    pos, neg, above = _score_cells(y, proba, threshold, max_groups)
+    n_groups = len(pos)
+
+    rng = np.random.default_rng(seed)
+    cells = np.r_[pos, neg].astype(np.float64)
+    counts = rng.multinomial(len(y), cells / cells.sum(), size=n_boot)
+    samples = _weighted_metrics(counts[:, :n_groups], counts[:, n_groups:], above)
+
+    # Recentrage: écart entre métrique exacte et métrique sur cellules (nul si exact)
+    exact = compute_metrics(y, proba, threshold)
+    grouped = _weighted_metrics(pos[None, :], neg[None, :], above)
+    return {k: v + (exact[k] - grouped[k][0]) for k, v in samples.items()}
+
+
+def confidence_intervals(samples: dict[str, np.ndarray], level: float = 0.95) -> dict[str, float]:
+    """Intervalles percentiles (bornes basse/haute) par métrique."""
+    lo, hi = (1 - level) / 2, 1 - (1 - level) / 2
+    cis = {}
+    for name, values in samples.items():
+        values = values[np.isfinite(values)]
+        cis[f"{name}_ci_low"] = float(np.quantile(values, lo))
+        cis[f"{name}_ci_high"] = float(np.quantile(values, hi))
+    return cis
+
+
+def slice_metrics(
+    segments: pd.DataFrame, y_true: np.ndarray, proba: np.ndarray, threshold: float = 0.5
+) -> list[dict]:
+    """Métriques par segment (effectif, taux de churn, AUC/AP/F1)."""
+    y = np.asarray(y_true).astype(bool)
+    proba = np.asarray(proba, dtype=np.float64)
+    rows = []
+    for col in segments.columns:
+        values = segments[col].astype(str).to_numpy()
+        for value in np.unique(values):
+            mask = values == value
+            order, starts, group_scores = _tie_groups(proba[mask])
+            y_sorted = y[mask][order].astype(np.int64)
+            pos = np.add.reduceat(y_sorted, starts)[None, :]
+            neg = np.add.reduceat(1 - y_sorted, starts)[None, :]
+            m = _weighted_metrics(pos, neg, group_scores >= threshold)
+            rows.append(
+                {
+                    "column": col,
+                    "value": value,
+                    "n": int(mask.sum()),
+                    "churn_rate": float(y[mask].mean()),
+                    **{k: float(v[0]) for k, v in m.items()},
+                }
+            )
+    return rows
+
+
+def _metric_name(*parts: str) -> str:
+    """Nom de métrique compatible MLflow."""
+    return re.sub(r"[^\w\-. /:]", "_", "_".join(parts))
+
 
 def evaluate() -> None:
     # Si RUN_ID non fourni, prend le dernier run local
@@ -25,17 +188,66 @@ def evaluate() -> None:
 
     model = mlflow.sklearn.load_model(f"runs:/{run_id}/model")
 
-    X_test = np.load(PROCESSED_DIR / "X_test.npy")
+    # Sortie de features du modèle: One-Hot ou catégorielles natives
+    if uses_native_categoricals(model):
+        X_test = load_native_split("test")
+    else:
+        X_test = np.load(PROCESSED_DIR / "X_test.npy")
     y_test = np.load(PROCESSED_DIR / "y_test.npy")
 
-    proba = model.predict_proba(X_test)[:, 1]
-    preds = (proba >= 0.5).astype(int)
+    raw = model.predict_proba(X_test)[:, 1]
+    calibrator = load_calibrator(f"runs:/{run_id}/model", fallback=False)
+    proba = calibrate(calibrator, raw)
+
+    # Seuils fixés à l'entraînement sur les prédictions out-of-fold, F1 au seuil de décision
+    points = load_operating_points(f"runs:/{run_id}/model")
+    threshold = points.decision
+    costs = CostMatrix(**points.costs) if points.costs else None
+    at_decision = metrics_at(y_test, proba, threshold, costs)
+    preds = (proba >= threshold).astype(int)
 
-    auc = roc_auc_score(y_test, proba)
-    ap = average_precision_score(y_test, proba)
+    metrics = compute_metrics(y_test, proba, threshold)
+    auc, ap = metrics["auc"], metrics["ap"]
     report = classification_report(y_test, preds, output_dict=False)
 
-    logger.info(f"Test AUC: {auc:.4f} | AP: {ap:.4f}")
+    # Intervalles de confiance bootstrap
+    n_boot = int(os.getenv("EVAL_BOOTSTRAP", "1000"))
+    cis = confidence_intervals(bootstrap_metrics(y_test, proba, n_boot=n_boot, threshold=threshold))
+
+    # Métriques par segment (colonnes nettoyées, même ordre que X_test)
+    preview = PROCESSED_DIR / "test_transformed_preview.csv"
+    slices: list[dict] = []
+    if preview.exists():
+        segments = pd.read_csv(preview, usecols=lambda c: c in SLICE_COLUMNS)
+        slices = slice_metrics(segments, y_test, proba, threshold)
+
+    with mlflow.start_run(run_id=run_id):
+        mlflow.log_metrics({f"test_{k}": v for k, v in metrics.items()})
+        mlflow.log_metrics({f"test_{k}": v for k, v in cis.items()})
+        mlflow.log_metrics(calibration_metrics(y_test, raw, proba, prefix="test"))
+        mlflow.log_metrics({f"test_{k}_at_decision": v for k, v in at_decision.items()})
+        for row in slices:
+            for k in ("auc", "ap", "f1"):
+                if np.isfinite(row[k]):
+                    mlflow.log_metric(_metric_name("test", k, row["column"], row["value"]), row[k])
+        mlflow.log_dict(
+            {"bootstrap": {"n_boot": n_boot, **cis}, "slices": slices},
+            "evaluation/test_report.json",
+        )
+    # Distribution de reference des scores (suivi de derive par l'API)
+    save_score_profile(proba)
+
+    logger.info(
+        f"Seuils: décision={points.decision:.4f} modéré={points.moderate:.4f} "
+        f"F1={points.f1:.4f} | coût attendu test={at_decision['expected_cost']:.2f}"
+    )
+    logger.info(
+        f"Test AUC: {auc:.4f} [{cis['auc_ci_low']:.4f}, {cis['auc_ci_high']:.4f}] | "
+        f"AP: {ap:.4f} [{cis['ap_ci_low']:.4f}, {cis['ap_ci_high']:.4f}] | "
+        f"F1: {metrics['f1']:.4f} [{cis['f1_ci_low']:.4f}, {cis['f1_ci_high']:.4f}]"
+    )
+    if slices:
+        print(pd.DataFrame(slices).to_string(index=False))
     print(report)
 if __name__ == "__main__":
-    evaluate()
\ No newline at end of file
+    evaluate()
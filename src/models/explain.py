@@ -0,0 +1,161 @@
+"""Explications SHAP par client, ramenees aux champs bruts de `Record`.
+
+- TreeSHAP (shap.TreeExplainer, chemin des arbres) pour LightGBM/XGBoost/CatBoost
+- SHAP lineaire exact pour la regression logistique: coef * (x - moyenne de fond)
+- Calcul en batch sur les features transformees, puis projection sur les champs
+  bruts par une matrice (features transformees x champs): les groupes one-hot
+  reviennent a leur colonne d'origine, les features derivees sont reparties a
+  parts egales entre leurs colonnes sources (plan du cleaner fitte: tranches,
+  services, interactions de configs/features.yaml)
+- Contributions en log-odds: base_value + somme des contributions = logit du modele
+- Cache LRU par hash de ligne brute: une requete ne recalcule que les clients nouveaux
+
+Configuration par variables d'environnement: EXPLAIN_CACHE_SIZE.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+
+def derived_sources(cleaner: Any) -> dict[str, tuple[str, ...]]:
+    """Colonnes brutes a l'origine des features derivees, lues dans le plan du cleaner fitte.
+
+    Meme source que le cleaner (configs/features.yaml compile au fit): tranches,
+    services comptes dans num_services, interactions.
+    """
+    sources = {name: (source,) for name, (source, _, _) in cleaner.bins_.items()}
+    sources["num_services"] = tuple(cleaner.service_cols_)
+    sources.update({name: tuple(cols) for name, _, cols in cleaner.interactions_})
+    return sources
+
+
+def field_projection(preprocessor: Any, cleaner: Any) -> tuple[np.ndarray, list[str]]:
+    """Matrice (n_features_transformees, n_champs) et liste des champs bruts.
+
+    Chaque ligne somme a 1, ce qui conserve l'additivite des contributions.
+    """
+    derived = derived_sources(cleaner)
+    sources: list[tuple[str, ...]] = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder" or transformer == "drop":
+            continue
+        encoder = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+        # OneHotEncoder: une colonne de sortie par categorie
+        widths = (
+            [len(c) for c in encoder.categories_]
+            if hasattr(encoder, "categories_") and hasattr(encoder, "drop_idx_")
+            else [1] * len(columns)
+        )
+        for col, width in zip(columns, widths, strict=True):
+            # Feature sans source connue (ou num_services sans service): champ propre
+            sources.extend([derived.get(col, (col,)) or (col,)] * width)
+
+    fields = list(dict.fromkeys(f for group in sources for f in group))
+    index = {f: i for i, f in enumerate(fields)}
+    projection = np.zeros((len(sources), len(fields)))
+    for row, group in enumerate(sources):
+        projection[row, [index[f] for f in group]] = 1.0 / len(group)
+    return projection, fields
+
+
+def _background_mean(n_features: int) -> np.ndarray:
+    """Moyenne des features d'entrainement (reference du SHAP lineaire)."""
+    path = PROCESSED_DIR / "X_train.npy"
+    if path.exists():
+        x = np.load(path, mmap_mode="r")
+        if x.shape[1] == n_features:
+            return np.asarray(x.mean(axis=0), dtype=np.float64)
+    logger.warning("X_train.npy indisponible: reference SHAP lineaire = 0")
+    return np.zeros(n_features)
+
+
+class ShapExplainer:
+    """Explainer construit une fois au chargement des artefacts."""
+
+    def __init__(
+        self,
+        model: Any,
+        preprocessor: Any,
+        cleaner: Any,
+        background: np.ndarray | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        self.preprocessor = preprocessor
+        self.cleaner = cleaner
+        self.projection, self.fields = field_projection(preprocessor, cleaner)
+        n_features = self.projection.shape[0]
+        self.cache_size = (
+            int(os.getenv("EXPLAIN_CACHE_SIZE", "10000")) if cache_size is None else cache_size
+        )
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+        if hasattr(model, "coef_"):
+            # SHAP lineaire exact (features independantes), espace log-odds
+            self._coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+            mean = _background_mean(n_features) if background is None else background
+            self._mean = np.asarray(mean, dtype=np.float64)
+            self.base_value = float(self._coef @ self._mean + np.ravel(model.intercept_)[0])
+            self._tree = None
+        else:
+            import shap
+
+            self._tree = shap.TreeExplainer(model)
+            # CatBoost avec categorielles natives: valeur de base connue au premier calcul
+            expected = self._tree.expected_value
+            self.base_value = None if expected is None else float(np.ravel(expected)[-1])
+
+    def _shap_values(self, x: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Contributions (n, n_features_transformees) en log-odds."""
+        if not isinstance(x, pd.DataFrame):
+            # DataFrame conserve tel quel: codes categoriels natifs (CatBoost)
+            x = np.asarray(x, dtype=np.float64)
+        if self._tree is None:
+            return (x - self._mean) * self._coef
+        values = self._tree.shap_values(x)
+        if self.base_value is None:
+            self.base_value = float(np.ravel(self._tree.expected_value)[-1])
+        if isinstance(values, list):
+            values = values[-1]
+        values = np.asarray(values, dtype=np.float64)
+        return values[..., -1] if values.ndim == 3 else values
+
+    def explain(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """Contributions par champ brut (une ligne par client, meme index)."""
+        keys = pd.util.hash_pandas_object(df_raw, index=False).to_numpy()
+        out = np.empty((len(df_raw), len(self.fields)))
+        with self._lock:
+            cached = [self._cache.get(k) for k in keys]
+            for k in keys:
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+        missing = np.array([i for i, v in enumerate(cached) if v is None], dtype=np.intp)
+        for i, v in enumerate(cached):
+            if v is not None:
+                out[i] = v
+
+        if len(missing):
+            batch = df_raw.iloc[missing]
+            x = self.preprocessor.transform(self.cleaner.transform(batch))
+            out[missing] = self._shap_values(x) @ self.projection
+            with self._lock:
+                for i in missing:
+                    self._cache[keys[i]] = out[i].copy()
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return pd.DataFrame(out, index=df_raw.index, columns=self.fields)
+
+    def churn_proba(self, contributions: pd.DataFrame) -> np.ndarray:
+        """Probabilite reconstruite: sigmoide(base_value + somme des contributions)."""
+        logit = self.base_value + contributions.to_numpy().sum(axis=1)
+        return 1.0 / (1.0 + np.exp(-logit))
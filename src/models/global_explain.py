@@ -0,0 +1,194 @@
+"""Explications globales precalculees a l'entrainement.
+
+- Importance globale: moyenne des |SHAP| par champ brut sur un echantillon
+- Dependance partielle (PDP) de tenure / MonthlyCharges / TotalCharges sur une
+  grille de quantiles, globale et par type de contrat (grilles d'interaction)
+- Toutes les variantes (variable, contrat, valeur) sont empilees et scorees en
+  un seul appel batch du pipeline complet, puis calibrees ligne a ligne avant la
+  moyenne: courbes sur la meme echelle que le score affiche par l'UI et l'API
+- Tables compactes (npz) stockees avec le modele dans MLflow et dans
+  data/processed: l'UI affiche les courbes "et si ?" par simple lecture
+
+Configuration par variables d'environnement: PDP_SAMPLE_SIZE, PDP_GRID_SIZE.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.models.calibration import Calibrator, calibrate
+from src.models.explain import ShapExplainer
+from src.utils.logging import logger
+from src.utils.paths import INTERIM_DIR, PROCESSED_DIR
+
+PDP_FEATURES = ("tenure", "MonthlyCharges", "TotalCharges")
+CONTRACTS = ("Month-to-month", "One year", "Two year")
+
+GLOBAL_EXPLANATIONS_PATH = PROCESSED_DIR / "global_explanations.npz"
+GLOBAL_EXPLANATIONS_ARTIFACT = "global_explanations.npz"
+
+
+@dataclass
+class GlobalExplanations:
+    """Tables d'importance et de dependance partielle."""
+
+    fields: np.ndarray  # (F,) champs bruts
+    importance: np.ndarray  # (F,) moyenne des |SHAP| (log-odds)
+    contracts: np.ndarray  # (C,)
+    grids: dict[str, np.ndarray]  # variable -> (G,)
+    pdp: dict[str, np.ndarray]  # variable -> (G,) proba calibree moyenne
+    pdp_contract: dict[str, np.ndarray]  # variable -> (C, G)
+
+    def importance_series(self) -> pd.Series:
+        """Importance globale triee par ordre decroissant."""
+        return pd.Series(self.importance, index=self.fields).sort_values(ascending=False)
+
+    def curve(self, feature: str, contract: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Grille et proba moyenne (globale ou pour un contrat)."""
+        if contract is None:
+            return self.grids[feature], self.pdp[feature]
+        row = int(np.flatnonzero(self.contracts == contract)[0])
+        return self.grids[feature], self.pdp_contract[feature][row]
+
+    def lookup(
+        self, feature: str, values: np.ndarray | float, contract: str | None = None
+    ) -> np.ndarray:
+        """Proba moyenne interpolee (bornee aux extremites de la grille)."""
+        grid, curve = self.curve(feature, contract)
+        return np.interp(values, grid, curve)
+
+    def save(self, path: str | Path = GLOBAL_EXPLANATIONS_PATH) -> Path:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"fields": self.fields, "importance": self.importance, "contracts": self.contracts}
+        for feature in self.grids:
+            arrays[f"grid__{feature}"] = self.grids[feature]
+            arrays[f"pdp__{feature}"] = self.pdp[feature]
+            arrays[f"pdp_contract__{feature}"] = self.pdp_contract[feature]
+        with open(p, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        return p
+
+    @classmethod
+    def load(cls, path: str | Path) -> GlobalExplanations:
+        with np.load(path) as data:
+            tables: dict[str, dict[str, np.ndarray]] = {"grid": {}, "pdp": {}, "pdp_contract": {}}
+            for key in data.files:
+                if "__" in key:
+                    kind, feature = key.split("__", 1)
+                    tables[kind][feature] = data[key]
+            return cls(
+                fields=data["fields"],
+                importance=data["importance"],
+                contracts=data["contracts"],
+                grids=tables["grid"],
+                pdp=tables["pdp"],
+                pdp_contract=tables["pdp_contract"],
+            )
+
+
+def _grid(values: pd.Series, n_grid: int) -> np.ndarray:
+    """Quantiles 1 %..99 % des valeurs observees (sans doublons)."""
+    x = pd.to_numeric(values.replace(" ", np.nan), errors="coerce").dropna().to_numpy()
+    return np.unique(np.quantile(x, np.linspace(0.01, 0.99, n_grid)))
+
+
+def compute_global_explanations(
+    model: Any,
+    sample_raw: pd.DataFrame,
+    cleaner: Any,
+    preprocessor: Any,
+    features: tuple[str, ...] = PDP_FEATURES,
+    n_grid: int = 25,
+    calibrator: Calibrator | None = None,
+) -> GlobalExplanations:
+    """Importance SHAP et PDP (globale et par contrat) sur un echantillon brut."""
+    sample = sample_raw.reset_index(drop=True)
+    n = len(sample)
+    grids = {f: _grid(sample[f], n_grid) for f in features}
+
+    # Une variante = (variable, contrat force ou None): echantillon repete sur la grille
+    variants = [(f, c) for f in features for c in (None, *CONTRACTS)]
+    frames = []
+    for feature, contract in variants:
+        block = sample.iloc[np.tile(np.arange(n), len(grids[feature]))].copy()
+        block[feature] = np.repeat(grids[feature], n)
+        if contract is not None:
+            block["Contract"] = contract
+        frames.append(block)
+    batch = pd.concat(frames, ignore_index=True)
+    raw = model.predict_proba(preprocessor.transform(cleaner.transform(batch)))[:, 1]
+    proba = calibrate(calibrator, raw)
+
+    sizes = [len(grids[f]) * n for f, _ in variants]
+    pdp: dict[str, np.ndarray] = {}
+    per_contract: dict[str, list[np.ndarray]] = {f: [] for f in features}
+    for (feature, contract), block in zip(
+        variants, np.split(proba, np.cumsum(sizes)[:-1]), strict=True
+    ):
+        curve = block.reshape(len(grids[feature]), n).mean(axis=1)
+        if contract is None:
+            pdp[feature] = curve
+        else:
+            per_contract[feature].append(curve)
+
+    importance = ShapExplainer(model, preprocessor, cleaner).explain(sample).abs().mean()
+    return GlobalExplanations(
+        fields=importance.index.to_numpy(dtype=str),
+        importance=importance.to_numpy(),
+        contracts=np.array(CONTRACTS),
+        grids=grids,
+        pdp=pdp,
+        pdp_contract={f: np.vstack(v) for f, v in per_contract.items()},
+    )
+
+
+def build_global_explanations(
+    model: Any,
+    cleaner: Any = None,
+    preprocessor: Any = None,
+    calibrator: Calibrator | None = None,
+) -> GlobalExplanations:
+    """Explications globales sur un echantillon du train brut (data/interim)."""
+    import joblib
+
+    # Import necessaire pour le depickling de cleaner.joblib
+    from src.features.build_features import TelcoCleaner  # noqa: F401
+
+    if cleaner is None:
+        cleaner = joblib.load(PROCESSED_DIR / "cleaner.joblib")
+    if preprocessor is None:
+        preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+
+    train = pd.read_csv(INTERIM_DIR / "train.csv")
+    n_sample = min(len(train), int(os.getenv("PDP_SAMPLE_SIZE", "500")))
+    sample = train.sample(n=n_sample, random_state=42).drop(
+        columns=["Churn", "customerID"], errors="ignore"
+    )
+    n_grid = int(os.getenv("PDP_GRID_SIZE", "25"))
+    return compute_global_explanations(
+        model, sample, cleaner, preprocessor, n_grid=n_grid, calibrator=calibrator
+    )
+
+
+def load_global_explanations(model_uri: str | None = None) -> GlobalExplanations | None:
+    """Tables du modele: dossier du modele MLflow, puis data/processed, sinon None."""
+    if model_uri is not None:
+        try:
+            import mlflow
+
+            local = mlflow.artifacts.download_artifacts(
+                f"{model_uri}/{GLOBAL_EXPLANATIONS_ARTIFACT}"
+            )
+            return GlobalExplanations.load(local)
+        except Exception as e:
+            logger.warning(f"Explications globales MLflow indisponibles ({model_uri}): {e}")
+    if GLOBAL_EXPLANATIONS_PATH.exists():
+        return GlobalExplanations.load(GLOBAL_EXPLANATIONS_PATH)
+    return None
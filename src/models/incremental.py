@@ -0,0 +1,305 @@
+"""Mise a jour incrementale du modele a partir d'une nouvelle cohorte labellisee.
+
+- Cohorte brute (CSV avec Churn) transformee par les artefacts figes du modele
+  courant (cleaner, preprocessor ou encodeur natif): espace de features inchange
+- Declencheurs du reentrainement complet: derive des champs bruts ou des scores calibres
+  (DriftMonitor contre les profils de reference) ou baisse de l'AUC du modele
+  courant sur la cohorte par rapport a son AUC sur le jeu de test
+- Sinon, mise a jour a partir du modele courant sur la part d'apprentissage de
+  la cohorte: boosting poursuivi (LightGBM `init_model`, XGBoost `xgb_model`,
+  CatBoost `init_model`), regression logistique reajustee a chaud (lbfgs depuis
+  les coefficients courants) sur train+val+cohorte
+- Validation sur une part stratifiee de la cohorte (holdout) et garde-fou sur le
+  jeu de test; le modele mis a jour est enregistre et passe en Production s'il
+  bat le modele de Production sur le holdout
+- Calibration du modele mis a jour reapprise sur le holdout (scores decales par
+  les nouveaux arbres), seuils calcules sur les probabilites calibrees
+
+Un reentrainement complet demande se traduit par le code de sortie 2 de la CLI
+(a enchainer avec `dvc repro` apres ajout de la cohorte aux donnees brutes).
+
+Configuration par variables d'environnement: INCREMENTAL_ROUNDS,
+INCREMENTAL_HOLDOUT, INCREMENTAL_MIN_GAIN, INCREMENTAL_MAX_AUC_DROP, MODEL_NAME.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+TARGET = "Churn"
+
+
+@dataclass
+class IncrementalConfig:
+    """Parametres de la mise a jour et des declencheurs."""
+
+    rounds: int = 100  # arbres ajoutes (boosting poursuivi)
+    holdout: float = 0.3  # part de la cohorte reservee a la validation
+    min_gain: float = 0.0  # gain d'AUC holdout minimal pour promouvoir
+    max_auc_drop: float = 0.03  # baisse d'AUC toleree (cohorte et jeu de test)
+    seed: int = 42
+
+    @classmethod
+    def from_env(cls) -> IncrementalConfig:
+        return cls(
+            rounds=int(os.getenv("INCREMENTAL_ROUNDS", str(cls.rounds))),
+            holdout=float(os.getenv("INCREMENTAL_HOLDOUT", str(cls.holdout))),
+            min_gain=float(os.getenv("INCREMENTAL_MIN_GAIN", str(cls.min_gain))),
+            max_auc_drop=float(os.getenv("INCREMENTAL_MAX_AUC_DROP", str(cls.max_auc_drop))),
+        )
+
+
+@dataclass
+class Decision:
+    """Mode retenu pour la cohorte et raisons d'un reentrainement complet."""
+
+    mode: str  # incremental | full
+    reasons: list[str] = field(default_factory=list)
+    drift_status: str = "no_data"
+    cohort_auc: float | None = None
+    reference_auc: float | None = None
+
+
+def model_family(model: Any) -> str:
+    """Famille du modele (lightgbm, xgboost, catboost, logreg)."""
+    name = type(model).__name__
+    families = {
+        "LGBMClassifier": "lightgbm",
+        "XGBClassifier": "xgboost",
+        "CatBoostClassifier": "catboost",
+        "LogisticRegression": "logreg",
+    }
+    if name not in families:
+        raise ValueError(f"Mise a jour incrementale non supportee pour {name}")
+    return families[name]
+
+
+def _auc(y: np.ndarray, proba: np.ndarray) -> float | None:
+    return float(roc_auc_score(y, proba)) if len(np.unique(y)) == 2 else None
+
+
+def check_triggers(
+    cohort_auc: float | None,
+    reference_auc: float | None,
+    drift_report: dict[str, Any] | None,
+    config: IncrementalConfig,
+) -> Decision:
+    """Reentrainement complet si derive ou degradation, sinon mise a jour incrementale."""
+    status = drift_report["status"] if drift_report else "no_data"
+    reasons = []
+    if status == "drift":
+        drifted = [k for k, f in drift_report["features"].items() if f["status"] == "drift"]
+        if drift_report.get("churn_proba", {}).get("status") == "drift":
+            drifted.append("churn_proba")
+        reasons.append(f"derive: {', '.join(drifted)}")
+    if (
+        cohort_auc is not None
+        and reference_auc is not None
+        and cohort_auc < reference_auc - config.max_auc_drop
+    ):
+        reasons.append(f"degradation: AUC cohorte {cohort_auc:.4f} < test {reference_auc:.4f}")
+    return Decision(
+        mode="full" if reasons else "incremental",
+        reasons=reasons,
+        drift_status=status,
+        cohort_auc=cohort_auc,
+        reference_auc=reference_auc,
+    )
+
+
+def continue_training(
+    model: Any,
+    x: Any,
+    y: np.ndarray,
+    config: IncrementalConfig,
+    fit_params: dict[str, Any] | None = None,
+    history: tuple[Any, np.ndarray] | None = None,
+) -> Any:
+    """Nouveau modele obtenu a partir du modele courant (ce dernier reste inchange).
+
+    `history` (X, y deja vus) n'est utilise que par la regression logistique,
+    dont le reajustement complet a chaud reste peu couteux.
+    """
+    family = model_family(model)
+    fit_params = fit_params or {}
+    params = model.get_params()
+    if family == "lightgbm":
+        updated = type(model)(**{**params, "n_estimators": config.rounds})
+        return updated.fit(x, y, init_model=model.booster_, **fit_params)
+    if family == "xgboost":
+        updated = type(model)(**{**params, "n_estimators": config.rounds})
+        return updated.fit(x, y, xgb_model=model.get_booster(), **fit_params)
+    if family == "catboost":
+        updated = type(model)(**{**params, "iterations": config.rounds})
+        return updated.fit(x, y, init_model=model, **fit_params)
+
+    updated = type(model)(**{**params, "warm_start": True, "solver": "lbfgs"})
+    updated.coef_ = model.coef_.copy()
+    updated.intercept_ = model.intercept_.copy()
+    if history is not None:
+        x, y = np.vstack([history[0], x]), np.hstack([history[1], y])
+    return updated.fit(x, y)
+
+
+def _processed_split(names: tuple[str, ...], native_encoder: Any = None) -> tuple[Any, np.ndarray]:
+    """Splits traites concatenes (X, y), au format du modele."""
+    from src.features.categorical import load_native_split
+
+    if native_encoder is not None:
+        x = pd.concat([load_native_split(n, native_encoder) for n in names], ignore_index=True)
+    else:
+        x = np.vstack([np.load(PROCESSED_DIR / f"X_{n}.npy") for n in names])
+    ys = [np.load(PROCESSED_DIR / f"y_{n}.npy") for n in names]
+    return x, np.hstack(ys)
+
+
+def _promote(model_name: str, run_id: str, holdout_auc: float) -> str:
+    """Enregistre le modele du run et le passe en Production (versions precedentes archivees)."""
+    import mlflow
+
+    from src.utils.mlflow_utils import register_best
+
+    register_best(run_id, f"runs:/{run_id}/model", model_name, "holdout_auc", holdout_auc)
+    client = mlflow.tracking.MlflowClient()
+    version = next(v.version for v in client.get_latest_versions(model_name) if v.run_id == run_id)
+    client.transition_model_version_stage(
+        model_name, version, "Production", archive_existing_versions=True
+    )
+    return str(version)
+
+
+def run(
+    cohort_path: str | Path,
+    model_uri: str | None = None,
+    config: IncrementalConfig | None = None,
+    register: bool = True,
+) -> dict[str, Any]:
+    """Decision, mise a jour et validation pour une cohorte labellisee."""
+    import mlflow
+
+    from src.features.categorical import native_model_params, uses_native_categoricals
+    from src.models.calibration import (
+        CALIBRATION_ARTIFACT,
+        calibration_dict,
+        calibration_method,
+        calibration_metrics,
+        cross_calibrated,
+        fit_calibrator,
+    )
+    from src.models.thresholds import THRESHOLDS_ARTIFACT, optimize_thresholds
+    from src.monitoring.drift import load_drift_monitor
+    from src.serving.artifacts import load_artifacts
+    from src.utils.mlflow_utils import setup_mlflow
+
+    config = config or IncrementalConfig.from_env()
+    artifacts = load_artifacts(model_uri, explain=False)
+    current = artifacts.model
+    native = uses_native_categoricals(current)
+    family = model_family(current)
+
+    raw = pd.read_csv(cohort_path)
+    y = (raw.pop(TARGET) == "Yes").to_numpy(dtype=int)
+    raw = raw.drop(columns=["customerID"], errors="ignore")
+    x = artifacts.preprocessor.transform(artifacts.cleaner.transform(raw))
+    proba = current.predict_proba(x)[:, 1]
+
+    # Declencheurs: derive (champs bruts et scores) et degradation sur la cohorte
+    x_test, y_test = _processed_split(("test",), artifacts.preprocessor if native else None)
+    test_auc = _auc(y_test, current.predict_proba(x_test)[:, 1])
+    monitor = load_drift_monitor()
+    drift_report = None
+    if monitor is not None:
+        # Profil de reference en probabilites calibrees: meme echelle que le serving
+        monitor.update(raw, artifacts.predict_proba(raw))
+        drift_report = monitor.report()
+    decision = check_triggers(_auc(y, proba), test_auc, drift_report, config)
+    result: dict[str, Any] = {"family": family, "decision": asdict(decision), "promoted": False}
+
+    setup_mlflow(os.getenv("MLFLOW_EXPERIMENT_NAME", "telco-churn"))
+    with mlflow.start_run(run_name=f"incremental-{Path(cohort_path).stem}") as active:
+        mlflow.set_tags({"training_mode": decision.mode, "base_model_source": artifacts.source})
+        mlflow.log_params({"cohort": str(cohort_path), "cohort_rows": len(raw), **asdict(config)})
+        if decision.cohort_auc is not None:
+            mlflow.log_metric("cohort_auc_current", decision.cohort_auc)
+        if decision.mode == "full":
+            mlflow.set_tag("full_retrain_reasons", "; ".join(decision.reasons))
+            logger.warning(f"Reentrainement complet requis: {'; '.join(decision.reasons)}")
+            return result
+
+        idx_fit, idx_hold = train_test_split(
+            np.arange(len(y)), test_size=config.holdout, stratify=y, random_state=config.seed
+        )
+        rows = (lambda a, i: a.iloc[i]) if isinstance(x, pd.DataFrame) else (lambda a, i: a[i])
+        fit_params = native_model_params(family, artifacts.preprocessor)[1] if native else {}
+        history = _processed_split(("train", "val")) if family == "logreg" else None
+        updated = continue_training(
+            current, rows(x, idx_fit), y[idx_fit], config, fit_params, history
+        )
+
+        # Validation: holdout de la cohorte, garde-fou sur le jeu de test
+        hold_current = current.predict_proba(rows(x, idx_hold))[:, 1]
+        hold_updated = updated.predict_proba(rows(x, idx_hold))[:, 1]
+        metrics = {
+            "holdout_auc_current": _auc(y[idx_hold], hold_current),
+            "holdout_auc_updated": _auc(y[idx_hold], hold_updated),
+            "test_auc_current": test_auc,
+            "test_auc_updated": _auc(y_test, updated.predict_proba(x_test)[:, 1]),
+        }
+        mlflow.log_metrics({k: v for k, v in metrics.items() if v is not None})
+        result.update(metrics)
+        promoted = (
+            metrics["holdout_auc_updated"] >= metrics["holdout_auc_current"] + config.min_gain
+            and metrics["test_auc_updated"] >= metrics["test_auc_current"] - config.max_auc_drop
+        )
+        mlflow.set_tag("promoted", str(promoted).lower())
+        mlflow.sklearn.log_model(updated, artifact_path="model")
+        method = calibration_method()
+        calibrator = None
+        if method != "none":
+            calibrator = fit_calibrator(y[idx_hold], hold_updated, method)
+            crossed = cross_calibrated(y[idx_hold], hold_updated, method)
+            mlflow.log_metrics(
+                calibration_metrics(y[idx_hold], hold_updated, crossed, prefix="holdout")
+            )
+            hold_updated = calibrator.transform(hold_updated)
+        mlflow.log_dict(calibration_dict(calibrator), f"model/{CALIBRATION_ARTIFACT}")
+        # Seuils recalcules sur le holdout, livres avec le modele comme dans train
+        points = optimize_thresholds(y[idx_hold], hold_updated)
+        mlflow.log_dict(points.to_dict(), f"model/{THRESHOLDS_ARTIFACT}")
+
+        if promoted and register:
+            model_name = os.getenv("MODEL_NAME", "telco-churn-classifier")
+            result["version"] = _promote(
+                model_name, active.info.run_id, metrics["holdout_auc_updated"]
+            )
+            logger.info(f"Modele mis a jour promu en Production (version {result['version']})")
+        elif not promoted:
+            logger.info("Modele mis a jour non promu: pas de gain sur le holdout")
+        result["promoted"] = promoted
+        result["run_id"] = active.info.run_id
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--cohort", required=True, help="CSV brut labellise (avec Churn)")
+    p.add_argument("--model_uri", default=None)
+    p.add_argument("--no_register", action="store_true")
+    args = p.parse_args()
+    out = run(args.cohort, args.model_uri, register=not args.no_register)
+    print(json.dumps(out, indent=2, default=float))
+    raise SystemExit(2 if out["decision"]["mode"] == "full" else 0)
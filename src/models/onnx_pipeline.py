@@ -0,0 +1,404 @@
+"""Export du pipeline complet en un graphe ONNX et backend onnxruntime.
+
+- Partie deterministe de TelcoCleaner (binarisation Yes/No, tenure buckets,
+  num_services, total_spend_proxy, contract_paperless) traduite en operateurs ONNX
+- ColumnTransformer (imputation + RobustScaler, One-Hot, Ordinal) deplie en
+  operations vectorielles
+- Modele: regression logistique (MatMul + Sigmoid) ou GBDT (TreeEnsembleRegressor
+  construit depuis `TreeEnsemble`)
+- Seule la coercition de TotalCharges (chaine -> float) reste cote Python
+
+Les dependances `onnx` (export) et `onnxruntime` (serving) sont optionnelles.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.models.tree_ensemble import TreeEnsemble
+from src.utils.paths import PROCESSED_DIR
+
+# Colonnes brutes numeriques; toutes les autres entrees sont des chaines
+RAW_NUMERIC = ("SeniorCitizen", "tenure", "MonthlyCharges", "TotalCharges")
+
+# Colonnes texte du schema brut (Record)
+_RAW_TEXT = (
+    "gender",
+    "Partner",
+    "Dependents",
+    "PhoneService",
+    "MultipleLines",
+    "InternetService",
+    "OnlineSecurity",
+    "OnlineBackup",
+    "DeviceProtection",
+    "TechSupport",
+    "StreamingTV",
+    "StreamingMovies",
+    "Contract",
+    "PaperlessBilling",
+    "PaymentMethod",
+)
+
+ONNX_PATH = Path(os.getenv("ONNX_MODEL_PATH", str(PROCESSED_DIR / "pipeline.onnx")))
+OUTPUT_NAME = "churn_proba"
+
+_OPSET = 19
+_ML_OPSET = 3
+_IR_VERSION = 9
+
+
+def scoring_backend() -> str:
+    """Backend de scoring choisi par configuration (SCORING_BACKEND=sklearn|onnx|numpy)."""
+    backend = os.getenv("SCORING_BACKEND", "sklearn").lower()
+    if backend not in {"sklearn", "onnx", "numpy"}:
+        raise ValueError(f"SCORING_BACKEND invalide: {backend}")
+    return backend
+
+
+class _Graph:
+    """Petit constructeur de graphe ONNX (noms uniques, constantes, noeuds)."""
+
+    def __init__(self) -> None:
+        from onnx import helper
+
+        self.helper = helper
+        self.nodes: list[Any] = []
+        self.initializers: list[Any] = []
+        self.inputs: dict[str, Any] = {}
+        self._counter = 0
+        self._cache: dict[Any, str] = {}
+
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}_{self._counter}"
+
+    def const(self, value: Any, dtype: Any = np.float64) -> str:
+        """Declare une constante (mise en cache par valeur)."""
+        from onnx import numpy_helper
+
+        arr = np.asarray(value, dtype=dtype)
+        key = (arr.dtype.str, arr.shape, arr.tobytes() if arr.dtype != object else tuple(arr.flat))
+        if key not in self._cache:
+            name = self._name("c")
+            self.initializers.append(numpy_helper.from_array(arr, name))
+            self._cache[key] = name
+        return self._cache[key]
+
+    def op(self, op_type: str, *inputs: str, domain: str = "", **attrs: Any) -> str:
+        """Ajoute un noeud et retourne le nom de sa sortie."""
+        out = self._name(op_type.lower())
+        self.nodes.append(
+            self.helper.make_node(op_type, list(inputs), [out], domain=domain, **attrs)
+        )
+        return out
+
+    def input(self, column: str) -> str:
+        """Entree [N, 1] pour une colonne brute (creee a la demande)."""
+        from onnx import TensorProto
+
+        if column not in self.inputs:
+            elem = TensorProto.DOUBLE if column in RAW_NUMERIC else TensorProto.STRING
+            self.inputs[column] = self.helper.make_tensor_value_info(column, elem, [None, 1])
+        return column
+
+    def to_double(self, name: str) -> str:
+        from onnx import TensorProto
+
+        return self.op("Cast", name, to=TensorProto.DOUBLE)
+
+
+class _PipelineExporter:
+    """Traduit cleaner + preprocessor + modele en graphe ONNX."""
+
+    def __init__(self, cleaner: Any, preprocessor: Any) -> None:
+        self.g = _Graph()
+        self.cleaner = cleaner
+        self.preprocessor = preprocessor
+        num_cols = next((cols for name, _, cols in preprocessor.transformers_ if name == "num"), [])
+        # Colonnes brutes texte binarisees Yes/No par le cleaner a l'entrainement
+        self.binary_cols = {c for c in num_cols if c not in RAW_NUMERIC and c in _RAW_TEXT}
+        self._memo: dict[str, str] = {}
+
+    # ------------------------------------------------------------- colonnes
+
+    def binary(self, column: str) -> str:
+        """Colonne Yes/No -> 1.0/0.0."""
+        key = f"bin:{column}"
+        if key not in self._memo:
+            yes = self.g.const(["Yes"], dtype=object)
+            self._memo[key] = self.g.to_double(self.g.op("Equal", self.g.input(column), yes))
+        return self._memo[key]
+
+    def numeric(self, column: str) -> str:
+        """Valeur numerique d'une colonne (brute, binarisee ou derivee)."""
+        if column in RAW_NUMERIC:
+            return self.g.input(column)
+        if column in self.binary_cols:
+            return self.binary(column)
+        if column == "num_services":
+            services = [c for c in self.cleaner.service_cols_ if c in self.binary_cols]
+            if not services:
+                return self.g.op("Mul", self._fillna(self.g.input("tenure")), self.g.const([[0.0]]))
+            return self.g.op("Sum", *[self.binary(c) for c in services])
+        if column == "total_spend_proxy":
+            return self.g.op(
+                "Mul",
+                self._fillna(self.g.input("tenure")),
+                self._fillna(self.g.input("MonthlyCharges")),
+            )
+        raise ValueError(f"Colonne numerique non supportee pour l'export ONNX: {column}")
+
+    def _fillna(self, name: str) -> str:
+        zero = self.g.const(np.zeros((1, 1)))
+        return self.g.op("Where", self.g.op("IsNaN", name), zero, name)
+
+    def indicator(self, column: str, category: Any, fill: Any) -> str:
+        """Indicatrice booleenne `column == category` apres imputation."""
+        g = self.g
+        if column == "tenure_bucket":
+            bounds = self._tenure_bounds()
+            tenure = g.input("tenure")
+            lo, hi = bounds[str(category)]
+            hit = g.op(
+                "And",
+                g.op("GreaterOrEqual", tenure, g.const([[lo]])),
+                g.op("Less", tenure, g.const([[hi]])),
+            )
+            if str(category) == str(fill):
+                # pd.cut -> NaN (tenure manquant ou < borne basse) impute par la modalite
+                low = g.const([[min(b[0] for b in bounds.values())]])
+                invalid = g.op("Or", g.op("IsNaN", tenure), g.op("Less", tenure, low))
+                hit = g.op("Or", hit, invalid)
+            return hit
+        if column == "contract_paperless":
+            contract, paperless = str(category).rsplit("_", 1)
+            return g.op(
+                "And",
+                g.op("Equal", g.input("Contract"), g.const([contract], dtype=object)),
+                g.op("Equal", self.binary("PaperlessBilling"), g.const([[float(paperless)]])),
+            )
+        if column in RAW_NUMERIC or column not in _RAW_TEXT:
+            raise ValueError(f"Colonne categorielle non supportee pour l'export ONNX: {column}")
+        return g.op("Equal", g.input(column), g.const([str(category)], dtype=object))
+
+    def _tenure_bounds(self) -> dict[str, tuple[float, float]]:
+        """Bornes [lo, hi) par libelle, identiques a TelcoCleaner.transform."""
+        _, bins, labels = self.cleaner.bins_["tenure_bucket"]
+        return {label: (bins[i], bins[i + 1]) for i, label in enumerate(labels)}
+
+    # -------------------------------------------------------------- blocs
+
+    def num_block(self, pipe: Any, cols: list[str]) -> str:
+        g = self.g
+        x = g.op("Concat", *[self.numeric(c) for c in cols], axis=1)
+        for _, step in pipe.steps:
+            kind = type(step).__name__
+            if kind == "SimpleImputer":
+                fill = g.const(np.asarray(step.statistics_, dtype=np.float64)[None, :])
+                x = g.op("Where", g.op("IsNaN", x), fill, x)
+            elif kind == "RobustScaler":
+                if step.with_centering:
+                    x = g.op("Sub", x, g.const(step.center_[None, :]))
+                if step.with_scaling:
+                    x = g.op("Div", x, g.const(step.scale_[None, :]))
+            else:
+                raise ValueError(f"Etape numerique non supportee pour l'export ONNX: {kind}")
+        return x
+
+    def cat_block(self, pipe: Any, cols: list[str]) -> str:
+        imputer = pipe.named_steps["imputer"]
+        ohe = pipe.named_steps["ohe"]
+        outputs = []
+        for i, col in enumerate(cols):
+            for cat in ohe.categories_[i]:
+                outputs.append(self.g.to_double(self.indicator(col, cat, imputer.statistics_[i])))
+        return self.g.op("Concat", *outputs, axis=1)
+
+    def ord_block(self, pipe: Any, cols: list[str]) -> str:
+        g = self.g
+        enc = pipe.named_steps["ord"]
+        outputs = []
+        for i, col in enumerate(cols):
+            cats = list(enc.categories_[i])
+            eq = g.op(
+                "Concat",
+                *[
+                    g.to_double(g.op("Equal", g.input(col), g.const([c], dtype=object)))
+                    for c in cats
+                ],
+                axis=1,
+            )
+            # Somme ponderee par (rang + 1) puis -1: modalite inconnue -> -1
+            weights = g.const(np.arange(1, len(cats) + 1, dtype=np.float64)[:, None])
+            outputs.append(g.op("Sub", g.op("MatMul", eq, weights), g.const([[1.0]])))
+        return g.op("Concat", *outputs, axis=1)
+
+    def features(self) -> str:
+        blocks = []
+        for name, pipe, cols in self.preprocessor.transformers_:
+            if pipe == "drop" or not len(cols):
+                continue
+            if name == "num":
+                blocks.append(self.num_block(pipe, list(cols)))
+            elif name == "cat":
+                blocks.append(self.cat_block(pipe, list(cols)))
+            elif name == "ord":
+                blocks.append(self.ord_block(pipe, list(cols)))
+            else:
+                raise ValueError(f"Transformer non supporte pour l'export ONNX: {name}")
+        return self.g.op("Concat", *blocks, axis=1)
+
+    # -------------------------------------------------------------- modele
+
+    def model(self, x: str, model: Any) -> str:
+        g = self.g
+        if hasattr(model, "coef_"):
+            coef = np.asarray(model.coef_, dtype=np.float64)
+            if coef.shape[0] != 1:
+                raise ValueError("Seule la classification binaire est supportee")
+            logit = g.op(
+                "Add",
+                g.op("MatMul", x, g.const(coef.T)),
+                g.const(np.asarray(model.intercept_, dtype=np.float64)[None, :]),
+            )
+            return g.op("Sigmoid", logit)
+
+        ens = model if isinstance(model, TreeEnsemble) else TreeEnsemble.from_model(model)
+        if ens.float32_inputs:
+            from onnx import TensorProto
+
+            x = g.to_double(g.op("Cast", x, to=TensorProto.FLOAT))
+        raw = g.to_double(g.op("TreeEnsembleRegressor", x, domain="ai.onnx.ml", **_tree_attrs(ens)))
+        logit = g.op("Add", g.op("Mul", raw, g.const([[ens.scale]])), g.const([[ens.base_score]]))
+        return g.op("Sigmoid", logit)
+
+    def build(self, model: Any) -> Any:
+        from onnx import TensorProto
+
+        h = self.g.helper
+        proba = self.model(self.features(), model)
+        self.g.nodes.append(h.make_node("Identity", [proba], [OUTPUT_NAME]))
+        graph = h.make_graph(
+            self.g.nodes,
+            "telco_churn_pipeline",
+            list(self.g.inputs.values()),
+            [h.make_tensor_value_info(OUTPUT_NAME, TensorProto.DOUBLE, [None, 1])],
+            self.g.initializers,
+        )
+        return h.make_model(
+            graph,
+            opset_imports=[h.make_opsetid("", _OPSET), h.make_opsetid("ai.onnx.ml", _ML_OPSET)],
+            ir_version=_IR_VERSION,
+            producer_name="telco-churn",
+        )
+
+
+def _tree_attrs(ens: TreeEnsemble) -> dict[str, Any]:
+    """Attributs TreeEnsembleRegressor (ai.onnx.ml v3) depuis les tableaux plats."""
+    from onnx import numpy_helper
+
+    roots = ens.roots.astype(np.int64)
+    bounds = np.append(roots, len(ens.feature))
+    tree_ids = np.repeat(np.arange(ens.n_trees), np.diff(bounds))
+    node_ids = np.arange(len(ens.feature)) - roots[tree_ids]
+    offset = roots[tree_ids]
+    is_leaf = ens.left == np.arange(len(ens.feature))
+    branch = "BRANCH_LT" if ens.strict else "BRANCH_LEQ"
+    threshold = np.where(is_leaf, 0.0, ens.threshold)
+    return {
+        "n_targets": 1,
+        "aggregate_function": "SUM",
+        "post_transform": "NONE",
+        "nodes_treeids": tree_ids.tolist(),
+        "nodes_nodeids": node_ids.tolist(),
+        "nodes_featureids": np.where(is_leaf, 0, ens.feature).tolist(),
+        "nodes_modes": np.where(is_leaf, "LEAF", branch).tolist(),
+        "nodes_values_as_tensor": numpy_helper.from_array(threshold.astype(np.float64)),
+        "nodes_truenodeids": np.where(is_leaf, 0, ens.left - offset).tolist(),
+        "nodes_falsenodeids": np.where(is_leaf, 0, ens.right - offset).tolist(),
+        "nodes_missing_value_tracks_true": ens.default_left.astype(np.int64).tolist(),
+        "target_treeids": tree_ids[is_leaf].tolist(),
+        "target_nodeids": node_ids[is_leaf].tolist(),
+        "target_ids": [0] * int(is_leaf.sum()),
+        "target_weights_as_tensor": numpy_helper.from_array(ens.value[is_leaf].astype(np.float64)),
+    }
+
+
+def export_pipeline(
+    model: Any,
+    output_path: str | Path = ONNX_PATH,
+    cleaner: Any = None,
+    preprocessor: Any = None,
+) -> Path:
+    """Exporte cleaner + preprocessor + modele en un fichier ONNX.
+
+    Args:
+        model: LogisticRegression, GBDT (LightGBM/XGBoost/CatBoost) ou TreeEnsemble
+        output_path: chemin du fichier .onnx
+        cleaner: TelcoCleaner fitte (defaut: PROCESSED_DIR/cleaner.joblib)
+        preprocessor: ColumnTransformer fitte (defaut: PROCESSED_DIR/preprocessor.joblib)
+    """
+    import joblib
+    import onnx
+
+    # Import necessaire pour le depickling de cleaner.joblib
+    from src.features.build_features import TelcoCleaner  # noqa: F401
+
+    if cleaner is None:
+        cleaner = joblib.load(PROCESSED_DIR / "cleaner.joblib")
+    if preprocessor is None:
+        preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+
+    onnx_model = _PipelineExporter(cleaner, preprocessor).build(model)
+    onnx.checker.check_model(onnx_model)
+    p = Path(output_path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(onnx_model, str(p))
+    return p
+
+
+class OnnxPipeline:
+    """Scoring onnxruntime (CPU) sur des donnees brutes (colonnes de `Record`)."""
+
+    def __init__(self, path: str | Path = ONNX_PATH) -> None:
+        import onnxruntime as ort
+
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Modele ONNX non trouve: {self.path}")
+        self.session = ort.InferenceSession(str(self.path), providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _feed(self, df: pd.DataFrame) -> dict[str, np.ndarray]:
+        feed = {}
+        for col in self.input_names:
+            if col in RAW_NUMERIC:
+                values = pd.to_numeric(df[col].replace(" ", np.nan), errors="coerce")
+                feed[col] = values.to_numpy(dtype=np.float64).reshape(-1, 1)
+            else:
+                feed[col] = df[col].astype(str).to_numpy(dtype=object).reshape(-1, 1)
+        return feed
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """Probabilites (n, 2) au format scikit-learn, a partir du DataFrame brut."""
+        p1 = self.session.run([OUTPUT_NAME], self._feed(df))[0][:, 0]
+        return np.column_stack([1.0 - p1, p1])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import joblib
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--model_path", default=str(PROCESSED_DIR / "model.joblib"))
+    p.add_argument("--output", default=str(ONNX_PATH))
+    args = p.parse_args()
+    out = export_pipeline(joblib.load(args.model_path), args.output)
+    print(f"✓ Pipeline ONNX exporte: {out}")
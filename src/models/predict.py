@@ -2,65 +2,90 @@
 """Prédiction batch à partir d'un modèle MLflow.
 
 - Utilise un modèle chargé depuis registry ou runs
+- Chargement des artefacts partagé avec l'API et l'UI (src.serving.artifacts)
+- Backend onnxruntime optionnel (SCORING_BACKEND=onnx)
+- Stockage des scores optionnel (--score_store): lecture par blocs, seuls les
+  clients nouveaux ou modifiés sont rescorés, tous après un changement de modèle
 """
 from __future__ import annotations
 
-import joblib
-import mlflow
+import numpy as np
 import pandas as pd
 
-# Import nécessaire pour le dépickling de cleaner.joblib
-from src.features.build_features import TelcoCleaner  # noqa: F401
-from src.utils.paths import PROCESSED_DIR
+from src.serving.artifacts import Artifacts, load_artifacts
+from src.serving.score_store import ID_COLUMN, ScoreStore, input_hashes
+from src.utils.logging import logger
+from src.utils.profiling import Profiler
 
-# Charge le preprocessor et cleaner
-preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
-cleaner = joblib.load(PROCESSED_DIR / "cleaner.joblib")
+CHUNK_SIZE = 200_000
 
 
-def predict_csv(input_csv: str, model_uri: str, output_csv: str) -> None:
+def predict_incremental(
+    artifacts: Artifacts,
+    input_csv: str,
+    output_csv: str,
+    store: ScoreStore,
+    chunksize: int = CHUNK_SIZE,
+) -> dict[str, int]:
+    """Scoring par blocs: scores stockés réutilisés si champs et modèle inchangés."""
+    version = artifacts.version
+    counts = {"rows": 0, "rescored": 0}
+    for i, chunk in enumerate(pd.read_csv(input_csv, chunksize=chunksize)):
+        ids = chunk[ID_COLUMN].astype(str).to_numpy()
+        hashes = input_hashes(chunk)
+        proba = store.cached(ids, hashes, version)
+        stale = np.isnan(proba)
+        if stale.any():
+            proba[stale] = artifacts.predict_proba(chunk[stale])
+            store.upsert(ids[stale], hashes[stale], proba[stale], version)
+        chunk["churn_proba"] = proba
+        chunk.to_csv(output_csv, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        counts["rows"] += len(chunk)
+        counts["rescored"] += int(stale.sum())
+    logger.info(f"Modèle {version}: {counts['rescored']} clients rescorés sur {counts['rows']}")
+    return counts
+
+
+def predict_csv(
+    input_csv: str,
+    model_uri: str,
+    output_csv: str,
+    profile: bool | None = None,
+    score_store: str | None = None,
+) -> None:
     """Prédiction batch avec support artefacts locaux ou MLflow.
 
+    Si SCORING_BACKEND=onnx, score avec le pipeline ONNX complet.
     Si USE_LOCAL_ARTIFACTS=true, charge directement depuis PROCESSED_DIR.
     Sinon essaie MLflow avec fallback local.
+    Profilage par etape si `profile` (defaut: variable PROFILING).
+    Avec `score_store` (fichier SQLite), seules les lignes nouvelles ou modifiées
+    sont rescorées.
     """
-    import os
-
-    use_local = os.getenv("USE_LOCAL_ARTIFACTS", "false").lower() == "true"
+    profiler = Profiler.from_env("predict", enabled=profile)
+    profiler.lap("load_artifacts")
+    artifacts = load_artifacts(model_uri, explain=False)
+    print(f"✓ Artefacts chargés (source: {artifacts.source})")
 
-    # Chargement du modèle
-    if use_local:
-        # Mode local direct
-        model_path = PROCESSED_DIR / "model.joblib"
-        if not model_path.exists():
-            raise FileNotFoundError(f"Modèle local non trouvé: {model_path}")
-        model = joblib.load(model_path)
-        print(f"✓ Modèle chargé depuis artefacts locaux: {model_path}")
-    else:
-        # Mode MLflow avec fallback
+    if score_store is not None:
+        profiler.lap("predict_incremental")
+        store = ScoreStore(score_store)
         try:
-            model = mlflow.sklearn.load_model(model_uri)
-            print(f"✓ Modèle chargé depuis MLflow: {model_uri}")
-        except Exception as e:
-            print(f"⚠ Échec chargement MLflow ({model_uri}): {e}")
-            # Fallback: charger le modèle depuis PROCESSED_DIR
-            model_path = PROCESSED_DIR / "model.joblib"
-            if not model_path.exists():
-                raise FileNotFoundError(
-                    f"Modèle non trouvé ni dans MLflow ni dans {model_path}"
-                ) from e
-            model = joblib.load(model_path)
-            print(f"✓ Modèle chargé depuis fallback: {model_path}")
+            predict_incremental(artifacts, input_csv, output_csv, store)
+        finally:
+            store.close()
+        profiler.finish()
+        return
 
-    df = pd.read_csv(input_csv)
-    # Nettoyage + features dérivées
-    df = cleaner.transform(df)
-    # Préprocessing
-    df = preprocessor.transform(df)
-    proba = model.predict_proba(df)[:, 1]
-    out = df.copy()
-    out["churn_proba"] = proba
+    profiler.lap("read_csv")
+    raw = pd.read_csv(input_csv)
+    out = raw.copy()
+    # Nettoyage + features dérivées + préprocessing + modèle
+    profiler.lap("predict_proba")
+    out["churn_proba"] = artifacts.predict_proba(raw)
+    profiler.lap("write_csv")
     out.to_csv(output_csv, index=False)
+    profiler.finish()
 
 
 if __name__ == "__main__":
@@ -70,5 +95,13 @@ if __name__ == "__main__":
     p.add_argument("--input_csv", required=True)
     p.add_argument("--model_uri", required=True)
     p.add_argument("--output_csv", required=True)
+    p.add_argument("--profile", action="store_true", help="Profilage par etape (PROFILING)")
+    p.add_argument("--score_store", default=None, help="Base SQLite des scores par client")
     args = p.parse_args()
-    predict_csv(args.input_csv, args.model_uri, args.output_csv)
+    predict_csv(
+        args.input_csv,
+        args.model_uri,
+        args.output_csv,
+        profile=args.profile or None,
+        score_store=args.score_store,
+    )
@@ -0,0 +1,160 @@
+"""Priorisation des clients a risque: les K meilleurs d'une base scoree par blocs.
+
+- Le CSV est lu et score par blocs (`chunksize` lignes): la base entiere n'est
+  jamais en memoire, ni scoree d'un bloc ni triee
+- Selection bornee: `np.partition` garde les K meilleurs du bloc, fusionnes avec
+  les K courants (memoire O(K + bloc), temps O(n) plus un tri final O(K log K))
+- Ex aequo a la frontiere departages par l'ordre du fichier: meme liste a
+  chaque execution
+- Critere: probabilite de churn (calibree) ou valeur attendue a risque,
+  MonthlyCharges x churn_proba (revenu mensuel expose)
+- Sortie classee: rang, colonnes brutes du client, churn_proba, valeur attendue
+  et decision de retention au seuil du modele
+
+Configuration par variables d'environnement: PRIORITIZE_CHUNK_SIZE.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging import logger
+from src.utils.profiling import Profiler
+
+RANK_BY = ("proba", "expected_value")
+VALUE_COLUMN = "MonthlyCharges"
+CHUNK_SIZE = int(os.getenv("PRIORITIZE_CHUNK_SIZE", "200000"))
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices (ordre croissant) des k plus grands scores, ex aequo par position."""
+    n = len(scores)
+    if n <= k:
+        return np.arange(n)
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    return np.sort(np.r_[above, ties])
+
+
+def expected_value(chunk: pd.DataFrame, proba: np.ndarray) -> np.ndarray:
+    """Revenu mensuel a risque: MonthlyCharges x churn_proba (charges manquantes -> 0)."""
+    charges = pd.to_numeric(chunk[VALUE_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+    return np.where(np.isnan(charges), 0.0, charges) * proba
+
+
+class TopK:
+    """K meilleures lignes vues jusqu'ici (scores + lignes brutes), en ordre de fichier."""
+
+    def __init__(self, k: int) -> None:
+        if k <= 0:
+            raise ValueError(f"k doit etre positif (recu {k})")
+        self.k = k
+        self.scores = np.empty(0, dtype=np.float64)
+        self.rows: pd.DataFrame | None = None
+
+    def push(
+        self,
+        chunk: pd.DataFrame,
+        scores: np.ndarray,
+        columns: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        """Fusionne un bloc: top-K du bloc, puis top-K des (au plus) 2K candidats.
+
+        Seules les K lignes retenues du bloc sont copiees, avec `columns` (valeurs
+        par ligne du bloc) ajoutees a ces lignes.
+        """
+        scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+        local = top_indices(scores, self.k)
+        candidates = np.r_[self.scores, scores[local]]
+        rows = chunk.iloc[local].assign(**{c: v[local] for c, v in (columns or {}).items()})
+        if self.rows is not None:
+            rows = pd.concat([self.rows, rows], ignore_index=True)
+        keep = top_indices(candidates, self.k)
+        self.scores = candidates[keep]
+        self.rows = rows.iloc[keep].reset_index(drop=True)
+
+    def ranked(self) -> pd.DataFrame:
+        """Lignes gardees, score decroissant (tri stable: ordre du fichier)."""
+        if self.rows is None:
+            return pd.DataFrame()
+        order = np.argsort(-self.scores, kind="stable")
+        out = self.rows.iloc[order].reset_index(drop=True)
+        out.insert(0, "rank", np.arange(1, len(out) + 1))
+        return out
+
+
+def prioritize(
+    chunks: Iterable[pd.DataFrame], scorer: Any, k: int, by: str = "proba"
+) -> tuple[pd.DataFrame, int]:
+    """Top-K des blocs scores par `scorer.predict_proba`; retourne (classement, lignes lues)."""
+    if by not in RANK_BY:
+        raise ValueError(f"Critere inconnu: {by!r} (attendu: {RANK_BY})")
+    top = TopK(k)
+    n_rows = 0
+    for chunk in chunks:
+        columns = {"churn_proba": scorer.predict_proba(chunk)}
+        if VALUE_COLUMN in chunk:
+            columns["expected_value"] = expected_value(chunk, columns["churn_proba"])
+        elif by == "expected_value":
+            raise KeyError(f"Colonne {VALUE_COLUMN} absente: tri par valeur impossible")
+        top.push(chunk, columns["churn_proba" if by == "proba" else "expected_value"], columns)
+        n_rows += len(chunk)
+    return top.ranked(), n_rows
+
+
+def prioritize_csv(
+    input_csv: str,
+    model_uri: str | None,
+    output_csv: str,
+    k: int = 10_000,
+    by: str = "proba",
+    chunksize: int = CHUNK_SIZE,
+    profile: bool | None = None,
+) -> pd.DataFrame:
+    """Classement des K clients les plus a risque d'un CSV brut, ecrit dans `output_csv`."""
+    from src.serving.artifacts import load_artifacts
+
+    profiler = Profiler.from_env("prioritize", enabled=profile)
+    profiler.lap("load_artifacts")
+    artifacts = load_artifacts(model_uri, explain=False)
+    logger.info(f"Artefacts charges (source: {artifacts.source})")
+
+    profiler.lap("score_topk")
+    ranked, n_rows = prioritize(pd.read_csv(input_csv, chunksize=chunksize), artifacts, k, by)
+    if len(ranked):
+        ranked["retain"] = ranked["churn_proba"] >= artifacts.operating_points.decision
+
+    profiler.lap("write_csv")
+    ranked.to_csv(output_csv, index=False)
+    profiler.finish()
+    logger.info(f"{len(ranked)} clients prioritaires sur {n_rows} ({by}): {output_csv}")
+    return ranked
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--input_csv", required=True)
+    p.add_argument("--model_uri", default=None)
+    p.add_argument("--output_csv", required=True)
+    p.add_argument("--top_k", type=int, default=10_000)
+    p.add_argument("--by", choices=RANK_BY, default="proba")
+    p.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    p.add_argument("--profile", action="store_true", help="Profilage par etape (PROFILING)")
+    args = p.parse_args()
+    prioritize_csv(
+        args.input_csv,
+        args.model_uri,
+        args.output_csv,
+        k=args.top_k,
+        by=args.by,
+        chunksize=args.chunksize,
+        profile=args.profile or None,
+    )
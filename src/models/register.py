@@ -2,12 +2,16 @@
 """Enregistrement du meilleur modèle dans le Model Registry MLflow.
 
 - Utilise RUN_ID et met à jour la description avec la meilleure AUC.
+- Métrique: `val_auc`, AUC hors échantillon loggée par train (prédictions
+  out-of-fold en validation croisée, sinon split de validation).
 """
 from __future__ import annotations
 import os
 import mlflow
 from src.utils.mlflow_utils import register_best
 
+PRIMARY_METRIC = "val_auc"
+
 
 def main() -> None:
     run_id = os.getenv("RUN_ID")
@@ -20,7 +24,8 @@ def main() -> None:
         run_id = meta_files[0].parent.name
 
     model_name = os.getenv("MODEL_NAME", "telco-churn-classifier")
-    register_best(run_id, f"runs:/{run_id}/model", model_name, "val_auc", 0.0)
+    value = mlflow.get_run(run_id).data.metrics.get(PRIMARY_METRIC, float("nan"))
+    register_best(run_id, f"runs:/{run_id}/model", model_name, PRIMARY_METRIC, value)
 
 
 if __name__ == "__main__":
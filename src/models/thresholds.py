@@ -0,0 +1,186 @@
+"""Seuils de decision et courbe de cout en une seule passe triee.
+
+- Tri unique des scores (O(n log n)), puis sommes cumulees: TP/FP, precision,
+  rappel, F1 et cout de retention attendu a chaque seuil candidat
+- Choix des points de fonctionnement a partir d'une matrice de couts:
+  `decision` (cout minimal, client a contacter), `moderate` (rappel cible),
+  `f1` (F1 maximal)
+- Les seuils sont livres avec le modele (`thresholds.json` dans le dossier du
+  modele MLflow et dans data/processed) et relus par l'API et l'UI
+
+Configuration par variables d'environnement:
+COST_TP, COST_FP, COST_FN, COST_TN, THRESHOLD_MODERATE_RECALL.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+THRESHOLDS_PATH = PROCESSED_DIR / "thresholds.json"
+THRESHOLDS_ARTIFACT = "thresholds.json"
+
+
+@dataclass
+class CostMatrix:
+    """Cout moyen par client de chaque issue (unites monetaires)."""
+
+    tp: float = 40.0  # offre de retention + perte residuelle
+    fp: float = 10.0  # offre envoyee a un client fidele
+    fn: float = 100.0  # client perdu sans action
+    tn: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> CostMatrix:
+        """Lit la matrice depuis l'environnement (COST_TP, COST_FP, ...)."""
+        return cls(
+            **{
+                f.name: float(os.getenv(f"COST_{f.name.upper()}", str(f.default)))
+                for f in fields(cls)
+            }
+        )
+
+
+@dataclass
+class OperatingPoints:
+    """Seuils livres avec le modele (defauts = anciennes bandes 0.3/0.6)."""
+
+    decision: float = 0.6
+    moderate: float = 0.3
+    f1: float = 0.5
+    metrics: dict[str, float] = field(default_factory=dict)
+    costs: dict[str, float] = field(default_factory=dict)
+
+    def risk_levels(self, proba: np.ndarray) -> np.ndarray:
+        """Niveau de risque par client: 0 faible, 1 modere, 2 eleve."""
+        bounds = np.array([self.moderate, self.decision])
+        return np.searchsorted(bounds, np.asarray(proba, dtype=np.float64), side="right")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def save(self, path: Path = THRESHOLDS_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def from_dict(cls, data: dict) -> OperatingPoints:
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+def threshold_sweep(
+    y_true: np.ndarray, proba: np.ndarray, costs: CostMatrix | None = None
+) -> dict[str, np.ndarray]:
+    """Metriques a chaque seuil candidat (prediction positive si proba >= seuil).
+
+    Les seuils sont les scores distincts par ordre decroissant, precedes d'un
+    seuil au-dessus du maximum (aucun client contacte). Un seul tri, le reste
+    en sommes cumulees.
+    """
+    costs = costs or CostMatrix()
+    y = np.asarray(y_true).astype(bool)
+    proba = np.asarray(proba, dtype=np.float64)
+
+    order = np.argsort(proba, kind="stable")[::-1]
+    s = proba[order]
+    last = np.r_[np.flatnonzero(s[1:] != s[:-1]), len(s) - 1]  # fin de groupe ex aequo
+    tp = np.r_[0, np.cumsum(y[order])[last]]
+    fp = np.r_[0, last + 1 - tp[1:]]
+    thresholds = np.r_[np.nextafter(s[0], np.inf), s[last]]
+
+    n_pos, n_neg = tp[-1], fp[-1]
+    fn, tn = n_pos - tp, n_neg - fp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        recall = tp / n_pos if n_pos else np.zeros(len(tp))
+        f1 = np.where(tp > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    cost = (costs.tp * tp + costs.fp * fp + costs.fn * fn + costs.tn * tn) / len(y)
+    return {
+        "thresholds": thresholds,
+        "tp": tp,
+        "fp": fp,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "cost": cost,
+    }
+
+
+def choose_operating_points(
+    sweep: dict[str, np.ndarray], costs: CostMatrix, moderate_recall: float = 0.9
+) -> OperatingPoints:
+    """Seuils de cout minimal, de rappel cible et de F1 maximal."""
+    thresholds = sweep["thresholds"]
+    i_cost = int(np.argmin(sweep["cost"]))
+    i_f1 = int(np.argmax(sweep["f1"]))
+    # Rappel croissant quand le seuil baisse: premier seuil atteignant la cible
+    i_recall = min(int(np.searchsorted(sweep["recall"], moderate_recall)), len(thresholds) - 1)
+    decision = float(min(thresholds[i_cost], 1.0))
+    return OperatingPoints(
+        decision=decision,
+        moderate=float(min(thresholds[i_recall], decision)),
+        f1=float(thresholds[i_f1]),
+        metrics={
+            "expected_cost": float(sweep["cost"][i_cost]),
+            "precision": float(sweep["precision"][i_cost]),
+            "recall": float(sweep["recall"][i_cost]),
+            "f1": float(sweep["f1"][i_cost]),
+            "best_f1": float(sweep["f1"][i_f1]),
+        },
+        costs=asdict(costs),
+    )
+
+
+def optimize_thresholds(
+    y_true: np.ndarray, proba: np.ndarray, costs: CostMatrix | None = None
+) -> OperatingPoints:
+    """Balayage + choix des points de fonctionnement (configuration par env)."""
+    costs = costs or CostMatrix.from_env()
+    moderate_recall = float(os.getenv("THRESHOLD_MODERATE_RECALL", "0.9"))
+    return choose_operating_points(threshold_sweep(y_true, proba, costs), costs, moderate_recall)
+
+
+def metrics_at(
+    y_true: np.ndarray, proba: np.ndarray, threshold: float, costs: CostMatrix | None = None
+) -> dict[str, float]:
+    """Cout attendu, precision, rappel et F1 a un seuil fixe (choisi sur d'autres donnees)."""
+    costs = costs or CostMatrix.from_env()
+    y = np.asarray(y_true).astype(bool)
+    pred = np.asarray(proba, dtype=np.float64) >= threshold
+    tp = int((y & pred).sum())
+    fp = int((~y & pred).sum())
+    fn = int((y & ~pred).sum())
+    tn = len(y) - tp - fp - fn
+    return {
+        "expected_cost": (costs.tp * tp + costs.fp * fp + costs.fn * fn + costs.tn * tn)
+        / max(1, len(y)),
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "f1": 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+    }
+
+
+def load_operating_points(model_uri: str | None = None) -> OperatingPoints:
+    """Seuils du modele: dossier du modele MLflow, puis data/processed, puis defauts."""
+    if model_uri is not None:
+        try:
+            import mlflow
+
+            data = mlflow.artifacts.load_dict(f"{model_uri}/{THRESHOLDS_ARTIFACT}")
+            return OperatingPoints.from_dict(data)
+        except Exception as e:
+            logger.warning(f"Seuils MLflow indisponibles ({model_uri}): {e}")
+    if THRESHOLDS_PATH.exists():
+        return OperatingPoints.from_dict(json.loads(THRESHOLDS_PATH.read_text(encoding="utf-8")))
+    logger.warning("Aucun fichier de seuils: bandes par defaut 0.3/0.6")
+    return OperatingPoints()
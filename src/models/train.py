@@ -6,14 +6,24 @@
 
 - Charge X/y depuis data/processed
 - Essaie plusieurs modèles: LightGBM, XGBoost, CatBoost, LogReg
-- Utilise Optuna pour affiner les hyperparamètres
+- Utilise Optuna pour affiner les hyperparamètres (validation croisée K plis
+  sur train+val, plis en parallèle, élagage après le premier pli)
+- Sortie de features One-Hot (défaut) ou catégorielles natives pour LightGBM et
+  CatBoost (FEATURE_ENCODING=native, src.features.categorical)
+- Calibration des probabilités sur les prédictions out-of-fold (table isotone
+  ou Platt, src.models.calibration), ECE avant/après dans MLflow
+- Seuils de décision (matrice de coûts) choisis sur ces mêmes prédictions
+  out-of-fold calibrées, livrés avec le modèle (thresholds.json): le test set
+  reste réservé à evaluate
 - Log complet dans MLflow (params, metrics, model)
 """
 from __future__ import annotations
 import os
 from pathlib import Path
+import joblib
 import numpy as np
 import optuna
+import pandas as pd
 import mlflow
 from sklearn.metrics import roc_auc_score, f1_score, average_precision_score
 from sklearn.linear_model import LogisticRegression
@@ -22,6 +32,22 @@ from src.utils.paths import PROCESSED_DIR
 from src.utils.logging import logger
 from src.utils.mlflow_utils import setup_mlflow
 from src.utils.paths import PROJECT_ROOT
+from src.models.tree_ensemble import TREE_ENSEMBLE_PATH, TreeEnsemble
+from src.models.onnx_pipeline import ONNX_PATH, export_pipeline
+from src.models.compress import COMPRESSED_MODEL_PATH, CompressionConfig, compress_and_validate
+from src.models.global_explain import GLOBAL_EXPLANATIONS_PATH, build_global_explanations
+from src.models.cv import CVConfig, cross_validate_trial, out_of_fold_proba
+from src.models.calibration import (
+    CALIBRATION_ARTIFACT, Calibrator, calibrate, calibration_dict, calibration_method,
+    calibration_metrics, cross_calibrated, fit_calibrator, save_calibration,
+)
+from src.models.thresholds import THRESHOLDS_ARTIFACT, OperatingPoints, optimize_thresholds
+from src.features.categorical import (
+    NATIVE_ENCODER_PATH, NATIVE_FAMILIES, feature_encoding, load_native_split, native_model_params,
+)
+from src.utils.profiling import Profiler
+
+ARTIFACTS_DIR = PROJECT_ROOT / "artifacts"
 
 # Types optionnels
 try:
@@ -38,29 +64,100 @@ except Exception:  # pragma: no cover
     CatBoostClassifier = None
 
 
-def load_arrays():
-    X_train = np.load(PROCESSED_DIR / "X_train.npy")
-    X_val = np.load(PROCESSED_DIR / "X_val.npy")
+def load_arrays(encoding: str = "onehot"):
+    if encoding == "native":
+        encoder = joblib.load(NATIVE_ENCODER_PATH)
+        X_train = load_native_split("train", encoder)
+        X_val = load_native_split("val", encoder)
+    else:
+        X_train = np.load(PROCESSED_DIR / "X_train.npy")
+        X_val = np.load(PROCESSED_DIR / "X_val.npy")
     y_train = np.load(PROCESSED_DIR / "y_train.npy")
     y_val = np.load(PROCESSED_DIR / "y_val.npy")
     return X_train, X_val, y_train, y_val
 
 
+def stack_rows(a, b):
+    """Concatène deux splits (matrices ou DataFrames de la sortie native)."""
+    if isinstance(a, pd.DataFrame):
+        return pd.concat([a, b], ignore_index=True)
+    return np.vstack([a, b])
+
+
+def native_params(model_name: str, encoding: str) -> tuple[dict, dict]:
+    """Paramètres (constructeur, fit) des catégorielles natives; vides en One-Hot."""
+    if encoding != "native":
+        return {}, {}
+    return native_model_params(model_name, joblib.load(NATIVE_ENCODER_PATH))
+
+
+def out_of_sample_proba(clf, X_train, X_val, y_train, y_val, fit_params: dict):
+    """Prédictions hors échantillon: out-of-fold sur train+val, sinon split de validation."""
+    cv = CVConfig.from_env()
+    if cv.enabled:
+        y_combined = np.hstack([y_train, y_val])
+        return y_combined, out_of_fold_proba(
+            clf, stack_rows(X_train, X_val), y_combined, cv, fit_params
+        )
+    return y_val, clf.fit(X_train, y_train, **fit_params).predict_proba(X_val)[:, 1]
+
+
+def fit_calibration(y_oof: np.ndarray, oof: np.ndarray) -> Calibrator | None:
+    """Calibrateur appris sur les prédictions hors échantillon (None si désactivé)."""
+    method = calibration_method()
+    if method == "none":
+        return None
+    calibrator = fit_calibrator(y_oof, oof, method)
+    metrics = calibration_metrics(y_oof, oof, cross_calibrated(y_oof, oof, method))
+    mlflow.log_param("calibration_method", method)
+    mlflow.log_metrics(metrics)
+    logger.info(
+        f"Calibration {method}: ECE {metrics['calibration_ece_raw']:.4f} -> "
+        f"{metrics['calibration_ece']:.4f} ({len(calibrator.x)} bornes)"
+    )
+    return calibrator
+
+
+def select_thresholds(y_oof: np.ndarray, proba: np.ndarray) -> OperatingPoints:
+    """Points de fonctionnement choisis sur les probabilités calibrées hors échantillon."""
+    points = optimize_thresholds(y_oof, proba)
+    prefix = "cv" if CVConfig.from_env().enabled else "val"
+    mlflow.log_metrics(
+        {
+            "threshold_decision": points.decision,
+            "threshold_moderate": points.moderate,
+            "threshold_f1": points.f1,
+            **{f"{prefix}_{k}_at_decision": v for k, v in points.metrics.items()},
+        }
+    )
+    logger.info(
+        f"Seuils: décision={points.decision:.4f} modéré={points.moderate:.4f} "
+        f"F1={points.f1:.4f} | coût attendu={points.metrics['expected_cost']:.2f}"
+    )
+    return points
+
+
 def objective(trial: optuna.Trial) -> float:
-    X_train, X_val, y_train, y_val = load_arrays()
+    encoding = feature_encoding()
+    X_train, X_val, y_train, y_val = load_arrays(encoding)
 
     # Poids de classes pour déséquilibre
     classes = np.unique(y_train)
     cw = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
     class_weight = {int(c): float(w) for c, w in zip(classes, cw)}
 
-    model_name = trial.suggest_categorical("model", [
+    families = [
         "lightgbm" if lgb else None,
         "xgboost" if xgb else None,
         "catboost" if CatBoostClassifier else None,
         "logreg",
-    ])
+    ]
+    if encoding == "native":
+        # Seuls LightGBM et CatBoost consomment les codes catégoriels
+        families = [f for f in families if f in NATIVE_FAMILIES]
+    model_name = trial.suggest_categorical("model", families)
     model_name = model_name or "logreg"
+    native_init, fit_params = native_params(model_name, encoding)
 
     if model_name == "lightgbm":
         params = {
@@ -98,13 +195,23 @@ def objective(trial: optuna.Trial) -> float:
             "verbose": False,
         }
         cw_val = [class_weight.get(0, 1.0), class_weight.get(1, 1.0)]
-        clf = CatBoostClassifier(**params, class_weights=cw_val)
+        clf = CatBoostClassifier(**params, class_weights=cw_val, **native_init)
     else:
         # Baseline logistique
         C = trial.suggest_float("C", 1e-3, 10.0, log=True)
         clf = LogisticRegression(C=C, max_iter=2000, n_jobs=-1, class_weight=class_weight)
 
-    clf.fit(X_train, y_train)
+    # Validation croisée sur train+val (CV_FOLDS > 1), sinon split de validation unique
+    cv = CVConfig.from_env()
+    if cv.enabled:
+        scores = cross_validate_trial(
+            clf, stack_rows(X_train, X_val), np.hstack([y_train, y_val]), trial, cv, fit_params
+        )
+        for name, value in scores.items():
+            trial.set_user_attr(name, value)
+        return scores["cv_auc_mean"]
+
+    clf.fit(X_train, y_train, **fit_params)
     proba = clf.predict_proba(X_val)[:, 1]
     preds = (proba >= 0.5).astype(int)
     auc = float(roc_auc_score(y_val, proba))
@@ -117,13 +224,89 @@ def objective(trial: optuna.Trial) -> float:
     return auc
 
 
-def main() -> None:
+def log_model_files(calibrator: Calibrator | None, points: OperatingPoints) -> None:
+    """Calibration et seuils livrés avec le modèle (relus par evaluate, l'API et l'UI)."""
+    # Fichier toujours écrit (sortie DVC), {"method": "none"} sans calibration
+    mlflow.log_dict(calibration_dict(calibrator), f"model/{CALIBRATION_ARTIFACT}")
+    save_calibration(calibrator)
+    mlflow.log_dict(points.to_dict(), f"model/{THRESHOLDS_ARTIFACT}")
+    points.save()
+
+
+def export_model(clf, native: bool) -> None:
+    """Exports optionnels pour le serving: arbres en tableaux plats (GBDT) et pipeline ONNX.
+
+    Non declares comme sorties DVC: un export impossible supprime le fichier du
+    run precedent (jamais de graphe ou d'arbres d'un autre modele au serving).
+    """
+    if native:
+        # Splits catégoriels non supportés par TreeEnsemble et ONNX
+        logger.info("Catégorielles natives: exports TreeEnsemble/ONNX ignorés")
+        TREE_ENSEMBLE_PATH.unlink(missing_ok=True)
+        ONNX_PATH.unlink(missing_ok=True)
+        return
+
+    # Arbres en tableaux plats (GBDT uniquement), servis avec SCORING_BACKEND=numpy
+    if isinstance(clf, LogisticRegression):
+        TREE_ENSEMBLE_PATH.unlink(missing_ok=True)
+    else:
+        ensemble_path = TreeEnsemble.from_model(clf).save(TREE_ENSEMBLE_PATH)
+        mlflow.log_artifact(str(ensemble_path), artifact_path="model")
+        logger.info(f"Ensemble d'arbres exporte: {ensemble_path}")
+
+    # Export ONNX du pipeline complet (cleaner + preprocessor + modele), extra `onnx`.
+    # Chemin par defaut (ONNX_PATH) = celui que lit OnnxPipeline au serving
+    try:
+        onnx_path = export_pipeline(clf)
+        mlflow.log_artifact(str(onnx_path))
+        logger.info(f"Pipeline ONNX exporte: {onnx_path}")
+    except ImportError:
+        logger.warning("onnx non installe (extra onnx): export ONNX ignore")
+        ONNX_PATH.unlink(missing_ok=True)
+    except (ValueError, RuntimeError) as e:
+        logger.warning(f"Modele non convertible en ONNX, export ignore: {e}")
+        ONNX_PATH.unlink(missing_ok=True)
+
+
+def log_global_explanations(clf, native: bool, calibrator: Calibrator | None) -> None:
+    """Explications globales precalculees (importance, PDP calibrees globale et par contrat)."""
+    encoder = joblib.load(NATIVE_ENCODER_PATH) if native else None
+    explanations = build_global_explanations(clf, preprocessor=encoder, calibrator=calibrator)
+    explanations_path = explanations.save(GLOBAL_EXPLANATIONS_PATH)
+    mlflow.log_artifact(str(explanations_path), artifact_path="model")
+    logger.info(f"Explications globales exportees: {explanations_path}")
+
+
+def compress_model(clf, compression: CompressionConfig) -> None:
+    """Compression post-entrainement (float32/float16, troncature) avec garde-fou AUC test."""
+    X_test = np.load(PROCESSED_DIR / "X_test.npy")
+    y_test = np.load(PROCESSED_DIR / "y_test.npy")
+    compressed, report = compress_and_validate(clf, X_test, y_test, compression)
+    mlflow.log_metrics(report.as_metrics())
+    # Objets non sklearn (TreeEnsemble, CompressedLinearModel): joblib dans le
+    # dossier du modele, charge par le serving si SERVE_COMPRESSED_MODEL=true
+    if report.promoted:
+        joblib.dump(compressed, COMPRESSED_MODEL_PATH)
+        mlflow.log_artifact(str(COMPRESSED_MODEL_PATH), artifact_path="model")
+    else:
+        COMPRESSED_MODEL_PATH.unlink(missing_ok=True)
+
+
+def main(profile: bool | None = None) -> None:
     setup_mlflow("telco-churn")
     n_trials = int(os.getenv("OPTUNA_TRIALS", "30"))
-    study = optuna.create_study(direction="maximize", study_name="telco-churn")
+    study = optuna.create_study(
+        direction="maximize", study_name="telco-churn", pruner=CVConfig.from_env().pruner()
+    )
+    # Profilage optionnel (PROFILING=true ou --profile): etapes et essais Optuna
+    profiler = Profiler.from_env("train", enabled=profile)
+    encoding = feature_encoding()
+    native = encoding == "native"
     with mlflow.start_run() as run:
+        mlflow.log_param("feature_encoding", encoding)
         logger.info("Démarrage optimisation Optuna…")
-        study.optimize(objective, n_trials=n_trials)
+        with profiler.stage("optuna"):
+            study.optimize(profiler.wrap_trial(objective), n_trials=n_trials)
         best_auc = study.best_value
         mlflow.log_metric("best_auc", best_auc)
 
@@ -131,7 +314,8 @@ def main() -> None:
         best_params = study.best_trial.params
         model_choice = best_params.get("model", "logreg")
 
-        X_train, X_val, y_train, y_val = load_arrays()
+        X_train, X_val, y_train, y_val = load_arrays(encoding)
+        native_init, fit_params = native_params(model_choice, encoding)
 
         # Calcul des class weights de manière cohérente avec objective
         classes = np.unique(y_train)
@@ -149,28 +333,59 @@ def main() -> None:
         elif model_choice == "catboost" and CatBoostClassifier:
             params = {k: v for k, v in best_params.items() if k != "model"}
             cw_val = [class_weight_dict.get(0, 1.0), class_weight_dict.get(1, 1.0)]
-            clf = CatBoostClassifier(**params, class_weights=cw_val, verbose=False)
+            clf = CatBoostClassifier(**params, class_weights=cw_val, verbose=False, **native_init)
         else:
             C = best_params.get("C", 1.0)
             clf = LogisticRegression(C=C, max_iter=2000, n_jobs=-1, class_weight=class_weight_dict)
 
-        # Entraînement final sur train+val combinés
-        X_combined = np.vstack([X_train, X_val])
+        # Calibration et seuils sur prédictions hors échantillon (plis de l'optimisation
+        # ou split val), jamais sur le test set
+        profiler.lap("calibration")
+        y_oof, oof = out_of_sample_proba(clf, X_train, X_val, y_train, y_val, fit_params)
+        # AUC hors échantillon toujours loggée (métrique du registry, register.py)
+        mlflow.log_metric("val_auc", float(roc_auc_score(y_oof, oof)))
+        calibrator = fit_calibration(y_oof, oof)
+        points = select_thresholds(y_oof, calibrate(calibrator, oof))
+        X_combined = stack_rows(X_train, X_val)
         y_combined = np.hstack([y_train, y_val])
-        clf.fit(X_combined, y_combined)
 
+        # Entraînement final sur train+val combinés
+        profiler.lap("refit")
+        clf.fit(X_combined, y_combined, **fit_params)
+
+        profiler.lap("log_model")
         mlflow.sklearn.log_model(clf, artifact_path="model")
+        log_model_files(calibrator, points)
+        ARTIFACTS_DIR.mkdir(exist_ok=True)
+
+        profiler.lap("export")
+        export_model(clf, native)
 
-        artifacts_dir = PROJECT_ROOT / "artifacts"
-        artifacts_dir.mkdir(exist_ok=True)
+        profiler.lap("global_explanations")
+        log_global_explanations(clf, native, calibrator)
 
-        # Log des métriques finales (best trial sur val)
-        mlflow.log_metric("val_auc", study.best_trial.user_attrs["val_auc"])
-        mlflow.log_metric("val_f1", study.best_trial.user_attrs["val_f1"])
-        mlflow.log_metric("val_ap", study.best_trial.user_attrs["val_ap"])
+        # Sortie native: compression non supportée (splits catégoriels)
+        compression = CompressionConfig.from_env()
+        if compression.enabled and not native:
+            profiler.lap("compression")
+            compress_model(clf, compression)
 
+        # Log des métriques finales du best trial (cv_* en validation croisée, sinon val_*;
+        # val_auc = AUC out-of-fold ou du split val, identique au best trial sans CV)
+        mlflow.log_metrics(study.best_trial.user_attrs)
+        mlflow.log_metric(
+            "n_pruned_trials",
+            len(study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.PRUNED,))),
+        )
+
+        profiler.finish()
         logger.info(f"Run MLflow: {run.info.run_id}")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", action="store_true", help="Profilage par etape (PROFILING)")
+    args = p.parse_args()
+    main(profile=args.profile or None)
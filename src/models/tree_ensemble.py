@@ -0,0 +1,373 @@
+"""Evaluateur NumPy vectorise pour les ensembles d'arbres (GBDT).
+
+- Exporte un booster LightGBM / XGBoost / CatBoost en tableaux plats
+  (feature, seuil, enfants gauche/droit, valeurs des feuilles)
+- Evalue tous les arbres niveau par niveau, vectorise sur le batch
+- Aucune dependance aux librairies de boosting au moment du scoring
+- Sauvegarde/chargement au format .npz (artefact leger pour le serving):
+  exporte par train (dossier du modele MLflow et data/processed), servi par
+  `load_artifacts` avec SCORING_BACKEND=numpy
+
+Configuration par variables d'environnement: TREE_ENSEMBLE_PATH.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.utils.paths import PROCESSED_DIR
+
+TREE_ENSEMBLE_PATH = Path(os.getenv("TREE_ENSEMBLE_PATH", str(PROCESSED_DIR / "tree_ensemble.npz")))
+TREE_ENSEMBLE_ARTIFACT = "tree_ensemble.npz"
+
+# Gestion des valeurs manquantes par noeud
+MISSING_DEFAULT = 0  # NaN -> branche par defaut
+MISSING_AS_ZERO = 1  # NaN -> 0.0 puis comparaison (LightGBM missing_type=None)
+MISSING_ZERO_DEFAULT = 2  # 0 ou NaN -> branche par defaut (LightGBM missing_type=Zero)
+
+# Budget memoire d'un bloc (lignes x arbres) lors de l'evaluation
+_BLOCK_CELLS = 1 << 22
+
+
+@dataclass
+class TreeEnsemble:
+    """Ensemble d'arbres binaires stocke en tableaux plats.
+
+    Les noeuds de tous les arbres sont concatenes en largeur d'abord, de sorte
+    que l'enfant droit suit toujours l'enfant gauche. Les feuilles pointent sur
+    elles-memes avec un seuil +inf, ce qui permet d'iterer `max_depth` fois
+    sans test.
+    Condition de descente a gauche: x <= seuil (`strict=False`) ou
+    x < seuil (`strict=True`).
+    """
+
+    feature: np.ndarray  # int32 (n_nodes,)
+    threshold: np.ndarray  # float64 (n_nodes,)
+    left: np.ndarray  # int32 (n_nodes,)
+    right: np.ndarray  # int32 (n_nodes,)
+    default_left: np.ndarray  # bool (n_nodes,)
+    missing: np.ndarray  # int8 (n_nodes,)
+    value: np.ndarray  # float64 (n_nodes,)
+    roots: np.ndarray  # int32 (n_trees,)
+    max_depth: int
+    base_score: float = 0.0
+    scale: float = 1.0
+    strict: bool = False
+    float32_inputs: bool = False
+    source: str = ""
+
+    def __post_init__(self) -> None:
+        # Index natifs (intp) pour eviter une conversion a chaque indexation
+        self._feature = self.feature.astype(np.intp)
+        self._left = self.left.astype(np.intp)
+
+    @property
+    def n_trees(self) -> int:
+        """Nombre d'arbres de l'ensemble."""
+        return int(self.roots.shape[0])
+
+    # ------------------------------------------------------------------ scoring
+
+    def _leaves(self, x: np.ndarray) -> np.ndarray:
+        """Retourne l'indice de feuille atteint (n_rows, n_trees)."""
+        node = np.broadcast_to(self.roots.astype(np.intp), (x.shape[0], self.n_trees)).copy()
+        zero_default = bool((self.missing == MISSING_ZERO_DEFAULT).any())
+        # Chemin rapide: enfants adjacents (droit = gauche + 1), feuilles a seuil +inf.
+        # Valeurs infinies exclues: avec `strict`, x = +inf >= seuil +inf quitterait la feuille
+        if not zero_default and np.isfinite(x).all():
+            flat = x.ravel()
+            row = (np.arange(x.shape[0], dtype=np.intp) * x.shape[1])[:, None]
+            for _ in range(self.max_depth):
+                fx = flat[row + self._feature[node]]
+                thr = self.threshold[node]
+                node = self._left[node] + ((fx >= thr) if self.strict else (fx > thr))
+            return node
+
+        for _ in range(self.max_depth):
+            fx = np.take_along_axis(x, self.feature[node], axis=1)
+            nan = np.isnan(fx)
+            mode = self.missing[node]
+            fx = np.where(nan & (mode != MISSING_DEFAULT), 0.0, fx)
+            use_default = np.where(mode == MISSING_ZERO_DEFAULT, nan | (np.abs(fx) <= 1e-35), nan)
+            use_default &= mode != MISSING_AS_ZERO
+            thr = self.threshold[node]
+            go_left = (fx < thr) if self.strict else (fx <= thr)
+            go_left = np.where(use_default, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:  # noqa: N803
+        """Score brut (marge) pour chaque ligne."""
+        x = np.asarray(X, dtype=np.float32 if self.float32_inputs else np.float64)
+        x = x.astype(np.float64, copy=False)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        out = np.empty(x.shape[0], dtype=np.float64)
+        step = max(1, _BLOCK_CELLS // max(1, self.n_trees))
+        for start in range(0, x.shape[0], step):
+            leaves = self._leaves(x[start : start + step])
+            out[start : start + step] = self.value[leaves].sum(axis=1, dtype=np.float64)
+        return self.base_score + self.scale * out
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:  # noqa: N803
+        """Probabilites (n, 2) au format scikit-learn."""
+        p1 = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p1, p1])
+
+    # -------------------------------------------------------------- persistance
+
+    def save(self, path: str | Path) -> Path:
+        """Sauvegarde l'ensemble au format .npz compresse."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "max_depth": self.max_depth,
+            "base_score": self.base_score,
+            "scale": self.scale,
+            "strict": self.strict,
+            "float32_inputs": self.float32_inputs,
+            "source": self.source,
+        }
+        with p.open("wb") as f:
+            np.savez_compressed(
+                f,
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                default_left=self.default_left,
+                missing=self.missing,
+                value=self.value,
+                roots=self.roots,
+                meta=np.array(json.dumps(meta)),
+            )
+        return p
+
+    @classmethod
+    def load(cls, path: str | Path) -> TreeEnsemble:
+        """Recharge un ensemble sauvegarde par `save`."""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {k: data[k] for k in data.files if k != "meta"}
+        return cls(**arrays, **meta)
+
+    # ------------------------------------------------------------------- export
+
+    @classmethod
+    def from_model(cls, model: Any) -> TreeEnsemble:
+        """Exporte un classifieur LightGBM, XGBoost ou CatBoost."""
+        module = type(model).__module__.split(".")[0]
+        if module == "lightgbm":
+            return cls.from_lightgbm(model)
+        if module == "xgboost":
+            return cls.from_xgboost(model)
+        if module == "catboost":
+            return cls.from_catboost(model)
+        raise TypeError(f"Modele non supporte pour l'export en arbres: {type(model).__name__}")
+
+    @classmethod
+    def from_lightgbm(cls, model: Any) -> TreeEnsemble:
+        """Exporte un LGBMClassifier (ou Booster) binaire."""
+        booster = getattr(model, "booster_", model)
+        dump = booster.dump_model()
+        objective = str(dump.get("objective", "binary"))
+        if not objective.startswith("binary"):
+            raise ValueError(f"Objectif LightGBM non supporte: {objective}")
+        sigmoid = 1.0
+        for tok in objective.split():
+            if tok.startswith("sigmoid:"):
+                sigmoid = float(tok.split(":", 1)[1])
+
+        builder = _Builder()
+        missing_modes = {
+            "NaN": MISSING_DEFAULT,
+            "None": MISSING_AS_ZERO,
+            "Zero": MISSING_ZERO_DEFAULT,
+        }
+
+        def add(node: dict[str, Any], depth: int) -> int:
+            if "leaf_value" in node:
+                return builder.leaf(float(node["leaf_value"]), depth)
+            if node.get("decision_type", "<=") != "<=":
+                raise ValueError("Splits categoriels LightGBM non supportes")
+            idx = builder.split(
+                int(node["split_feature"]),
+                float(node["threshold"]),
+                bool(node.get("default_left", True)),
+                missing_modes.get(str(node.get("missing_type", "None")), MISSING_AS_ZERO),
+            )
+            builder.link(
+                idx, add(node["left_child"], depth + 1), add(node["right_child"], depth + 1)
+            )
+            return idx
+
+        for tree in dump["tree_info"]:
+            builder.roots.append(add(tree["tree_structure"], 0))
+        return builder.build(scale=sigmoid, strict=False, float32_inputs=False, source="lightgbm")
+
+    @classmethod
+    def from_xgboost(cls, model: Any) -> TreeEnsemble:
+        """Exporte un XGBClassifier (ou Booster) binary:logistic."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        raw = json.loads(booster.save_raw(raw_format="json"))
+        learner = raw["learner"]
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Objectif XGBoost non supporte: {objective}")
+        base = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+        gb = learner["gradient_booster"]
+        if gb.get("name", "gbtree") != "gbtree":
+            raise ValueError(f"Booster XGBoost non supporte: {gb.get('name')}")
+
+        n_trees = len(gb["model"]["trees"])
+        best = getattr(model, "best_iteration", None) if hasattr(model, "get_booster") else None
+        if best is not None:
+            n_trees = min(n_trees, int(best) + 1)
+
+        builder = _Builder()
+        for tree in gb["model"]["trees"][:n_trees]:
+            if any(tree.get("split_type", [])):
+                raise ValueError("Splits categoriels XGBoost non supportes")
+            builder.roots.append(_add_xgboost_node(builder, tree, 0, 0))
+        margin = float(np.log(base / (1.0 - base)))
+        return builder.build(base_score=margin, strict=True, float32_inputs=True, source="xgboost")
+
+    @classmethod
+    def from_catboost(cls, model: Any) -> TreeEnsemble:
+        """Exporte un CatBoostClassifier (arbres symetriques, features numeriques)."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model.json"
+            model.save_model(str(path), format="json")
+            raw = json.loads(path.read_text())
+        flat_index = {
+            f["feature_index"]: f["flat_feature_index"]
+            for f in raw["features_info"].get("float_features", [])
+        }
+        if raw["features_info"].get("categorical_features"):
+            raise ValueError("Features categorielles CatBoost non supportees")
+
+        builder = _Builder()
+        for tree in raw["oblivious_trees"]:
+            builder.roots.append(_add_oblivious_node(builder, tree, flat_index, 0, 0))
+        scale, bias = raw.get("scale_and_bias", [1.0, [0.0]])
+        bias = float(bias[0]) if isinstance(bias, list) else float(bias)
+        return builder.build(
+            base_score=bias,
+            scale=float(scale),
+            strict=False,
+            float32_inputs=True,
+            source="catboost",
+        )
+
+
+class _Builder:
+    """Accumulateur de noeuds pendant l'export."""
+
+    def __init__(self) -> None:
+        self.feature: list[int] = []
+        self.threshold: list[float] = []
+        self.left: list[int] = []
+        self.right: list[int] = []
+        self.default_left: list[bool] = []
+        self.missing: list[int] = []
+        self.value: list[float] = []
+        self.roots: list[int] = []
+        self.max_depth = 0
+
+    def _append(
+        self, feature: int, threshold: float, default_left: bool, missing: int, value: float
+    ) -> int:
+        idx = len(self.feature)
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(idx)
+        self.right.append(idx)
+        self.default_left.append(default_left)
+        self.missing.append(missing)
+        self.value.append(value)
+        return idx
+
+    def leaf(self, value: float, depth: int) -> int:
+        self.max_depth = max(self.max_depth, depth)
+        return self._append(0, np.inf, True, MISSING_DEFAULT, value)
+
+    def split(self, feature: int, threshold: float, default_left: bool, missing: int) -> int:
+        return self._append(feature, threshold, default_left, missing, 0.0)
+
+    def link(self, idx: int, left: int, right: int) -> None:
+        self.left[idx] = left
+        self.right[idx] = right
+
+    def build(self, **kwargs: Any) -> TreeEnsemble:
+        """Renumerote les noeuds en largeur d'abord et construit l'ensemble."""
+        left = np.asarray(self.left, dtype=np.int64)
+        right = np.asarray(self.right, dtype=np.int64)
+        order: list[int] = []
+        for root in self.roots:
+            queue = [root]
+            for n in queue:
+                if left[n] != n:
+                    queue.extend((int(left[n]), int(right[n])))
+            order.extend(queue)
+        order_arr = np.asarray(order, dtype=np.int64)
+        new_index = np.empty(len(order_arr), dtype=np.int64)
+        new_index[order_arr] = np.arange(len(order_arr))
+        return TreeEnsemble(
+            feature=np.asarray(self.feature, dtype=np.int32)[order_arr],
+            threshold=np.asarray(self.threshold, dtype=np.float64)[order_arr],
+            left=new_index[left[order_arr]].astype(np.int32),
+            right=new_index[right[order_arr]].astype(np.int32),
+            default_left=np.asarray(self.default_left, dtype=bool)[order_arr],
+            missing=np.asarray(self.missing, dtype=np.int8)[order_arr],
+            value=np.asarray(self.value, dtype=np.float64)[order_arr],
+            roots=new_index[np.asarray(self.roots, dtype=np.int64)].astype(np.int32),
+            max_depth=self.max_depth,
+            **kwargs,
+        )
+
+
+def _add_xgboost_node(builder: _Builder, tree: dict[str, Any], i: int, depth: int) -> int:
+    """Ajoute recursivement le noeud `i` d'un arbre XGBoost (valeurs en float32)."""
+    if tree["left_children"][i] == -1:
+        return builder.leaf(float(np.float32(tree["split_conditions"][i])), depth)
+    idx = builder.split(
+        int(tree["split_indices"][i]),
+        float(np.float32(tree["split_conditions"][i])),
+        bool(tree["default_left"][i]),
+        MISSING_DEFAULT,
+    )
+    builder.link(
+        idx,
+        _add_xgboost_node(builder, tree, tree["left_children"][i], depth + 1),
+        _add_xgboost_node(builder, tree, tree["right_children"][i], depth + 1),
+    )
+    return idx
+
+
+def _add_oblivious_node(
+    builder: _Builder, tree: dict[str, Any], flat_index: dict[int, int], level: int, leaf_idx: int
+) -> int:
+    """Deplie un arbre symetrique CatBoost en arbre binaire complet.
+
+    Le split `level` contribue au bit `level` de l'indice de feuille (x > border -> 1).
+    """
+    splits = tree.get("splits", [])
+    if level == len(splits):
+        return builder.leaf(float(tree["leaf_values"][leaf_idx]), level)
+    s = splits[level]
+    idx = builder.split(
+        flat_index[s["float_feature_index"]], float(s["border"]), True, MISSING_DEFAULT
+    )
+    builder.link(
+        idx,
+        _add_oblivious_node(builder, tree, flat_index, level + 1, leaf_idx),
+        _add_oblivious_node(builder, tree, flat_index, level + 1, leaf_idx | (1 << level)),
+    )
+    return idx
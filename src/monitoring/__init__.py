@@ -0,0 +1 @@
+"""Module de monitoring (derive des donnees et des scores)."""
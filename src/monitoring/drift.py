@@ -0,0 +1,296 @@
+"""Profils de reference et suivi en ligne de la derive des donnees.
+
+- Profil de reference calcule par `build_features` sur le train brut: bins
+  quantiles (bords figes) pour tenure / MonthlyCharges / TotalCharges,
+  frequences des categories pour les autres champs de `Record`
+- Profil des scores (bins fixes sur [0, 1]) calcule par `evaluate` sur le test
+- `DriftMonitor`: resumes en streaming a memoire bornee (comptes par bin et par
+  categorie, tailles fixees par la reference), mis a jour par batch en dehors du
+  chemin critique de la reponse
+- PSI par champ et KS (ecart maximal des fonctions de repartition aux bords des
+  bins) pour les numeriques et les scores
+
+Configuration par variables d'environnement: DRIFT_BINS, DRIFT_PSI_WARN, DRIFT_PSI_ALERT.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+REFERENCE_PROFILE_PATH = PROCESSED_DIR / "reference_profile.json"
+SCORE_PROFILE_PATH = PROCESSED_DIR / "score_profile.json"
+
+NUMERIC_FEATURES = ("tenure", "MonthlyCharges", "TotalCharges")
+IGNORED_COLUMNS = ("Churn", "customerID")
+SCORE_EDGES = np.linspace(0.0, 1.0, 21)[1:-1]
+
+
+def _to_float(values: Any) -> np.ndarray:
+    """Valeurs numeriques (chaines vides/invalides -> NaN)."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "fiub":
+        return arr.astype(np.float64, copy=False)
+    return pd.to_numeric(arr, errors="coerce").astype(np.float64, copy=False)
+
+
+def numeric_counts(values: Any, edges: np.ndarray) -> tuple[np.ndarray, int]:
+    """Comptes par bin (len(edges) + 1 bins) et nombre de valeurs manquantes."""
+    x = _to_float(values)
+    present = x[~np.isnan(x)]
+    bins = np.searchsorted(edges, present, side="right")
+    return np.bincount(bins, minlength=len(edges) + 1), len(x) - len(present)
+
+
+def categorical_counts(values: Any, index: dict[Any, int]) -> np.ndarray:
+    """Comptes par categorie de reference (+ une case finale "autre")."""
+    other = len(index)
+    codes = np.fromiter((index.get(v, other) for v in values), dtype=np.intp)
+    return np.bincount(codes, minlength=other + 1)
+
+
+def psi(reference: np.ndarray, live: np.ndarray, eps: float = 1e-4) -> float:
+    """Population Stability Index entre deux histogrammes de memes bins."""
+    p = np.maximum(reference / max(1, reference.sum()), eps)
+    q = np.maximum(live / max(1, live.sum()), eps)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_binned(reference: np.ndarray, live: np.ndarray) -> float:
+    """KS aux bords des bins (borne inferieure de la statistique exacte)."""
+    p = np.cumsum(reference) / max(1, reference.sum())
+    q = np.cumsum(live) / max(1, live.sum())
+    return float(np.max(np.abs(p - q)))
+
+
+@dataclass
+class NumericProfile:
+    """Histogramme a bords figes d'une variable numerique."""
+
+    edges: list[float]
+    counts: list[int]
+    missing: int = 0
+
+    @classmethod
+    def from_values(cls, values: Any, n_bins: int) -> NumericProfile:
+        x = _to_float(values)
+        qs = np.linspace(0.0, 1.0, n_bins + 1)[1:-1]
+        edges = np.unique(np.nanquantile(x, qs)) if np.isfinite(x).any() else np.array([])
+        counts, missing = numeric_counts(x, edges)
+        return cls(edges=edges.tolist(), counts=counts.tolist(), missing=int(missing))
+
+
+@dataclass
+class CategoricalProfile:
+    """Frequences des categories observees a l'entrainement."""
+
+    categories: list[Any]
+    counts: list[int]  # len(categories) + 1 (derniere case: "autre")
+
+    @classmethod
+    def from_values(cls, values: Any) -> CategoricalProfile:
+        categories = pd.Series(values).dropna().unique().tolist()
+        index = {c: i for i, c in enumerate(categories)}
+        return cls(categories=categories, counts=categorical_counts(values, index).tolist())
+
+
+@dataclass
+class ReferenceProfile:
+    """Profil de reference des champs bruts (JSON livre avec les artefacts)."""
+
+    n_rows: int
+    numeric: dict[str, NumericProfile]
+    categorical: dict[str, CategoricalProfile]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def save(self, path: str | Path = REFERENCE_PROFILE_PATH) -> Path:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        return p
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ReferenceProfile:
+        return cls(
+            n_rows=data["n_rows"],
+            numeric={k: NumericProfile(**v) for k, v in data["numeric"].items()},
+            categorical={k: CategoricalProfile(**v) for k, v in data["categorical"].items()},
+        )
+
+    @classmethod
+    def load(cls, path: str | Path = REFERENCE_PROFILE_PATH) -> ReferenceProfile:
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def build_reference_profile(df_raw: pd.DataFrame, n_bins: int | None = None) -> ReferenceProfile:
+    """Profil des champs bruts (hors cible et identifiant) d'un DataFrame."""
+    n_bins = int(os.getenv("DRIFT_BINS", "20")) if n_bins is None else n_bins
+    columns = [c for c in df_raw.columns if c not in IGNORED_COLUMNS]
+    return ReferenceProfile(
+        n_rows=len(df_raw),
+        numeric={
+            c: NumericProfile.from_values(df_raw[c].to_numpy(), n_bins)
+            for c in columns
+            if c in NUMERIC_FEATURES
+        },
+        categorical={
+            c: CategoricalProfile.from_values(df_raw[c].to_numpy())
+            for c in columns
+            if c not in NUMERIC_FEATURES
+        },
+    )
+
+
+def build_score_profile(proba: np.ndarray) -> NumericProfile:
+    """Histogramme de reference des scores (bins fixes de largeur 0.05)."""
+    counts, missing = numeric_counts(proba, SCORE_EDGES)
+    return NumericProfile(edges=SCORE_EDGES.tolist(), counts=counts.tolist(), missing=missing)
+
+
+def save_score_profile(proba: np.ndarray, path: str | Path = SCORE_PROFILE_PATH) -> Path:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(asdict(build_score_profile(proba))), encoding="utf-8")
+    return p
+
+
+def drift_status(value: float | None) -> str:
+    """Statut d'un PSI: stable, warning ou drift (seuils usuels 0.1 / 0.25)."""
+    if value is None:
+        return "no_data"
+    if value >= float(os.getenv("DRIFT_PSI_ALERT", "0.25")):
+        return "drift"
+    if value >= float(os.getenv("DRIFT_PSI_WARN", "0.1")):
+        return "warning"
+    return "stable"
+
+
+def compare_numeric(reference: NumericProfile, counts: np.ndarray, missing: int) -> dict:
+    """PSI / KS d'un histogramme courant contre la reference."""
+    ref = np.asarray(reference.counts)
+    n = int(counts.sum())
+    value = psi(ref, counts) if n else None
+    ref_rows = ref.sum() + reference.missing
+    return {
+        "n": n,
+        "psi": value,
+        "ks": ks_binned(ref, counts) if n else None,
+        "missing_rate": missing / max(1, n + missing),
+        "reference_missing_rate": reference.missing / max(1, int(ref_rows)),
+        "status": drift_status(value),
+    }
+
+
+def compare_categorical(reference: CategoricalProfile, counts: np.ndarray) -> dict:
+    """PSI d'un comptage de categories contre la reference."""
+    n = int(counts.sum())
+    value = psi(np.asarray(reference.counts), counts) if n else None
+    return {
+        "n": n,
+        "psi": value,
+        "unseen_rate": float(counts[-1]) / max(1, n),
+        "status": drift_status(value),
+    }
+
+
+@dataclass
+class DriftMonitor:
+    """Resumes en streaming du trafic (memoire fixee par la reference)."""
+
+    reference: ReferenceProfile
+    score_reference: NumericProfile | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        self._edges = {k: np.asarray(p.edges) for k, p in self.reference.numeric.items()}
+        self._index = {
+            k: {c: i for i, c in enumerate(p.categories)}
+            for k, p in self.reference.categorical.items()
+        }
+        self._zero()
+
+    def _zero(self) -> None:
+        self.n_rows = 0
+        self._numeric = {k: np.zeros(len(e) + 1, np.int64) for k, e in self._edges.items()}
+        self._missing = dict.fromkeys(self._edges, 0)
+        self._categorical = {k: np.zeros(len(i) + 1, np.int64) for k, i in self._index.items()}
+        self._scores = np.zeros(len(SCORE_EDGES) + 1, np.int64)
+
+    def update(self, df_raw: pd.DataFrame, proba: np.ndarray | None = None) -> None:
+        """Ajoute un batch de lignes brutes (et leurs scores) aux resumes."""
+        # Comptes du batch hors verrou, puis simple addition des histogrammes
+        numeric = {
+            k: numeric_counts(df_raw[k].to_numpy(), e)
+            for k, e in self._edges.items()
+            if k in df_raw
+        }
+        categorical = {
+            k: categorical_counts(df_raw[k].to_numpy(), i)
+            for k, i in self._index.items()
+            if k in df_raw
+        }
+        scores = numeric_counts(proba, SCORE_EDGES)[0] if proba is not None else None
+        with self._lock:
+            self.n_rows += len(df_raw)
+            for k, (counts, missing) in numeric.items():
+                self._numeric[k] += counts
+                self._missing[k] += missing
+            for k, counts in categorical.items():
+                self._categorical[k] += counts
+            if scores is not None:
+                self._scores += scores
+
+    def report(self, reset: bool = False) -> dict[str, Any]:
+        """PSI / KS par champ et pour les scores, statut global.
+
+        Avec `reset`, les compteurs repartent de zero (nouvelle fenetre).
+        """
+        with self._lock:
+            features = {
+                k: compare_numeric(self.reference.numeric[k], c.copy(), self._missing[k])
+                for k, c in self._numeric.items()
+            }
+            features.update(
+                {
+                    k: compare_categorical(self.reference.categorical[k], c.copy())
+                    for k, c in self._categorical.items()
+                }
+            )
+            scores = self._scores.copy()
+            n_rows = self.n_rows
+            if reset:
+                self._zero()
+        out: dict[str, Any] = {"n_rows": n_rows, "features": features}
+        if self.score_reference is not None:
+            out["churn_proba"] = compare_numeric(self.score_reference, scores, 0)
+        statuses = [f["status"] for f in features.values()]
+        if "churn_proba" in out:
+            statuses.append(out["churn_proba"]["status"])
+        out["status"] = next(
+            (s for s in ("drift", "warning", "stable") if s in statuses), "no_data"
+        )
+        return out
+
+
+def load_drift_monitor() -> DriftMonitor | None:
+    """Moniteur de derive si le profil de reference est disponible, sinon None."""
+    if not REFERENCE_PROFILE_PATH.exists():
+        logger.warning(f"Profil de reference absent ({REFERENCE_PROFILE_PATH}): derive non suivie")
+        return None
+    score_reference = None
+    if SCORE_PROFILE_PATH.exists():
+        data = json.loads(SCORE_PROFILE_PATH.read_text(encoding="utf-8"))
+        score_reference = NumericProfile(**data)
+    return DriftMonitor(ReferenceProfile.load(REFERENCE_PROFILE_PATH), score_reference)
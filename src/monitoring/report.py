@@ -0,0 +1,243 @@
+"""Rapport batch de derive et de qualite des donnees d'un fichier a scorer.
+
+- Lecture en streaming par chunks (pandas `chunksize`, toutes les colonnes en
+  texte): memoire bornee, quelle que soit la taille du fichier
+- Schema: colonnes de `Record` manquantes / en trop, valeurs vides et valeurs
+  non numeriques pour les champs numeriques, taux de TotalCharges vides (" ")
+- Categories inconnues par champ (mises a zero sans erreur par
+  `OneHotEncoder(handle_unknown="ignore")`), avec les valeurs les plus frequentes
+- Distance de distribution (PSI / KS) avec les histogrammes de `DriftMonitor`,
+  contre le profil de reference de `build_features`
+- Sorties: `reports/drift/<fichier>.json` et `.html`, metriques MLflow
+
+Configuration par variables d'environnement: DRIFT_REPORT_CHUNK_SIZE.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.monitoring.drift import (
+    REFERENCE_PROFILE_PATH,
+    DriftMonitor,
+    ReferenceProfile,
+    drift_status,
+)
+from src.utils.logging import logger
+from src.utils.paths import PROJECT_ROOT
+
+REPORTS_DIR = PROJECT_ROOT / "reports" / "drift"
+TOP_UNSEEN = 10
+MAX_TRACKED_UNSEEN = 1000
+
+
+def record_schema() -> dict[str, type]:
+    """Champs attendus de `Record` (schema de l'API) et leur type Python."""
+    from src.serving.schema import Record
+
+    types = {"int": int, "float": float}
+    return {
+        name: types.get(getattr(f.annotation, "__name__", ""), str)
+        for name, f in Record.model_fields.items()
+    }
+
+
+class QualityAccumulator:
+    """Compteurs de qualite cumules chunk par chunk."""
+
+    def __init__(self, schema: dict[str, type], reference: ReferenceProfile) -> None:
+        self.schema = schema
+        self.reference = reference
+        self.rows = 0
+        self.columns: list[str] | None = None
+        self.empty = Counter()
+        self.invalid = Counter()
+        self.unseen: dict[str, Counter] = {k: Counter() for k in reference.categorical}
+        self._categories = {
+            k: set(map(str, p.categories)) for k, p in reference.categorical.items()
+        }
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+        self.rows += len(chunk)
+        for name, kind in self.schema.items():
+            if name not in chunk:
+                continue
+            values = chunk[name].str.strip()
+            empty = values == ""
+            self.empty[name] += int(empty.sum())
+            if kind is not str or name == "TotalCharges":
+                parsed = pd.to_numeric(values.mask(empty), errors="coerce")
+                bad = parsed.isna() & ~empty
+                if kind is int:
+                    bad |= parsed.notna() & (parsed % 1 != 0)
+                self.invalid[name] += int(bad.sum())
+        for name, counter in self.unseen.items():
+            if name not in chunk:
+                continue
+            values = chunk[name]
+            unseen = values[~values.isin(self._categories[name])]
+            if len(unseen):
+                counter.update(unseen.value_counts().to_dict())
+                # Nombre de valeurs distinctes suivies borne (valeurs les plus frequentes)
+                if len(counter) > MAX_TRACKED_UNSEEN:
+                    self.unseen[name] = Counter(dict(counter.most_common(MAX_TRACKED_UNSEEN)))
+
+    def summary(self) -> dict[str, Any]:
+        columns = self.columns or []
+        rows = max(1, self.rows)
+        return {
+            "rows": self.rows,
+            "missing_columns": [c for c in self.schema if c not in columns],
+            "extra_columns": [c for c in columns if c not in self.schema],
+            "total_charges_blank_rate": self.empty["TotalCharges"] / rows,
+            "empty_rate": {k: self.empty[k] / rows for k in self.schema if k in columns},
+            "invalid_rate": {k: v / rows for k, v in self.invalid.items()},
+            "top_unseen": {k: dict(c.most_common(TOP_UNSEEN)) for k, c in self.unseen.items() if c},
+        }
+
+
+def _to_reference_types(chunk: pd.DataFrame, reference: ReferenceProfile) -> pd.DataFrame:
+    """Chunk texte -> types du profil (numeriques et categories entieres)."""
+    out = chunk.copy()
+    for name, profile in reference.categorical.items():
+        if name in out and all(isinstance(c, int) for c in profile.categories):
+            out[name] = pd.to_numeric(out[name], errors="coerce")
+    return out
+
+
+def profile_file(
+    path: str | Path, reference: ReferenceProfile, chunk_size: int | None = None
+) -> dict[str, Any]:
+    """Rapport de qualite et de derive d'un CSV, en un seul passage par chunks."""
+    chunk_size = (
+        int(os.getenv("DRIFT_REPORT_CHUNK_SIZE", "200000")) if chunk_size is None else chunk_size
+    )
+    quality = QualityAccumulator(record_schema(), reference)
+    monitor = DriftMonitor(reference)
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+    for chunk in reader:
+        quality.update(chunk)
+        monitor.update(_to_reference_types(chunk, reference))
+
+    drift = monitor.report()
+    summary = quality.summary()
+    fields = {
+        name: {
+            **stats,
+            "empty_rate": summary["empty_rate"].get(name),
+            "invalid_rate": summary["invalid_rate"].get(name),
+            "top_unseen": summary["top_unseen"].get(name, {}),
+        }
+        for name, stats in drift["features"].items()
+    }
+    schema_error = bool(summary["missing_columns"]) or any(
+        v > 0 for v in summary["invalid_rate"].values()
+    )
+    return {
+        "file": str(path),
+        "rows": summary["rows"],
+        "status": "schema_error" if schema_error else drift["status"],
+        "missing_columns": summary["missing_columns"],
+        "extra_columns": summary["extra_columns"],
+        "total_charges_blank_rate": summary["total_charges_blank_rate"],
+        "reference_total_charges_blank_rate": _reference_blank_rate(reference),
+        "fields": fields,
+    }
+
+
+def _reference_blank_rate(reference: ReferenceProfile) -> float | None:
+    profile = reference.numeric.get("TotalCharges")
+    if profile is None:
+        return None
+    return profile.missing / max(1, sum(profile.counts) + profile.missing)
+
+
+def report_metrics(report: dict[str, Any]) -> dict[str, float]:
+    """Metriques plates pour MLflow (une par champ pour PSI et inconnus)."""
+    psis = [f["psi"] for f in report["fields"].values() if f["psi"] is not None]
+    metrics = {
+        "rows": float(report["rows"]),
+        "missing_columns": float(len(report["missing_columns"])),
+        "total_charges_blank_rate": report["total_charges_blank_rate"],
+        "max_psi": max(psis, default=0.0),
+        "fields_drifted": float(sum(drift_status(p) == "drift" for p in psis)),
+    }
+    for name, stats in report["fields"].items():
+        if stats["psi"] is not None:
+            metrics[f"psi_{name}"] = stats["psi"]
+        if "unseen_rate" in stats:
+            metrics[f"unseen_rate_{name}"] = stats["unseen_rate"]
+    return metrics
+
+
+def render_html(report: dict[str, Any]) -> str:
+    """Rapport HTML compact: resume puis une ligne par champ."""
+    table = pd.DataFrame.from_dict(report["fields"], orient="index")
+    table["top_unseen"] = table["top_unseen"].map(lambda d: ", ".join(map(str, d)) or "")
+    summary = pd.Series({k: v for k, v in report.items() if k != "fields"}, dtype=object).to_frame(
+        "valeur"
+    )
+    return (
+        "<html><head><meta charset='utf-8'><title>Rapport de derive</title></head><body>"
+        f"<h1>Rapport de derive: {Path(report['file']).name}</h1>"
+        f"{summary.to_html()}<h2>Champs</h2>"
+        f"{table.to_html(float_format=lambda v: f'{v:.4f}', na_rep='')}</body></html>"
+    )
+
+
+def write_report(report: dict[str, Any], out_dir: Path = REPORTS_DIR) -> list[Path]:
+    """Ecrit `<fichier>.json` et `<fichier>.html` dans out_dir."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(report["file"]).stem
+    json_path, html_path = out_dir / f"{stem}.json", out_dir / f"{stem}.html"
+    json_path.write_text(json.dumps(report, indent=2, default=float), encoding="utf-8")
+    html_path.write_text(render_html(report), encoding="utf-8")
+    return [json_path, html_path]
+
+
+def run(input_path: str | Path, out_dir: Path = REPORTS_DIR, log_mlflow: bool = True) -> list[dict]:
+    """Rapport pour un fichier CSV ou pour chaque CSV d'un dossier."""
+    input_path = Path(input_path)
+    files = sorted(input_path.glob("*.csv")) if input_path.is_dir() else [input_path]
+    reference = ReferenceProfile.load(REFERENCE_PROFILE_PATH)
+    # Sortie declaree par l'etape DVC: creee meme sans fichier a profiler
+    out_dir.mkdir(parents=True, exist_ok=True)
+    reports = []
+    for path in files:
+        report = profile_file(path, reference)
+        outputs = write_report(report, out_dir)
+        logger.info(f"{path.name}: {report['rows']} lignes, statut {report['status']}")
+        if log_mlflow:
+            import mlflow
+
+            from src.utils.mlflow_utils import setup_mlflow
+
+            setup_mlflow(os.getenv("MLFLOW_DRIFT_EXPERIMENT", "telco-churn-drift"))
+            with mlflow.start_run(run_name=f"drift-{path.stem}"):
+                mlflow.set_tag("input_file", str(path))
+                mlflow.log_metrics(report_metrics(report))
+                for output in outputs:
+                    mlflow.log_artifact(str(output), artifact_path="drift_report")
+        reports.append(report)
+    if not files:
+        logger.warning(f"Aucun fichier CSV a profiler dans {input_path}")
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--input", default="data/incoming")
+    p.add_argument("--out_dir", default=str(REPORTS_DIR))
+    p.add_argument("--no_mlflow", action="store_true")
+    args = p.parse_args()
+    run(args.input, Path(args.out_dir), log_mlflow=not args.no_mlflow)
@@ -1,111 +1,102 @@
 """API FastAPI de scoring.
 
-- Charge le modele MLflow et le preprocessor
+- Charge le modele MLflow et le preprocessor (module partage src.serving.artifacts)
 - Applique TelcoCleaner + preprocessing avant prediction
 - Expose /predict pour scoring unitaire ou batch
+- Validation du corps en colonnes (src.serving.validation): un TypeAdapter sur
+  le JSON brut, sans objet pydantic par client
+- Expose /explain: contributions SHAP par champ brut (explainer construit au
+  chargement, cache par hash de ligne)
+- Expose /predict/risk (niveau de risque + decision) et /thresholds, avec les
+  seuils livres avec le modele (thresholds.json)
+- Routage A/B entre variantes de modeles et scoring shadow en arriere-plan
+  (MODEL_VARIANTS), statistiques par variante sur /variants
+- Suivi de derive du trafic (histogrammes en streaming, PSI/KS contre le profil
+  de reference de build_features) sur /drift
+- Backend onnxruntime optionnel (SCORING_BACKEND=onnx)
+- Expose /scores/{customer_id}: score precalcule par le batch (stockage SQLite
+  des scores, SCORE_STORE_PATH), lu par cle primaire sans scorer
 """
 
 from __future__ import annotations
 
-import os
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Annotated, AsyncGenerator
 
-import joblib
-import mlflow
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Response
 from pydantic import BaseModel
 
-# Import necessaire pour le depickling de cleaner.joblib
-from src.features.build_features import TelcoCleaner  # noqa: F401
-from src.utils.paths import PROCESSED_DIR
-
-# Utiliser version Production par defaut, ou derniere version disponible
-MODEL_URI = os.getenv(
-    "MODEL_URI", os.getenv("MLFLOW_MODEL_URI", "models:/telco-churn-classifier/Production")
-)
-
-# Variables globales pour les artefacts
-model = None
-preprocessor = None
-cleaner = None
-
-
-class Record(BaseModel):
-    """Schema complet des features d'entree (donnees brutes client)."""
-
-    gender: str
-    SeniorCitizen: int
-    Partner: str
-    Dependents: str
-    tenure: int
-    PhoneService: str
-    MultipleLines: str
-    InternetService: str
-    OnlineSecurity: str
-    OnlineBackup: str
-    DeviceProtection: str
-    TechSupport: str
-    StreamingTV: str
-    StreamingMovies: str
-    Contract: str
-    PaperlessBilling: str
-    PaymentMethod: str
-    MonthlyCharges: float
-    TotalCharges: str | None = None
+from src.models.onnx_pipeline import scoring_backend
+from src.monitoring.drift import DriftMonitor, load_drift_monitor
+from src.serving.artifacts import Artifacts, get_artifacts, load_artifacts, primary_model_uri
+from src.serving.routing import ModelRouter, anchor_variant, parse_variants
+from src.serving.schema import Record
+from src.serving.score_store import ScoreStore, score_store_path
+from src.serving.validation import RecordsParser
+
+# Artefacts residents du processus (charges au demarrage)
+artifacts: Artifacts | None = None
+router: ModelRouter | None = None
+monitor: DriftMonitor | None = None
+score_store: ScoreStore | None = None
+
+RISK_LEVELS = ("low", "moderate", "high")
+
+
+# Corps des requetes de scoring: tableau JSON de `Record` -> DataFrame
+parse_records = RecordsParser(Record)
+Records = Annotated[pd.DataFrame, Depends(parse_records)]
+RECORDS_BODY = parse_records.request_body_schema()
 
 
 def _load_artifacts() -> None:
-    """Charge le modele, le preprocessor et le cleaner.
+    """Charge les artefacts via le module partage (src.serving.artifacts).
 
     Strategie:
+    - Si SCORING_BACKEND=onnx : charge uniquement le pipeline ONNX complet
     - Si USE_LOCAL_ARTIFACTS=true : charge directement depuis PROCESSED_DIR
     - Sinon: essaie MLflow puis fallback vers PROCESSED_DIR
+    - Avec MODEL_VARIANTS: artefacts communs portes par une variante (le modele
+      principal n'est charge que si une variante le reference)
     """
-    global model, preprocessor, cleaner
-
-    use_local = os.getenv("USE_LOCAL_ARTIFACTS", "false").lower() == "true"
-
-    # Chargement du modele
-    if use_local:
-        # Mode local direct (pour deploiement sans MLflow)
-        model_path = PROCESSED_DIR / "model.joblib"
-        if not model_path.exists():
-            raise FileNotFoundError(f"Modele local non trouve: {model_path}")
-        model = joblib.load(model_path)
-        print(f"[OK] Modele charge depuis artefacts locaux: {model_path}")
-    else:
-        # Mode MLflow avec fallback
-        try:
-            model = mlflow.sklearn.load_model(MODEL_URI)
-            print(f"[OK] Modele charge depuis MLflow: {MODEL_URI}")
-        except Exception as e:
-            print(f"[WARN] Echec chargement MLflow ({MODEL_URI}): {e}")
-            # Fallback: charger le modele depuis PROCESSED_DIR
-            model_path = PROCESSED_DIR / "model.joblib"
-            if not model_path.exists():
-                raise FileNotFoundError(
-                    f"Modele non trouve ni dans MLflow ni dans {model_path}"
-                ) from e
-            model = joblib.load(model_path)
-            print(f"[OK] Modele charge depuis fallback: {model_path}")
-
-    # Chargement du preprocessor et cleaner
-    try:
-        preprocessor_path = PROCESSED_DIR / "preprocessor.joblib"
-        cleaner_path = PROCESSED_DIR / "cleaner.joblib"
+    global artifacts, router, monitor, score_store
 
-        if not preprocessor_path.exists():
-            raise FileNotFoundError(f"Preprocessor non trouve: {preprocessor_path}")
-        if not cleaner_path.exists():
-            raise FileNotFoundError(f"Cleaner non trouve: {cleaner_path}")
+    # Variantes A/B: le graphe ONNX embarque un seul modele
+    variants = parse_variants()
+    if variants and scoring_backend() == "onnx":
+        print("[WARN] MODEL_VARIANTS ignore avec SCORING_BACKEND=onnx")
+        variants = []
+    anchor = anchor_variant(variants, primary_model_uri()) if variants else None
 
-        preprocessor = joblib.load(preprocessor_path)
-        cleaner = joblib.load(cleaner_path)
-        print(f"[OK] Preprocessor et cleaner charges depuis {PROCESSED_DIR}")
+    try:
+        artifacts = get_artifacts() if anchor is None else load_artifacts(anchor.uri)
+    except FileNotFoundError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Erreur chargement artefacts: {e}") from e
+    print(f"[OK] Artefacts charges (source: {artifacts.source})")
+
+    monitor = load_drift_monitor()
+    if monitor is not None:
+        print("[OK] Suivi de derive actif (profil de reference charge)")
+
+    # Scores precalcules par le batch (lecture seule), version du modele servi
+    if score_store_path().exists():
+        score_store = ScoreStore(score_store_path(), read_only=True)
+        print(f"[OK] Stockage des scores: {score_store.path} (modele {artifacts.version})")
+
+    if artifacts.onnx_pipeline is not None:
+        router = None
+        return
+    # Modele des artefacts reutilise par sa variante (pas de second chargement), sauf
+    # repli sur le modele local: la variante est alors chargee par le routeur
+    reuse = anchor is not None and artifacts.source != "fallback"
+    router = ModelRouter.from_env(
+        artifacts.model, artifacts.calibrator, anchor.uri if reuse else None
+    )
+    print(f"[OK] Variantes servies: {router.names} (shadow: {router.shadow})")
 
 
 @asynccontextmanager
@@ -118,27 +109,142 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 app = FastAPI(title="Telco Churn API", lifespan=lifespan)
 
 
-@app.post("/predict")
-def predict(items: list[Record]) -> list[float]:
+class RiskPrediction(BaseModel):
+    """Probabilite de churn et decision au seuil du modele."""
+
+    churn_proba: float
+    risk_level: str
+    retain: bool
+
+
+class StoredPrediction(BaseModel):
+    """Score precalcule d'un client (current: calcule par le modele servi)."""
+
+    customer_id: str
+    churn_proba: float
+    risk_level: str
+    model_version: str
+    scored_at: str
+    current: bool
+
+
+class Explanation(BaseModel):
+    """Contributions SHAP (log-odds) par champ brut du client."""
+
+    churn_proba: float
+    base_value: float
+    contributions: dict[str, float]
+
+
+def _score(df: pd.DataFrame, background_tasks: BackgroundTasks) -> tuple[np.ndarray, str]:
+    """Proba de churn et variante servie; preprocessing calcule une seule fois."""
+    if router is None:
+        proba = artifacts.predict_proba(df)
+        _monitor(df, proba, background_tasks)
+        return proba, artifacts.source
+
+    x = artifacts.preprocessor.transform(artifacts.cleaner.transform(df))
+    variant = router.choose()
+    proba = router.score(variant, x)
+    # Shadow apres l'envoi de la reponse, sur la meme matrice pretraitee
+    if router.shadow:
+        background_tasks.add_task(router.shadow_score, variant, x, proba)
+    _monitor(df, proba, background_tasks)
+    return proba, variant
+
+
+def _monitor(df: pd.DataFrame, proba: np.ndarray, background_tasks: BackgroundTasks) -> None:
+    """Mise a jour des resumes de derive apres l'envoi de la reponse."""
+    if monitor is not None:
+        background_tasks.add_task(monitor.update, df, proba)
+
+
+@app.get("/drift")
+def drift(reset: bool = False) -> dict:
+    """PSI/KS du trafic recu contre le profil de reference (reset: nouvelle fenetre)."""
+    if monitor is None:
+        raise HTTPException(status_code=503, detail="Profil de reference non disponible")
+    return monitor.report(reset=reset)
+
+
+@app.get("/variants")
+def variants() -> dict:
+    """Statistiques par variante (trafic, latences, distribution des scores)."""
+    if router is None:
+        return {}
+    return router.snapshot()
+
+
+@app.get("/thresholds")
+def thresholds() -> dict:
+    """Seuils de decision du modele charge."""
+    if artifacts is None:
+        raise HTTPException(status_code=500, detail="Artefacts non charges")
+    return artifacts.operating_points.to_dict()
+
+
+@app.get("/scores/{customer_id}")
+def stored_score(customer_id: str) -> StoredPrediction:
+    """Score precalcule d'un client (lecture par cle primaire, sans scoring)."""
+    if score_store is None:
+        raise HTTPException(status_code=503, detail="Stockage des scores non disponible")
+    stored = score_store.get(customer_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Client inconnu: {customer_id}")
+    level = int(artifacts.operating_points.risk_levels(np.array([stored.churn_proba]))[0])
+    return StoredPrediction(
+        **stored.to_dict(),
+        risk_level=RISK_LEVELS[level],
+        current=stored.model_version == artifacts.version,
+    )
+
+
+@app.post("/predict", openapi_extra=RECORDS_BODY)
+def predict(df: Records, response: Response, background_tasks: BackgroundTasks) -> list[float]:
     """Prediction du risque de churn pour une liste de clients.
 
     Applique le pipeline complet: TelcoCleaner -> Preprocessor -> Modele
     """
-    if model is None or preprocessor is None or cleaner is None:
+    if artifacts is None:
         raise HTTPException(status_code=500, detail="Artefacts non charges")
 
     try:
-        # Conversion en DataFrame
-        df = pd.DataFrame([item.model_dump() for item in items])
+        # Pipeline complet (sklearn ou ONNX selon SCORING_BACKEND), variante A/B
+        proba, variant = _score(df, background_tasks)
+        response.headers["X-Model-Variant"] = variant
+        return proba.tolist()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erreur prediction: {str(e)}") from e
 
-        # Application du nettoyage
-        df_clean = cleaner.transform(df)
 
-        # Application du preprocessing
-        x_transformed = preprocessor.transform(df_clean)
+@app.post("/predict/risk", openapi_extra=RECORDS_BODY)
+def predict_risk(
+    df: Records, response: Response, background_tasks: BackgroundTasks
+) -> list[RiskPrediction]:
+    """Niveau de risque et decision de retention selon les seuils du modele."""
+    proba = predict(df, response, background_tasks)
+    points = artifacts.operating_points
+    levels = points.risk_levels(proba)
+    return [
+        RiskPrediction(churn_proba=p, risk_level=RISK_LEVELS[level], retain=p >= points.decision)
+        for p, level in zip(proba, levels, strict=True)
+    ]
 
-        # Prediction
-        proba = model.predict_proba(x_transformed)[:, 1].tolist()
-        return proba
+
+@app.post("/explain", openapi_extra=RECORDS_BODY)
+def explain(df: Records) -> list[Explanation]:
+    """Explication SHAP du score de chaque client, par champ de `Record`."""
+    explainer = artifacts.explainer if artifacts is not None else None
+    if explainer is None:
+        raise HTTPException(status_code=503, detail="Explainer SHAP non disponible")
+
+    try:
+        contributions = explainer.explain(df)
+        # Meme probabilite que /predict: sortie du modele reconstituee, puis calibree
+        proba = artifacts.calibrate(explainer.churn_proba(contributions))
+        return [
+            Explanation(churn_proba=p, base_value=explainer.base_value, contributions=row)
+            for p, row in zip(proba, contributions.to_dict("records"), strict=True)
+        ]
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erreur prediction: {str(e)}") from e
+        raise HTTPException(status_code=400, detail=f"Erreur explication: {str(e)}") from e
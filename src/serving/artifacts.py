@@ -0,0 +1,269 @@
+"""Chargement unique des artefacts de scoring, partage par l'API, l'UI et predict.py.
+
+- `load_artifacts`: modele (local / MLflow / fallback) ou pipeline ONNX,
+  preprocessor, cleaner, calibration, seuils de decision et explainer SHAP
+- `get_artifacts`: une seule copie residente par processus
+- `RemoteScorer`: client HTTP de l'API locale, meme interface de scoring, pour
+  que l'UI ne charge aucun modele (SCORING_API_URL)
+
+Configuration par variables d'environnement:
+USE_LOCAL_ARTIFACTS, MODEL_URI / MLFLOW_MODEL_URI, SCORING_BACKEND, SCORING_API_URL,
+SERVE_COMPRESSED_MODEL (modele compresse promu a l'entrainement a la place du modele complet).
+SCORING_BACKEND=numpy sert l'ensemble d'arbres exporte (`TreeEnsemble`, tree_ensemble.npz)
+a la place du modele de boosting: meme preprocessing, sans surcout des wrappers par appel.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import urllib.request
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Import necessaire pour le depickling de cleaner.joblib
+from src.features.build_features import TelcoCleaner  # noqa: F401
+from src.features.categorical import NATIVE_ENCODER_PATH, uses_native_categoricals
+from src.models.calibration import Calibrator, calibrate, load_calibrator
+from src.models.compress import COMPRESSED_ARTIFACT, COMPRESSED_MODEL_PATH
+from src.models.explain import ShapExplainer
+from src.models.onnx_pipeline import OnnxPipeline, scoring_backend
+from src.models.thresholds import OperatingPoints, load_operating_points
+from src.models.tree_ensemble import TREE_ENSEMBLE_ARTIFACT, TREE_ENSEMBLE_PATH, TreeEnsemble
+from src.serving.score_store import model_version
+from src.utils.logging import logger
+from src.utils.paths import PROCESSED_DIR
+
+DEFAULT_MODEL_URI = "models:/telco-churn-classifier/Production"
+
+
+def model_uri() -> str:
+    """URI MLflow du modele servi."""
+    return os.getenv("MODEL_URI", os.getenv("MLFLOW_MODEL_URI", DEFAULT_MODEL_URI))
+
+
+def use_local_artifacts() -> bool:
+    """Artefacts locaux (data/processed) sans MLflow."""
+    return os.getenv("USE_LOCAL_ARTIFACTS", "false").lower() == "true"
+
+
+def serve_compressed() -> bool:
+    """Modele compresse (model_compressed.joblib) a la place du modele complet."""
+    return os.getenv("SERVE_COMPRESSED_MODEL", "false").lower() == "true"
+
+
+def _local_model_path() -> Path:
+    if scoring_backend() == "numpy":
+        return TREE_ENSEMBLE_PATH
+    return COMPRESSED_MODEL_PATH if serve_compressed() else PROCESSED_DIR / "model.joblib"
+
+
+def _model_artifact() -> str | None:
+    """Fichier du dossier MLflow servi a la place du modele sklearn (None: modele complet)."""
+    if scoring_backend() == "numpy":
+        return TREE_ENSEMBLE_ARTIFACT
+    return COMPRESSED_ARTIFACT if serve_compressed() else None
+
+
+def _load_model_file(path: str | Path) -> Any:
+    """Modele local: ensemble d'arbres (.npz) ou objet joblib."""
+    return TreeEnsemble.load(path) if str(path).endswith(".npz") else joblib.load(path)
+
+
+def primary_model_uri() -> str:
+    """Modele principal: fichier local (USE_LOCAL_ARTIFACTS) ou URI MLflow."""
+    return str(_local_model_path()) if use_local_artifacts() else model_uri()
+
+
+def _load_mlflow_model(uri: str) -> Any:
+    """Modele sklearn du dossier MLflow, ou sa variante compressee / ensemble d'arbres."""
+    import mlflow
+
+    artifact = _model_artifact()
+    if artifact is not None:
+        return _load_model_file(mlflow.artifacts.download_artifacts(f"{uri}/{artifact}"))
+    return mlflow.sklearn.load_model(uri)
+
+
+def load_model(uri: str | None = None) -> tuple[Any, str]:
+    """Charge le modele et retourne (modele, source).
+
+    Strategie:
+    - URI en fichier .joblib (variante A/B) : charge ce fichier
+    - Si USE_LOCAL_ARTIFACTS=true : charge directement depuis PROCESSED_DIR
+    - Sinon: essaie MLflow puis fallback vers PROCESSED_DIR
+    - SERVE_COMPRESSED_MODEL=true : variante compressee dans les deux cas
+    - SCORING_BACKEND=numpy : ensemble d'arbres exporte dans les deux cas
+    """
+    if uri is not None and uri.endswith(".joblib"):
+        logger.info(f"Modele charge depuis {uri}")
+        return joblib.load(uri), "local"
+    model_path = _local_model_path()
+    if use_local_artifacts():
+        if not model_path.exists():
+            raise FileNotFoundError(f"Modele local non trouve: {model_path}")
+        logger.info(f"Modele charge depuis artefacts locaux: {model_path}")
+        return _load_model_file(model_path), "local"
+
+    uri = uri or model_uri()
+    try:
+        model = _load_mlflow_model(uri)
+        logger.info(f"Modele charge depuis MLflow: {uri}")
+        return model, "mlflow"
+    except Exception as e:
+        logger.warning(f"Echec chargement MLflow ({uri}): {e}")
+        if not model_path.exists():
+            raise FileNotFoundError(f"Modele non trouve ni dans MLflow ni dans {model_path}") from e
+        logger.info(f"Modele charge depuis fallback: {model_path}")
+        return _load_model_file(model_path), "fallback"
+
+
+@dataclass
+class Artifacts:
+    """Artefacts de scoring residents (pipeline sklearn ou ONNX)."""
+
+    source: str  # local | mlflow | fallback | onnx
+    operating_points: OperatingPoints
+    model: Any = None
+    preprocessor: Any = None
+    cleaner: Any = None
+    onnx_pipeline: OnnxPipeline | None = None
+    explainer: ShapExplainer | None = None
+    calibrator: Calibrator | None = None
+    version: str = ""  # empreinte des artefacts (stockage des scores)
+
+    def calibrate(self, proba: np.ndarray) -> np.ndarray:
+        """Scores bruts du modele -> probabilites calibrees (inchanges sans calibration)."""
+        return calibrate(self.calibrator, proba)
+
+    def predict_proba(self, df_raw: pd.DataFrame) -> np.ndarray:
+        """Probabilites de churn calibrees (n,) a partir des donnees brutes."""
+        if self.onnx_pipeline is not None:
+            # Le graphe contient cleaner + preprocessing + modele
+            return self.calibrate(self.onnx_pipeline.predict_proba(df_raw)[:, 1])
+        x = self.preprocessor.transform(self.cleaner.transform(df_raw))
+        return self.calibrate(self.model.predict_proba(x)[:, 1])
+
+
+def _model_key(mlflow_uri: str | None, local_path: Path) -> str | Path:
+    """Identite du modele charge: model_uuid MLflow, ou fichier joblib local."""
+    if mlflow_uri is None:
+        return local_path
+    artifact = _model_artifact()
+    suffix = f"/{artifact}" if artifact else ""
+    try:
+        import mlflow
+
+        return (mlflow.models.get_model_info(mlflow_uri).model_uuid or mlflow_uri) + suffix
+    except Exception:
+        return mlflow_uri + suffix
+
+
+def _calibration_key(calibrator: Calibrator | None) -> str | None:
+    return None if calibrator is None else json.dumps(calibrator.to_dict())
+
+
+def load_artifacts(uri: str | None = None, explain: bool = True) -> Artifacts:
+    """Charge tous les artefacts de scoring selon la configuration.
+
+    - Si SCORING_BACKEND=onnx : uniquement le pipeline ONNX complet
+    - Sinon modele + preprocessor + cleaner, et l'explainer SHAP (optionnel:
+      un echec n'empeche pas le scoring; indisponible pour l'ensemble NumPy)
+    - Modele entraine sur les categorielles natives: encodeur natif a la place
+      du ColumnTransformer One-Hot
+    """
+    if scoring_backend() == "onnx":
+        onnx_pipeline = OnnxPipeline()
+        logger.info(f"Pipeline ONNX charge depuis {onnx_pipeline.path}")
+        calibrator = load_calibrator()
+        return Artifacts(
+            source="onnx",
+            operating_points=load_operating_points(),
+            onnx_pipeline=onnx_pipeline,
+            calibrator=calibrator,
+            version=model_version(Path(onnx_pipeline.path), _calibration_key(calibrator)),
+        )
+
+    model, source = load_model(uri)
+    preprocessor_path = (
+        NATIVE_ENCODER_PATH
+        if uses_native_categoricals(model)
+        else PROCESSED_DIR / "preprocessor.joblib"
+    )
+    cleaner_path = PROCESSED_DIR / "cleaner.joblib"
+    if not preprocessor_path.exists():
+        raise FileNotFoundError(f"Preprocessor non trouve: {preprocessor_path}")
+    if not cleaner_path.exists():
+        raise FileNotFoundError(f"Cleaner non trouve: {cleaner_path}")
+    mlflow_uri = (uri or model_uri()) if source == "mlflow" else None
+    joblib_uri = uri if uri is not None and uri.endswith(".joblib") else None
+    calibrator = load_calibrator(mlflow_uri or joblib_uri)
+    artifacts = Artifacts(
+        source=source,
+        operating_points=load_operating_points(mlflow_uri),
+        model=model,
+        preprocessor=joblib.load(preprocessor_path),
+        cleaner=joblib.load(cleaner_path),
+        calibrator=calibrator,
+        version=model_version(
+            _model_key(mlflow_uri, Path(joblib_uri) if joblib_uri else _local_model_path()),
+            preprocessor_path,
+            cleaner_path,
+            _calibration_key(calibrator),
+        ),
+    )
+    logger.info(f"Preprocessor ({preprocessor_path.name}) et cleaner charges")
+
+    if explain:
+        try:
+            artifacts.explainer = ShapExplainer(model, artifacts.preprocessor, artifacts.cleaner)
+        except Exception as e:
+            logger.warning(f"Explainer SHAP indisponible: {e}")
+    return artifacts
+
+
+@lru_cache(maxsize=1)
+def get_artifacts() -> Artifacts:
+    """Artefacts du processus, charges une seule fois."""
+    return load_artifacts()
+
+
+class RemoteScorer:
+    """Scoring delegue a l'API locale: l'UI partage le modele resident de l'API."""
+
+    source = "api"
+
+    def __init__(self, base_url: str, timeout: float = 60.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.operating_points = OperatingPoints.from_dict(self._request("GET", "/thresholds"))
+        self.explainer = self
+
+    def _request(self, method: str, path: str, df: pd.DataFrame | None = None) -> Any:
+        data = None
+        if df is not None:
+            payload = df.astype({"TotalCharges": str}) if "TotalCharges" in df else df
+            data = payload.to_json(orient="records").encode("utf-8")
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def predict_proba(self, df_raw: pd.DataFrame) -> np.ndarray:
+        """Probabilites de churn (n,) via POST /predict."""
+        return np.asarray(self._request("POST", "/predict", df_raw), dtype=np.float64)
+
+    def explain(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """Contributions SHAP par champ brut via POST /explain."""
+        rows = self._request("POST", "/explain", df_raw)
+        return pd.DataFrame([r["contributions"] for r in rows], index=df_raw.index)
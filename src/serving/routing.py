@@ -0,0 +1,221 @@
+"""Routage A/B entre plusieurs modeles et scoring fantome (shadow).
+
+- Plusieurs variantes chargees (ex. Production et Staging du registry), chacune
+  avec une part du trafic; une variante `shadow` est scoree en arriere-plan,
+  hors du chemin critique de la reponse
+- Le nettoyage et le preprocessing sont communs: calcules une seule fois par
+  requete, puis chaque variante ne fait que `predict_proba` sur la matrice,
+  suivi de sa propre table de calibration (calibration.json du modele)
+- Statistiques par variante: nombre de requetes/lignes, latences (p50/p95 sur
+  une fenetre glissante), distribution des scores (histogramme), ecart moyen
+  avec la variante servie pour le shadow
+
+Configuration par variables d'environnement (JSON), par exemple:
+MODEL_VARIANTS='{"production": {"uri": "models:/telco-churn-classifier/Production",
+"weight": 0.9}, "staging": {"uri": "models:/telco-churn-classifier/Staging",
+"weight": 0.1, "shadow": true}}'
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import joblib
+import numpy as np
+
+from src.models.calibration import Calibrator, calibrate, load_calibrator
+from src.utils.logging import logger
+
+DEFAULT_VARIANT = "default"
+SCORE_BINS = np.linspace(0.0, 1.0, 11)
+LATENCY_WINDOW = 1000
+
+
+@dataclass
+class VariantConfig:
+    """Une variante de modele: URI MLflow ou chemin joblib, part de trafic."""
+
+    name: str
+    uri: str
+    weight: float = 0.0
+    shadow: bool = False
+
+
+def parse_variants(raw: str | None = None) -> list[VariantConfig]:
+    """Lit MODEL_VARIANTS (JSON {nom: {uri, weight, shadow}}); vide si absent."""
+    raw = os.getenv("MODEL_VARIANTS") if raw is None else raw
+    if not raw:
+        return []
+    variants = [VariantConfig(name=name, **cfg) for name, cfg in json.loads(raw).items()]
+    if sum(v.weight for v in variants) <= 0:
+        raise ValueError("MODEL_VARIANTS: la somme des parts de trafic doit etre positive")
+    return variants
+
+
+def load_variant_model(uri: str) -> Any:
+    """Charge un modele de variante (fichier joblib ou URI MLflow, sans fallback)."""
+    if uri.endswith(".joblib"):
+        return joblib.load(uri)
+    import mlflow
+
+    return mlflow.sklearn.load_model(uri)
+
+
+def load_variant_calibrator(uri: str) -> Calibrator | None:
+    """Calibration d'une variante (dossier du modele MLflow ou json a cote du joblib)."""
+    return load_calibrator(uri, fallback=False)
+
+
+def anchor_variant(variants: list[VariantConfig], primary_uri: str) -> VariantConfig:
+    """Variante qui porte les artefacts communs (preprocessing, seuils, explainer SHAP).
+
+    Le modele principal s'il est reference par une variante, sinon la premiere
+    variante servie: le modele principal n'est pas charge s'il n'est pas route.
+    """
+    for v in variants:
+        if v.uri == primary_uri:
+            return v
+    return next(v for v in variants if v.weight > 0)
+
+
+@dataclass
+class VariantStats:
+    """Compteurs d'une variante (thread-safe)."""
+
+    requests: int = 0
+    rows: int = 0
+    score_sum: float = 0.0
+    score_hist: np.ndarray = field(default_factory=lambda: np.zeros(len(SCORE_BINS) - 1, int))
+    shadow_requests: int = 0
+    shadow_rows: int = 0
+    abs_diff_sum: float = 0.0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(
+        self, latency_s: float, proba: np.ndarray, reference: np.ndarray | None = None
+    ) -> None:
+        hist, _ = np.histogram(proba, bins=SCORE_BINS)
+        with self._lock:
+            self.requests += 1
+            self.rows += len(proba)
+            self.score_sum += float(proba.sum())
+            self.score_hist += hist
+            if reference is not None:
+                self.shadow_requests += 1
+                self.shadow_rows += len(proba)
+                self.abs_diff_sum += float(np.abs(proba - reference).sum())
+            self.latencies_ms.append(latency_s * 1e3)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = np.array(self.latencies_ms)
+            rows = max(1, self.rows)
+            return {
+                "requests": self.requests,
+                "shadow_requests": self.shadow_requests,
+                "rows": self.rows,
+                "latency_ms_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "latency_ms_p95": float(np.percentile(latencies, 95)) if len(latencies) else None,
+                "score_mean": self.score_sum / rows,
+                "score_hist": self.score_hist.tolist(),
+                "mean_abs_diff_vs_served": self.abs_diff_sum / max(1, self.shadow_rows),
+            }
+
+
+class ModelRouter:
+    """Variantes chargees, tirage pondere de la variante servie et shadow."""
+
+    def __init__(
+        self,
+        models: dict[str, Any],
+        weights: dict[str, float],
+        shadow: list[str],
+        seed: int = 0,
+        calibrators: dict[str, Calibrator | None] | None = None,
+    ) -> None:
+        self.models = models
+        self.calibrators = calibrators or {}
+        self.names = [n for n in models if weights.get(n, 0.0) > 0]
+        total = sum(weights[n] for n in self.names)
+        self.probs = np.array([weights[n] / total for n in self.names])
+        self.shadow = [n for n in shadow if n in models]
+        self.stats = {n: VariantStats() for n in models}
+        self._rng = np.random.default_rng(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls,
+        default_model: Any,
+        default_calibrator: Calibrator | None = None,
+        default_uri: str | None = None,
+    ) -> ModelRouter:
+        """Variantes de MODEL_VARIANTS, ou une seule variante (modele par defaut).
+
+        La variante d'URI `default_uri` reprend le modele par defaut deja charge.
+        """
+        variants = parse_variants()
+        if not variants:
+            return cls(
+                {DEFAULT_VARIANT: default_model},
+                {DEFAULT_VARIANT: 1.0},
+                [],
+                calibrators={DEFAULT_VARIANT: default_calibrator},
+            )
+        models, calibrators = {}, {}
+        for v in variants:
+            if v.uri == default_uri:
+                models[v.name], calibrators[v.name] = default_model, default_calibrator
+            else:
+                models[v.name] = load_variant_model(v.uri)
+                calibrators[v.name] = load_variant_calibrator(v.uri)
+            logger.info(f"Variante {v.name} chargee: {v.uri} (part {v.weight}, shadow={v.shadow})")
+        return cls(
+            models,
+            {v.name: v.weight for v in variants},
+            [v.name for v in variants if v.shadow],
+            calibrators=calibrators,
+        )
+
+    def choose(self) -> str:
+        """Variante servie pour une requete (tirage selon les parts de trafic)."""
+        if len(self.names) == 1:
+            return self.names[0]
+        with self._rng_lock:
+            return self.names[int(self._rng.choice(len(self.names), p=self.probs))]
+
+    def score(self, name: str, x: np.ndarray, reference: np.ndarray | None = None) -> np.ndarray:
+        """Proba de churn calibree d'une variante sur la matrice pretraitee, avec stats."""
+        t0 = time.perf_counter()
+        proba = calibrate(self.calibrators.get(name), self.models[name].predict_proba(x)[:, 1])
+        self.stats[name].record(time.perf_counter() - t0, proba, reference)
+        return proba
+
+    def shadow_score(self, served: str, x: np.ndarray, served_proba: np.ndarray) -> None:
+        """Scoring fantome (hors reponse) des variantes shadow autres que la servie."""
+        for name in self.shadow:
+            if name == served:
+                continue
+            try:
+                self.score(name, x, reference=served_proba)
+            except Exception as e:
+                logger.warning(f"Echec du scoring shadow ({name}): {e}")
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Statistiques par variante (+ part de trafic et role shadow)."""
+        weights = dict(zip(self.names, self.probs.tolist(), strict=True))
+        return {
+            name: {
+                "traffic_share": weights.get(name, 0.0),
+                "shadow": name in self.shadow,
+                **stats.snapshot(),
+            }
+            for name, stats in self.stats.items()
+        }
@@ -0,0 +1,33 @@
+"""Schema des donnees brutes client, partage par l'API et le rapport de derive.
+
+Module leger (pydantic seul): importable par les etapes hors ligne sans
+FastAPI, ni routage, ni explainer SHAP.
+"""
+
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class Record(BaseModel):
+    """Schema complet des features d'entree (donnees brutes client)."""
+
+    gender: str
+    SeniorCitizen: int
+    Partner: str
+    Dependents: str
+    tenure: int
+    PhoneService: str
+    MultipleLines: str
+    InternetService: str
+    OnlineSecurity: str
+    OnlineBackup: str
+    DeviceProtection: str
+    TechSupport: str
+    StreamingTV: str
+    StreamingMovies: str
+    Contract: str
+    PaperlessBilling: str
+    PaymentMethod: str
+    MonthlyCharges: float
+    TotalCharges: str | None = None
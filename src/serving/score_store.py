@@ -0,0 +1,182 @@
+"""Stockage des scores par client et rescoring des seules lignes modifiees.
+
+- Base SQLite locale (bibliotheque standard, aucun service), une ligne par
+  customerID (cle primaire): empreinte des champs d'entree, probabilite de churn,
+  version du modele et date du scoring
+- Empreinte par ligne vectorisee (`pd.util.hash_pandas_object`, 64 bits) sur les
+  champs bruts tries par nom; colonnes numeriques du schema des features
+  converties en float pour qu'un meme client ait la meme empreinte quel que soit
+  le type infere par `read_csv`
+- Diff d'un bloc en une requete: bloc entrant en table temporaire, jointure sur
+  la cle primaire; un score stocke n'est repris que si l'empreinte et la version
+  du modele sont identiques (nouveau modele: tout est rescore)
+- Version du modele: empreinte des artefacts de scoring prise au chargement
+  (`Artifacts.version`): fichiers du modele local ou du graphe ONNX, ou
+  identifiant `model_uuid` du modele MLflow, preprocessor, cleaner, calibration
+- Lecture par cle primaire pour l'API (GET /scores/{customer_id})
+
+Configuration par variables d'environnement: SCORE_STORE_PATH.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import PROCESSED_DIR
+
+ID_COLUMN = "customerID"
+EXCLUDED_COLUMNS = (ID_COLUMN, "Churn", "churn_proba")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    customer_id TEXT PRIMARY KEY,
+    input_hash INTEGER NOT NULL,
+    churn_proba REAL NOT NULL,
+    model_version TEXT NOT NULL,
+    scored_at TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def score_store_path() -> Path:
+    """Fichier SQLite du stockage (SCORE_STORE_PATH, defaut data/processed/scores.sqlite)."""
+    return Path(os.getenv("SCORE_STORE_PATH", str(PROCESSED_DIR / "scores.sqlite")))
+
+
+@lru_cache(maxsize=1)
+def _numeric_columns() -> frozenset[str]:
+    """Colonnes numeriques du schema des features (configs/features.yaml)."""
+    from src.features.telco_cleaner import load_schema
+
+    return frozenset(c for c, t in load_schema().get("columns", {}).items() if t != "str")
+
+
+def input_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Empreinte 64 bits (int64 signe, type INTEGER de SQLite) des champs de chaque ligne."""
+    cols = sorted(c for c in df.columns if c not in EXCLUDED_COLUMNS)
+    numeric = _numeric_columns()
+    frame = pd.DataFrame(
+        {
+            c: (
+                pd.to_numeric(df[c], errors="coerce").astype(np.float64)
+                if c in numeric
+                else df[c].astype(object)
+            )
+            for c in cols
+        },
+        copy=False,
+    )
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().view(np.int64)
+
+
+def model_version(*parts: bytes | str | Path | None) -> str:
+    """Empreinte courte des artefacts qui determinent le score (fichiers ou identifiants)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, Path):
+            part = part.read_bytes()
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part or b"-")
+    return digest.hexdigest()[:12]
+
+
+@dataclass
+class StoredScore:
+    """Score precalcule d'un client."""
+
+    customer_id: str
+    churn_proba: float
+    model_version: str
+    scored_at: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ScoreStore:
+    """Scores par client dans SQLite (lecture seule pour l'API)."""
+
+    def __init__(self, path: str | Path | None = None, read_only: bool = False) -> None:
+        self.path = Path(path) if path is not None else score_store_path()
+        if read_only:
+            self._conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, customer_id: str) -> StoredScore | None:
+        """Score stocke d'un client (recherche par cle primaire)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT customer_id, churn_proba, model_version, scored_at "
+                "FROM scores WHERE customer_id = ?",
+                (customer_id,),
+            ).fetchone()
+        return StoredScore(*row) if row else None
+
+    def cached(self, ids: np.ndarray, hashes: np.ndarray, version: str) -> np.ndarray:
+        """Scores reutilisables du bloc (n,): NaN pour les lignes nouvelles ou modifiees."""
+        out = np.full(len(ids), np.nan)
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS incoming "
+                "(pos INTEGER PRIMARY KEY, customer_id TEXT, input_hash INTEGER)"
+            )
+            conn.execute("DELETE FROM incoming")
+            conn.executemany(
+                "INSERT INTO incoming VALUES (?, ?, ?)",
+                zip(range(len(ids)), ids.tolist(), hashes.tolist(), strict=True),
+            )
+            rows = conn.execute(
+                "SELECT i.pos, s.churn_proba FROM incoming i "
+                "JOIN scores s ON s.customer_id = i.customer_id "
+                "WHERE s.input_hash = i.input_hash AND s.model_version = ?",
+                (version,),
+            ).fetchall()
+        if rows:
+            pos, proba = np.array(rows, dtype=np.float64).T
+            out[pos.astype(np.int64)] = proba
+        return out
+
+    def upsert(self, ids: np.ndarray, hashes: np.ndarray, proba: np.ndarray, version: str) -> None:
+        """Ecrit (ou remplace) les scores des clients donnes, en une transaction."""
+        scored_at = datetime.now(UTC).isoformat(timespec="seconds")
+        rows = zip(
+            ids.tolist(),
+            hashes.tolist(),
+            np.asarray(proba, dtype=np.float64).tolist(),
+            [version] * len(ids),
+            [scored_at] * len(ids),
+            strict=True,
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scores VALUES (?, ?, ?, ?, ?) ON CONFLICT(customer_id) DO UPDATE "
+                "SET input_hash = excluded.input_hash, churn_proba = excluded.churn_proba, "
+                "model_version = excluded.model_version, scored_at = excluded.scored_at",
+                rows,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
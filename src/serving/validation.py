@@ -0,0 +1,81 @@
+"""Validation rapide des payloads `list[Record]` en colonnes.
+
+- Un seul `TypeAdapter` pydantic (coeur Rust) valide le JSON brut du corps de
+  la requete contre un TypedDict derive de `Record`: pas d'instance pydantic ni
+  de `model_dump` par client, memes regles de validation que le modele
+- Les lignes validees sont transposees en colonnes typees (int64 / float64 /
+  object selon le schema), puis assemblees en DataFrame sans inference de types
+- Erreurs au format FastAPI (422, `loc = ["body", index, champ]`): les clients
+  existants ne voient aucune difference
+"""
+
+from __future__ import annotations
+
+from typing import Any, NotRequired, TypedDict
+
+import numpy as np
+import pandas as pd
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+_DTYPES = {int: np.int64, float: np.float64}
+
+
+def records_typed_dict(model: type[BaseModel]) -> type:
+    """TypedDict equivalent au modele (champs avec defaut -> NotRequired)."""
+    fields = {
+        name: field.annotation if field.is_required() else NotRequired[field.annotation]
+        for name, field in model.model_fields.items()
+    }
+    return TypedDict(f"{model.__name__}Dict", fields)
+
+
+class RecordsParser:
+    """Parse un tableau JSON de clients en DataFrame colonne par colonne."""
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.columns = list(model.model_fields)
+        self.defaults = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if not field.is_required()
+        }
+        self.dtypes = {
+            name: _DTYPES.get(field.annotation, object)
+            for name, field in model.model_fields.items()
+        }
+        self.item_type = records_typed_dict(model)
+        self.adapter = TypeAdapter(list[self.item_type])
+
+    def to_frame(self, rows: list[dict[str, Any]]) -> pd.DataFrame:
+        """Lignes validees -> DataFrame (une colonne numpy typee par champ)."""
+        data = {}
+        for name in self.columns:
+            default = self.defaults.get(name)
+            values = [row.get(name, default) for row in rows]
+            data[name] = np.array(values, dtype=self.dtypes[name])
+        return pd.DataFrame(data, copy=False)
+
+    def parse(self, body: bytes | str) -> pd.DataFrame:
+        """Valide le JSON brut; leve `ValidationError` (pydantic) si invalide."""
+        return self.to_frame(self.adapter.validate_json(body))
+
+    def request_body_schema(self) -> dict[str, Any]:
+        """Schema OpenAPI du corps (tableau de `Record`), pour la documentation."""
+        item = TypeAdapter(self.item_type).json_schema()
+        return {
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": {"type": "array", "items": item}}},
+            }
+        }
+
+    async def __call__(self, request: Request) -> pd.DataFrame:
+        """Dependance FastAPI: corps de la requete -> DataFrame valide."""
+        body = await request.body()
+        try:
+            return self.parse(body)
+        except ValidationError as e:
+            errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=body) from e
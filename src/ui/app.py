@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
 import os
 import sys
 
-import joblib
-import mlflow
+import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -15,6 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 
 # Import obligatoire pour deserialiser cleaner.joblib
 from src.features.build_features import TelcoCleaner
+from src.models.global_explain import GlobalExplanations, load_global_explanations
+from src.serving.artifacts import Artifacts, RemoteScorer, get_artifacts, model_uri
 from src.utils.paths import PROCESSED_DIR
 
 cleaner = TelcoCleaner()
@@ -42,6 +46,31 @@ RAW_COLS = [
     "TotalCharges",
 ]
 
+# Libelles des niveaux de risque (faible, modere, eleve)
+RISK_LABELS = np.array(["Faible", "Modere", "Eleve"])
+
+# Scoring par lot: taille des blocs et lignes affichees
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "5000"))
+BATCH_PREVIEW_ROWS = 1000
+
+# Formats d'export: nom de fichier et type MIME
+EXPORT_FORMATS = {
+    "Parquet": ("predictions_churn.parquet", "application/octet-stream"),
+    "CSV": ("predictions_churn.csv", "text/csv"),
+}
+
+# Grille du mode "et si ?" (anciennete x charges mensuelles x contrat), pas de 1
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+WHATIF_TENURE = np.arange(0, 73)
+WHATIF_MONTHLY = np.arange(0.0, 201.0, 1.0)
+
+# Variables des courbes "et si ?" precalculees
+WHATIF_LABELS = {
+    "tenure": "Anciennete (mois)",
+    "MonthlyCharges": "Charges mensuelles (EUR)",
+    "TotalCharges": "Charges totales (EUR)",
+}
+
 # Valeurs par defaut pour les features non saisies
 DEFAULTS = {
     "gender": "Female",
@@ -62,33 +91,75 @@ DEFAULTS = {
 
 
 @st.cache_resource
-def load_artifacts() -> tuple:
-    """Charge les artefacts de prediction (preprocessor, cleaner, model)."""
-    preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
-    cleaner = joblib.load(PROCESSED_DIR / "cleaner.joblib")
-
-    use_local = os.getenv("USE_LOCAL_ARTIFACTS", "false").lower() == "true"
-    model_uri = os.getenv(
-        "MODEL_URI", os.getenv("MLFLOW_MODEL_URI", "models:/telco-churn-classifier/Production")
+def load_scorer() -> Artifacts | RemoteScorer:
+    """Scoring partage: API locale si SCORING_API_URL, sinon artefacts du processus.
+
+    Ressource commune a toutes les sessions: un seul modele resident par processus
+    Streamlit, aucun si l'API score a sa place.
+    """
+    api_url = os.getenv("SCORING_API_URL")
+    return RemoteScorer(api_url) if api_url else get_artifacts()
+
+
+@st.cache_resource
+def load_whatif_tables(source: str) -> GlobalExplanations | None:
+    """Tables importance/PDP precalculees a l'entrainement (None si absentes)."""
+    return load_global_explanations(model_uri() if source == "mlflow" else None)
+
+
+def score(df_raw: pd.DataFrame) -> np.ndarray:
+    """Probabilites de churn a partir des donnees brutes (sklearn, ONNX ou API locale)."""
+    return scorer.predict_proba(df_raw)
+
+
+@st.cache_data(show_spinner=False)
+def whatif_surface(fixed: dict, version: str) -> np.ndarray:
+    """Probabilites (contrat, anciennete, charges mensuelles) du client en un seul appel.
+
+    Cle de cache: les champs fixes du client et la version des artefacts
+    (`Artifacts.version`): un modele ou une calibration recharges invalident la
+    surface. Les charges totales suivent anciennete x charges mensuelles.
+    """
+    cc, tt, mm = np.meshgrid(
+        np.arange(len(CONTRACTS)), WHATIF_TENURE, WHATIF_MONTHLY, indexing="ij"
     )
+    grid = pd.DataFrame(fixed, index=pd.RangeIndex(tt.size))
+    grid["Contract"] = np.array(CONTRACTS)[cc.ravel()]
+    grid["tenure"] = tt.ravel()
+    grid["MonthlyCharges"] = mm.ravel()
+    grid["TotalCharges"] = (tt * mm).ravel().astype(str)
+    return score(grid[RAW_COLS]).reshape(cc.shape)
 
-    if use_local:
-        model_path = PROCESSED_DIR / "model.joblib"
-        if not model_path.exists():
-            raise FileNotFoundError(f"Modele local non trouve: {model_path}")
-        model = joblib.load(model_path)
-        source = "local"
-    else:
-        try:
-            model = mlflow.sklearn.load_model(model_uri)
-            source = "mlflow"
-        except Exception:
-            model_path = PROCESSED_DIR / "model.joblib"
-            if not model_path.exists():
-                raise FileNotFoundError(f"Modele non trouve : {model_path}") from None
-            model = joblib.load(model_path)
-            source = "fallback"
-    return preprocessor, cleaner, model, source
+
+def score_upload(file: io.BytesIO) -> pd.DataFrame:
+    """Scoring par blocs du CSV charge, avec barre de progression.
+
+    La progression suit la position de lecture dans le fichier; les bandes de
+    risque sont calculees en vectoriel (categories) a partir des seuils du modele.
+    """
+    file.seek(0)
+    size = max(1, len(file.getbuffer()))
+    progress = st.progress(0.0, text="Scoring en cours...")
+    parts = []
+    n_rows = 0
+    for chunk in pd.read_csv(file, chunksize=BATCH_CHUNK_SIZE):
+        proba = score(chunk)
+        chunk["churn_proba"] = proba
+        chunk["risque"] = pd.Categorical.from_codes(thresholds.risk_levels(proba), RISK_LABELS)
+        parts.append(chunk)
+        n_rows += len(chunk)
+        progress.progress(min(file.tell() / size, 1.0), text=f"{n_rows} clients scores")
+    progress.empty()
+    return pd.concat(parts, ignore_index=True)
+
+
+def export_results(df_out: pd.DataFrame, fmt: str) -> bytes:
+    """Serialise les resultats (Parquet compact ou CSV)."""
+    if fmt == "Parquet":
+        buffer = io.BytesIO()
+        df_out.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    return df_out.to_csv(index=False).encode("utf-8")
 
 
 # Configuration de la page
@@ -406,8 +477,14 @@ st.markdown(
 
 # Chargement des artefacts
 try:
-    preprocessor, cleaner, model, source = load_artifacts()
-except FileNotFoundError as e:
+    scorer = load_scorer()
+    source = scorer.source
+    thresholds = scorer.operating_points
+    explainer = scorer.explainer
+    # Empreinte du modele et de la calibration (absente si l'API locale score)
+    version = getattr(scorer, "version", "") or source
+    whatif = load_whatif_tables(source)
+except OSError as e:  # artefacts absents ou API locale injoignable
     st.error(f"Erreur de chargement : {str(e)}")
     st.stop()
 
@@ -422,8 +499,7 @@ with st.sidebar:
         unsafe_allow_html=True,
     )
 
-    st.markdown(
-        """
+    st.markdown("""
         Ce projet demontre un **pipeline MLOps complet** pour la prediction
         de l'attrition client (churn) dans le secteur des telecommunications.
 
@@ -435,8 +511,7 @@ with st.sidebar:
         - API REST (FastAPI)
         - Conteneurisation (Docker)
         - Deploiement cloud (Render)
-        """
-    )
+        """)
 
     st.markdown("---")
 
@@ -516,7 +591,7 @@ with tab1:
 
     with col2:
         st.markdown("**Type de contrat**")
-        contracts = ["Month-to-month", "One year", "Two year"]
+        contracts = CONTRACTS
         contract_labels = {
             "Month-to-month": "Mensuel (sans engagement)",
             "One year": "Annuel (1 an)",
@@ -560,21 +635,19 @@ with tab1:
         sample_raw = pd.DataFrame([{c: raw[c] for c in RAW_COLS}])
 
         # Application du pipeline complet: cleaner -> preprocessor -> modele
-        sample_clean = cleaner.transform(sample_raw)
-        sample_proc = preprocessor.transform(sample_clean)
-        proba = model.predict_proba(sample_proc)[:, 1][0]
+        proba = score(sample_raw)[0]
 
         st.markdown("<br>", unsafe_allow_html=True)
 
         # Affichage du resultat avec code couleur
-        if proba < 0.3:
+        if proba < thresholds.moderate:
             risk_class = "result-card-low"
             risk_label = "Risque faible"
             risk_icon = "fas fa-check-circle"
             recommendation = (
                 "Ce client presente un profil stable. Maintenez la qualite de service actuelle."
             )
-        elif proba < 0.6:
+        elif proba < thresholds.decision:
             risk_class = "result-card-medium"
             risk_label = "Risque modere"
             risk_icon = "fas fa-exclamation-triangle"
@@ -615,6 +688,88 @@ with tab1:
             unsafe_allow_html=True,
         )
 
+        # Explication SHAP: contribution de chaque champ au score (log-odds)
+        if explainer is not None:
+            contributions = explainer.explain(sample_raw).iloc[0]
+            top = contributions.reindex(contributions.abs().sort_values(ascending=False).index)
+            st.markdown("<br>**Pourquoi ce score ?**", unsafe_allow_html=True)
+            st.caption(
+                "Contribution de chaque caracteristique au risque (positive = augmente le risque)"
+            )
+            st.bar_chart(top.head(8).rename("contribution"), horizontal=True)
+
+    # Mode "et si ?": surface de risque du client, calculee une fois puis simple lecture
+    if st.toggle("Mode et si ? (surface de risque du client)", key="whatif_mode"):
+        surface = whatif_surface({**DEFAULTS, "PaperlessBilling": paperless}, version)
+        col_w1, col_w2 = st.columns(2)
+        w_tenure = col_w1.slider(
+            "Anciennete simulee (mois)", 0, int(WHATIF_TENURE[-1]), int(tenure), key="w_tenure"
+        )
+        w_monthly = col_w2.slider(
+            "Charges mensuelles simulees (EUR)",
+            0,
+            int(WHATIF_MONTHLY[-1]),
+            int(round(monthly)),
+            key="w_monthly",
+        )
+        i_t = int(np.searchsorted(WHATIF_TENURE, w_tenure))
+        i_m = int(np.searchsorted(WHATIF_MONTHLY, w_monthly))
+        for col_c, name, value in zip(
+            st.columns(len(CONTRACTS)), CONTRACTS, surface[:, i_t, i_m], strict=True
+        ):
+            col_c.metric(contract_labels[name], f"{value:.1%}")
+
+        # Carte de chaleur pour le contrat selectionne (charges sous-echantillonnees)
+        k = CONTRACTS.index(contract)
+        tt, mm = np.meshgrid(WHATIF_TENURE, WHATIF_MONTHLY[::5], indexing="ij")
+        heat = pd.DataFrame(
+            {
+                "anciennete": tt.ravel(),
+                "charges": mm.ravel(),
+                "proba": surface[k][:, ::5].ravel(),
+            }
+        )
+        st.altair_chart(
+            alt.Chart(heat)
+            .mark_rect()
+            .encode(
+                x=alt.X(
+                    "anciennete:O",
+                    title="Anciennete (mois)",
+                    axis=alt.Axis(values=list(range(0, 73, 12))),
+                ),
+                y=alt.Y(
+                    "charges:O",
+                    title="Charges mensuelles (EUR)",
+                    sort="descending",
+                    axis=alt.Axis(values=list(range(0, 201, 25))),
+                ),
+                color=alt.Color(
+                    "proba:Q", title="Churn", scale=alt.Scale(scheme="redyellowgreen", reverse=True)
+                ),
+                tooltip=["anciennete", "charges", alt.Tooltip("proba:Q", format=".1%")],
+            ),
+            use_container_width=True,
+        )
+
+    # Courbes "et si ?": lecture des tables precalculees, aucun scoring a chaque interaction
+    if whatif is not None:
+        st.markdown("<br>**Et si ? Effet moyen d'une variable**", unsafe_allow_html=True)
+        feature = st.selectbox(
+            "Variable", list(whatif.grids), format_func=lambda f: WHATIF_LABELS.get(f, f)
+        )
+        grid, curve = whatif.curve(feature, contract)
+        current = {"tenure": tenure, "MonthlyCharges": monthly, "TotalCharges": total}[feature]
+        st.line_chart(
+            pd.DataFrame({"Probabilite de churn": curve}, index=pd.Index(grid, name=feature))
+        )
+        st.caption(
+            f"Moyenne sur un echantillon de clients au contrat {contract_labels[contract]} ; "
+            f"valeur saisie {current} : {float(whatif.lookup(feature, current, contract)):.1%}"
+        )
+        with st.expander("Importance globale des variables"):
+            st.bar_chart(whatif.importance_series().head(10).rename("importance"), horizontal=True)
+
 # ===================== ONGLET 2 : Scoring par lot =====================
 with tab2:
     st.markdown(
@@ -661,48 +816,55 @@ with tab2:
 
     if file is not None:
         try:
-            df = pd.read_csv(file)
-
+            # Apercu sans lire tout le fichier
+            file.seek(0)
             st.markdown("**Apercu des donnees chargees :**")
-            st.dataframe(df.head(), use_container_width=True)
-
-            if st.button("Lancer le scoring", type="primary"):
-                with st.spinner("Calcul en cours..."):
-                    # Application du pipeline complet
-                    df_clean = cleaner.transform(df)
-                    df_proc = preprocessor.transform(df_clean)
-                    proba = model.predict_proba(df_proc)[:, 1]
-
-                    df_out = df.copy()
-                    df_out["churn_proba"] = proba
-                    df_out["risque"] = df_out["churn_proba"].apply(
-                        lambda x: "Eleve" if x >= 0.6 else ("Modere" if x >= 0.3 else "Faible")
-                    )
-
+            st.dataframe(pd.read_csv(file, nrows=5), use_container_width=True)
+
+            # Resultats conserves par hash du fichier: un rerun ne rescore pas
+            digest = hashlib.sha256(file.getbuffer()).hexdigest()
+            cached = st.session_state.get("batch_result")
+            if cached is None or cached["digest"] != digest:
+                if st.button("Lancer le scoring", type="primary"):
+                    st.session_state["batch_result"] = {
+                        "digest": digest,
+                        "df": score_upload(file),
+                        "exports": {},
+                    }
+            result = st.session_state.get("batch_result")
+
+            if result is not None and result["digest"] == digest:
+                df_out = result["df"]
                 st.success(f"Scoring termine pour {len(df_out)} clients")
 
                 # Statistiques
+                counts = df_out["risque"].value_counts()
                 col_stat1, col_stat2, col_stat3 = st.columns(3)
                 with col_stat1:
-                    st.metric("Clients a risque eleve", f"{(df_out['risque'] == 'Eleve').sum()}")
+                    st.metric("Clients a risque eleve", f"{counts.get('Eleve', 0)}")
                 with col_stat2:
-                    st.metric("Clients a risque modere", f"{(df_out['risque'] == 'Modere').sum()}")
+                    st.metric("Clients a risque modere", f"{counts.get('Modere', 0)}")
                 with col_stat3:
-                    st.metric("Clients a risque faible", f"{(df_out['risque'] == 'Faible').sum()}")
+                    st.metric("Clients a risque faible", f"{counts.get('Faible', 0)}")
 
                 st.markdown("**Resultats :**")
                 st.dataframe(
-                    df_out[["churn_proba", "risque"]].join(
-                        df[["tenure", "MonthlyCharges", "Contract"]]
+                    df_out[["churn_proba", "risque", "tenure", "MonthlyCharges", "Contract"]].head(
+                        BATCH_PREVIEW_ROWS
                     ),
                     use_container_width=True,
                 )
 
+                # Export serialise a la demande, une seule fois par format
+                fmt = st.radio("Format d'export", list(EXPORT_FORMATS), horizontal=True)
+                if fmt not in result["exports"]:
+                    result["exports"][fmt] = export_results(df_out, fmt)
+                file_name, mime = EXPORT_FORMATS[fmt]
                 st.download_button(
-                    "Telecharger les resultats (CSV)",
-                    df_out.to_csv(index=False).encode("utf-8"),
-                    "predictions_churn.csv",
-                    "text/csv",
+                    f"Telecharger les resultats ({fmt})",
+                    result["exports"][fmt],
+                    file_name,
+                    mime,
                     use_container_width=True,
                 )
         except Exception as e:
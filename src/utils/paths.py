@@ -4,6 +4,7 @@
 Tous les commentaires sont en français.
 """
 from __future__ import annotations
+import os
 from pathlib import Path
 
 
@@ -11,8 +12,9 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
-INTERIM_DIR = DATA_DIR / "interim"
-PROCESSED_DIR = DATA_DIR / "processed"
+# Surchargeables (ex. dossiers temporaires des benchmarks)
+INTERIM_DIR = Path(os.getenv("INTERIM_DIR", str(DATA_DIR / "interim")))
+PROCESSED_DIR = Path(os.getenv("PROCESSED_DIR", str(DATA_DIR / "processed")))
 ARTIFACTS_DIR = PROJECT_ROOT / "artifacts"
 MODELS_DIR = PROJECT_ROOT / "models"
 CONFIGS_DIR = PROJECT_ROOT / "configs"
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""Profilage optionnel des executions (entrainement, features, scoring batch).
+
+- Desactive par defaut: sans PROFILING=true, toutes les methodes sont des no-op
+- Par etape (et par essai Optuna): temps mural, temps CPU du processus et pic
+  memoire de l'etape
+  * PROFILING_MEMORY=rss (defaut): RSS echantillonne par un thread (Linux:
+    /proc/self/statm), faible surcout
+  * PROFILING_MEMORY=tracemalloc: allocations Python exactes, plus lent
+- PROFILING_DUMP=cprofile | pyinstrument: profil complet de l'execution
+  (fichier .prof + resume texte, ou page HTML pyinstrument)
+- Resume JSON et dumps ecrits dans PROFILING_DIR (defaut artifacts/profiling),
+  puis logges dans MLflow (metriques profile_* et artefacts profiling/): dans
+  le run actif, sinon dans un run de l'experience telco-churn-profiling
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from src.utils.logging import logger
+from src.utils.paths import ARTIFACTS_DIR
+
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING", "false").lower() == "true"
+
+
+def _rss_bytes() -> int | None:
+    """RSS courant (Linux), sinon pic RSS du processus, sinon None."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+@dataclass
+class StageStats:
+    """Mesures d'une etape terminee."""
+
+    name: str
+    wall_s: float
+    cpu_s: float
+    peak_mb: float | None
+
+
+class _OpenStage:
+    def __init__(self, name: str, memory: int | None) -> None:
+        self.name = name
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.peak = memory
+
+
+class Profiler:
+    """Mesures par etape d'une execution; inerte si desactive."""
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = False,
+        memory: str = "rss",
+        dump: str = "",
+        out_dir: Path | None = None,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.memory = memory if enabled else "none"
+        self.dump = dump if enabled else ""
+        self.out_dir = out_dir or ARTIFACTS_DIR / "profiling"
+        self.stages: list[StageStats] = []
+        self._stack: list[_OpenStage] = []
+        self._lap: _OpenStage | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._dumper: Any = None
+        self._started = time.perf_counter()
+        if enabled:
+            self._start()
+
+    @classmethod
+    def from_env(cls, name: str, enabled: bool | None = None) -> Profiler:
+        """Profiler configure par PROFILING, PROFILING_MEMORY, PROFILING_DUMP, PROFILING_DIR."""
+        out_dir = os.getenv("PROFILING_DIR")
+        return cls(
+            name,
+            enabled=profiling_enabled() if enabled is None else enabled,
+            memory=os.getenv("PROFILING_MEMORY", "rss").lower(),
+            dump=os.getenv("PROFILING_DUMP", "").lower(),
+            out_dir=Path(out_dir) if out_dir else None,
+        )
+
+    # --- Demarrage des mesures ---------------------------------------------
+
+    def _start(self) -> None:
+        if self.memory == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif self.memory == "rss":
+            self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+            self._sampler.start()
+        if self.dump == "cprofile":
+            import cProfile
+
+            self._dumper = cProfile.Profile()
+            self._dumper.enable()
+        elif self.dump == "pyinstrument":
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+
+                self._dumper = PyinstrumentProfiler()
+                self._dumper.start()
+            except ImportError:
+                logger.warning("pyinstrument non installe: PROFILING_DUMP ignore")
+                self.dump = ""
+
+    def _sample_rss(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self._observe(_rss_bytes())
+
+    def _observe(self, memory: int | None) -> None:
+        """Met a jour le pic de toutes les etapes ouvertes."""
+        if memory is None:
+            return
+        with self._lock:
+            for stage in self._stack:
+                stage.peak = memory if stage.peak is None else max(stage.peak, memory)
+
+    def _memory_now(self) -> int | None:
+        if self.memory == "rss":
+            return _rss_bytes()
+        if self.memory == "tracemalloc":
+            return tracemalloc.get_traced_memory()[1]
+        return None
+
+    # --- Etapes --------------------------------------------------------------
+
+    def _push(self, name: str) -> _OpenStage:
+        # Le pic tracemalloc est global: on le reporte sur les etapes ouvertes avant remise a zero
+        self._observe(self._memory_now())
+        if self.memory == "tracemalloc":
+            tracemalloc.reset_peak()
+        full = "/".join([*(s.name for s in self._stack), name])
+        stage = _OpenStage(full, self._memory_now())
+        with self._lock:
+            self._stack.append(stage)
+        return stage
+
+    def _pop(self, stage: _OpenStage) -> StageStats:
+        self._observe(self._memory_now())
+        with self._lock:
+            self._stack.remove(stage)
+        stats = StageStats(
+            name=stage.name,
+            wall_s=time.perf_counter() - stage.wall,
+            cpu_s=time.process_time() - stage.cpu,
+            peak_mb=None if stage.peak is None else stage.peak / 2**20,
+        )
+        self.stages.append(stats)
+        return stats
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mesure le bloc (imbrique sous l'etape ouverte, ex. `optuna/trial_3`)."""
+        if not self.enabled:
+            yield
+            return
+        stage = self._push(name)
+        try:
+            yield
+        finally:
+            self._pop(stage)
+
+    def lap(self, name: str) -> None:
+        """Termine l'etape sequentielle en cours et demarre `name`."""
+        if not self.enabled:
+            return
+        if self._lap is not None:
+            self._pop(self._lap)
+        self._lap = self._push(name)
+
+    def wrap_trial(self, objective: Callable[[Any], float]) -> Callable[[Any], float]:
+        """Objectif Optuna mesure essai par essai (`trial_<numero>`)."""
+        if not self.enabled:
+            return objective
+
+        def wrapped(trial: Any) -> float:
+            with self.stage(f"trial_{trial.number}"):
+                return objective(trial)
+
+        return wrapped
+
+    # --- Resultats -----------------------------------------------------------
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "memory": self.memory,
+            "total_wall_s": time.perf_counter() - self._started,
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def metrics(self) -> dict[str, float]:
+        """Metriques MLflow plates (les essais Optuna sont agreges)."""
+        out: dict[str, float] = {}
+        trials = [s for s in self.stages if s.name.rsplit("/", 1)[-1].startswith("trial_")]
+        for s in self.stages:
+            if s in trials:
+                continue
+            key = s.name.replace("/", "_")
+            out[f"profile_{key}_wall_s"] = s.wall_s
+            out[f"profile_{key}_cpu_s"] = s.cpu_s
+            if s.peak_mb is not None:
+                out[f"profile_{key}_peak_mb"] = s.peak_mb
+        if trials:
+            walls = [s.wall_s for s in trials]
+            out["profile_trial_wall_s_mean"] = sum(walls) / len(walls)
+            out["profile_trial_wall_s_max"] = max(walls)
+            peaks = [s.peak_mb for s in trials if s.peak_mb is not None]
+            if peaks:
+                out["profile_trial_peak_mb_max"] = max(peaks)
+        return out
+
+    def _write_dump(self) -> list[Path]:
+        if self._dumper is None:
+            return []
+        if self.dump == "cprofile":
+            import io
+            import pstats
+
+            self._dumper.disable()
+            prof_path = self.out_dir / f"{self.name}.prof"
+            self._dumper.dump_stats(prof_path)
+            text = io.StringIO()
+            pstats.Stats(self._dumper, stream=text).sort_stats("cumulative").print_stats(40)
+            txt_path = self.out_dir / f"{self.name}_cprofile.txt"
+            txt_path.write_text(text.getvalue(), encoding="utf-8")
+            return [prof_path, txt_path]
+        self._dumper.stop()
+        html_path = self.out_dir / f"{self.name}_pyinstrument.html"
+        html_path.write_text(self._dumper.output_html(), encoding="utf-8")
+        return [html_path]
+
+    def finish(self, log_mlflow: bool = True) -> dict[str, Any] | None:
+        """Ferme les etapes, ecrit le resume et les dumps, logge dans MLflow."""
+        if not self.enabled:
+            return None
+        if self._lap is not None:
+            self._pop(self._lap)
+            self._lap = None
+        self._stop.set()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        summary_path = self.out_dir / f"{self.name}_profile.json"
+        summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        files = [summary_path, *self._write_dump()]
+        if self.memory == "tracemalloc":
+            tracemalloc.stop()
+        for s in self.stages:
+            peak = f"{s.peak_mb:9.1f} Mo" if s.peak_mb is not None else "        -"
+            logger.info(f"[profil] {s.name:40s} {s.wall_s:9.3f} s  cpu {s.cpu_s:9.3f} s  {peak}")
+        if log_mlflow:
+            self._log_mlflow(files)
+        return summary
+
+    def _log_mlflow(self, files: list[Path]) -> None:
+        # Le profilage ne doit jamais faire echouer l'execution profilee
+        try:
+            import mlflow
+
+            if mlflow.active_run() is not None:
+                self._log_to_active_run(mlflow, files)
+                return
+            from src.utils.mlflow_utils import setup_mlflow
+
+            setup_mlflow(os.getenv("MLFLOW_PROFILING_EXPERIMENT", "telco-churn-profiling"))
+            with mlflow.start_run(run_name=f"profile-{self.name}"):
+                self._log_to_active_run(mlflow, files)
+        except Exception as e:
+            logger.warning(f"Profil non logge dans MLflow: {e}")
+
+    def _log_to_active_run(self, mlflow: Any, files: list[Path]) -> None:
+        mlflow.log_metrics(self.metrics())
+        for path in files:
+            mlflow.log_artifact(str(path), artifact_path="profiling")
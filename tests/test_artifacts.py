@@ -0,0 +1,73 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.features.build_features import TelcoCleaner
+from src.serving.artifacts import load_artifacts
+from src.utils.paths import DATA_DIR
+
+
+def test_local_artifacts_score_raw_rows(monkeypatch):
+    # cleaner.joblib a ete serialise depuis un script (__main__.TelcoCleaner)
+    monkeypatch.setattr(sys.modules["__main__"], "TelcoCleaner", TelcoCleaner, raising=False)
+    monkeypatch.setenv("USE_LOCAL_ARTIFACTS", "true")
+    monkeypatch.setenv("SCORING_BACKEND", "sklearn")
+
+    artifacts = load_artifacts(explain=False)
+    df = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    proba = artifacts.predict_proba(df)
+
+    expected = artifacts.model.predict_proba(
+        artifacts.preprocessor.transform(artifacts.cleaner.transform(df))
+    )[:, 1]
+    assert artifacts.source == "local"
+    np.testing.assert_allclose(proba, expected)
+    assert artifacts.operating_points.moderate <= artifacts.operating_points.decision
+
+
+def test_serve_compressed_model_switch(monkeypatch, tmp_path):
+    import joblib
+
+    from src.models.compress import CompressionConfig, compress_model
+    from src.serving import artifacts as artifacts_module
+
+    monkeypatch.setattr(sys.modules["__main__"], "TelcoCleaner", TelcoCleaner, raising=False)
+    monkeypatch.setenv("USE_LOCAL_ARTIFACTS", "true")
+    monkeypatch.setenv("SCORING_BACKEND", "sklearn")
+    full = load_artifacts(explain=False)
+    path = tmp_path / "model_compressed.joblib"
+    joblib.dump(compress_model(full.model, CompressionConfig()), path)
+    monkeypatch.setattr(artifacts_module, "COMPRESSED_MODEL_PATH", path)
+
+    monkeypatch.setenv("SERVE_COMPRESSED_MODEL", "true")
+    compressed = load_artifacts(explain=False)
+    df = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    assert type(compressed.model) is not type(full.model)
+    assert compressed.version != full.version
+    np.testing.assert_allclose(compressed.predict_proba(df), full.predict_proba(df), atol=1e-3)
+
+
+def test_numpy_backend_serves_exported_tree_ensemble(monkeypatch, tmp_path):
+    import lightgbm as lgb
+
+    from src.models.tree_ensemble import TreeEnsemble
+    from src.serving import artifacts as artifacts_module
+
+    monkeypatch.setattr(sys.modules["__main__"], "TelcoCleaner", TelcoCleaner, raising=False)
+    monkeypatch.setenv("USE_LOCAL_ARTIFACTS", "true")
+    monkeypatch.setenv("SCORING_BACKEND", "sklearn")
+    full = load_artifacts(explain=False)
+    df = pd.concat([pd.read_csv(DATA_DIR / "synthetic_customers.csv")] * 20, ignore_index=True)
+    x = full.preprocessor.transform(full.cleaner.transform(df))
+    y = (np.arange(len(df)) % 3 == 0) | (df["tenure"].to_numpy() < 12)
+    model = lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(x, y)
+    path = TreeEnsemble.from_model(model).save(tmp_path / "tree_ensemble.npz")
+    monkeypatch.setattr(artifacts_module, "TREE_ENSEMBLE_PATH", path)
+
+    monkeypatch.setenv("SCORING_BACKEND", "numpy")
+    served = load_artifacts(explain=False)
+    assert isinstance(served.model, TreeEnsemble)
+    np.testing.assert_allclose(
+        served.predict_proba(df), full.calibrate(model.predict_proba(x)[:, 1]), atol=1e-9
+    )
@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+
+from src.models.calibration import (
+    Calibrator,
+    expected_calibration_error,
+    fit_calibrator,
+    load_calibrator,
+    save_calibration,
+)
+from src.serving.routing import ModelRouter
+
+
+def _skewed(n: int = 5000, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Scores gonfles (comme avec class_weight='balanced') d'une vraie proba p."""
+    rng = np.random.default_rng(seed)
+    p = rng.beta(1, 3, size=n)
+    y = (rng.random(n) < p).astype(int)
+    return y, np.sqrt(p)
+
+
+def test_calibration_reduces_ece_and_matches_sklearn():
+    y, raw = _skewed()
+    iso = fit_calibrator(y, raw, "isotonic")
+    reference = IsotonicRegression(out_of_bounds="clip").fit(raw, y).predict(raw)
+    assert np.allclose(iso.transform(raw), reference)
+
+    for method in ("isotonic", "platt"):
+        calibrator = Calibrator.from_dict(fit_calibrator(y, raw, method).to_dict())
+        calibrated = calibrator.transform(raw)
+        assert np.all(np.diff(calibrator.x) > 0)
+        assert np.all(np.diff(calibrated[np.argsort(raw)]) >= -1e-12)
+        assert expected_calibration_error(y, calibrated) < expected_calibration_error(y, raw) / 3
+
+
+def test_router_applies_variant_calibration():
+    class Model:
+        def predict_proba(self, x: np.ndarray) -> np.ndarray:
+            return np.c_[1 - x[:, 0], x[:, 0]]
+
+    halve = Calibrator("platt", np.array([0.0, 1.0]), np.array([0.0, 0.5]))
+    router = ModelRouter(
+        {"a": Model(), "b": Model()}, {"a": 1.0, "b": 1.0}, [], calibrators={"a": halve}
+    )
+    x = np.array([[0.2], [0.8]])
+    assert np.allclose(router.score("a", x), [0.1, 0.4])
+    assert np.allclose(router.score("b", x), [0.2, 0.8])
+
+
+def test_disabled_calibration_still_writes_its_file(tmp_path):
+    model = tmp_path / "model.joblib"
+    path = save_calibration(None, model.with_name("calibration.json"))
+    assert path.exists()
+    assert load_calibrator(str(model)) is None
@@ -0,0 +1,50 @@
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from src.data.synthetic import generate_customers
+from src.features.build_features import TelcoCleaner
+from src.features.categorical import (
+    NativeCategoricalEncoder,
+    native_model_params,
+    uses_native_categoricals,
+)
+from src.models.explain import ShapExplainer
+
+
+def _clean(n: int = 600, seed: int = 0) -> tuple[TelcoCleaner, pd.DataFrame, np.ndarray]:
+    raw = generate_customers(n, seed=seed)
+    y = (raw.pop("Churn") == "Yes").to_numpy(dtype=int)
+    cleaner = TelcoCleaner().fit(raw)
+    return cleaner, cleaner.transform(raw).drop(columns=["customerID"]), y
+
+
+def test_encoder_outputs_compact_codes_and_unknowns():
+    _, clean, _ = _clean()
+    encoder = NativeCategoricalEncoder().fit(clean)
+    frame = encoder.transform(clean)
+    cats = encoder.categorical_features_
+    assert list(frame.columns) == encoder.feature_names_
+    assert [frame.columns[i] for i in encoder.categorical_indices_] == cats
+    assert (frame[cats].dtypes == np.int8).all()
+    assert (frame[encoder.numeric_features_].dtypes == np.float32).all()
+
+    unseen = clean.head(2).copy()
+    unseen["PaymentMethod"] = ["Bitcoin", None]
+    assert encoder.transform(unseen)["PaymentMethod"].tolist() == [-1, -1]
+
+
+def test_native_lightgbm_is_detected_and_explained():
+    cleaner, clean, y = _clean()
+    encoder = NativeCategoricalEncoder().fit(clean)
+    _, fit_params = native_model_params("lightgbm", encoder)
+    model = lgb.LGBMClassifier(n_estimators=20, min_child_samples=5, verbose=-1)
+    model.fit(encoder.transform(clean), y, **fit_params)
+    assert uses_native_categoricals(model)
+    assert not uses_native_categoricals(LogisticRegression())
+
+    raw = generate_customers(20, seed=1).drop(columns=["Churn"])
+    explainer = ShapExplainer(model, encoder, cleaner)
+    proba = model.predict_proba(encoder.transform(cleaner.transform(raw)))[:, 1]
+    np.testing.assert_allclose(explainer.churn_proba(explainer.explain(raw)), proba, atol=1e-8)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models.compress import CompressionConfig, compress_and_validate, compress_model
+
+
+def _data() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 8))
+    y = (X[:, 0] - 0.5 * X[:, 1] + rng.normal(size=3000) > 0).astype(int)
+    return X, y
+
+
+def test_logreg_float16_within_tolerance() -> None:
+    X, y = _data()
+    clf = LogisticRegression().fit(X[:2000], y[:2000])
+    compressed, report = compress_and_validate(
+        clf, X[2000:], y[2000:], CompressionConfig(dtype="float16", auc_tolerance=0.005)
+    )
+    assert report.promoted
+    assert compressed.coef.dtype == np.float16
+    assert np.abs(compressed.predict_proba(X)[:, 1] - clf.predict_proba(X)[:, 1]).max() < 1e-2
+
+
+def test_guardrail_rejects_when_tolerance_exceeded() -> None:
+    X, y = _data()
+    clf = LogisticRegression().fit(X[:2000], y[:2000])
+    _, report = compress_and_validate(
+        clf, X[2000:], y[2000:], CompressionConfig(dtype="float32", auc_tolerance=-1.0)
+    )
+    assert not report.promoted
+
+
+def test_truncated_ensemble_matches_num_iteration() -> None:
+    lgb = pytest.importorskip("lightgbm")
+    X, y = _data()
+    clf = lgb.LGBMClassifier(n_estimators=60, num_leaves=8, verbose=-1).fit(X, y)
+    compressed = compress_model(clf, CompressionConfig(dtype="float32", max_trees=20))
+    assert compressed.n_trees == 20
+    expected = clf.predict_proba(X, num_iteration=20)[:, 1]
+    assert np.abs(compressed.predict_proba(X)[:, 1] - expected).max() < 1e-4
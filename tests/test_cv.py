@@ -0,0 +1,44 @@
+import numpy as np
+import optuna
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models.cv import CVConfig, cross_validate_trial, stratified_folds
+
+
+def _data(n: int = 400, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, 4))
+    y = (x[:, 0] + rng.normal(scale=0.5, size=n) > 0.8).astype(int)
+    return x, y
+
+
+def test_folds_are_stratified_and_cached():
+    _, y = _data()
+    folds = stratified_folds(y, 5)
+    assert folds is stratified_folds(y.copy(), 5)
+    val = np.concatenate([v for _, v in folds])
+    assert np.array_equal(np.sort(val), np.arange(len(y)))
+    rates = [y[v].mean() for _, v in folds]
+    assert max(rates) - min(rates) < 0.02
+
+
+def test_cross_validate_trial_reports_mean_and_std():
+    x, y = _data()
+    study = optuna.create_study(direction="maximize")
+    trial = study.ask()
+    scores = cross_validate_trial(LogisticRegression(), x, y, trial, CVConfig(n_splits=4, n_jobs=2))
+    assert 0.8 < scores["cv_auc_mean"] <= 1.0
+    assert scores["cv_auc_std"] >= 0.0
+    assert set(scores) == {"cv_auc_mean", "cv_auc_std", "cv_f1", "cv_ap"}
+
+
+def test_bad_trial_pruned_after_first_fold():
+    x, y = _data()
+    study = optuna.create_study(
+        direction="maximize", pruner=optuna.pruners.ThresholdPruner(lower=0.99)
+    )
+    trial = study.ask()
+    with pytest.raises(optuna.TrialPruned):
+        cross_validate_trial(LogisticRegression(), x, y, trial, CVConfig(n_splits=4))
+    assert list(study.trials[0].intermediate_values) == [0]
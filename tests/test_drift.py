@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.monitoring.drift import DriftMonitor, ReferenceProfile, build_reference_profile
+
+
+def _frame(n: int, seed: int, tenure_shift: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tenure = rng.integers(0, 72, n) + tenure_shift
+    monthly = rng.uniform(20, 120, n).round(2)
+    return pd.DataFrame(
+        {
+            "SeniorCitizen": rng.integers(0, 2, n),
+            "Contract": rng.choice(["Month-to-month", "One year", "Two year"], n),
+            "tenure": tenure,
+            "MonthlyCharges": monthly,
+            "TotalCharges": np.where(tenure == 0, " ", (tenure * monthly).round(2).astype(str)),
+            "Churn": rng.choice(["Yes", "No"], n),
+        }
+    )
+
+
+def test_profile_roundtrip_and_stable_traffic(tmp_path):
+    profile = build_reference_profile(_frame(5000, 0), n_bins=10)
+    assert "Churn" not in profile.categorical
+    assert profile.numeric["TotalCharges"].missing > 0
+    profile = ReferenceProfile.load(profile.save(tmp_path / "profile.json"))
+
+    monitor = DriftMonitor(profile)
+    live = _frame(3000, 1)
+    for start in range(0, len(live), 100):
+        monitor.update(live.iloc[start : start + 100])
+    report = monitor.report()
+    assert report["n_rows"] == 3000
+    assert report["status"] == "stable"
+    assert report["features"]["tenure"]["psi"] < 0.1
+
+
+def test_shifted_traffic_is_flagged_and_reset():
+    monitor = DriftMonitor(build_reference_profile(_frame(5000, 0), n_bins=10))
+    shifted = _frame(2000, 2, tenure_shift=40)
+    shifted["Contract"] = "Three year"
+    monitor.update(shifted)
+
+    report = monitor.report(reset=True)
+    assert report["features"]["tenure"]["status"] == "drift"
+    assert report["features"]["tenure"]["ks"] > 0.4
+    assert report["features"]["Contract"]["unseen_rate"] == 1.0
+    assert report["features"]["MonthlyCharges"]["status"] == "stable"
+    assert monitor.report()["status"] == "no_data"
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from src.monitoring.drift import build_reference_profile
+from src.monitoring.report import profile_file, report_metrics
+
+DATA = "data/synthetic_customers.csv"
+
+
+def test_report_flags_schema_blanks_and_unknown_categories(tmp_path):
+    raw = pd.read_csv(DATA)
+    reference = build_reference_profile(raw)
+
+    incoming = pd.concat([raw] * 30, ignore_index=True).astype(str)
+    incoming.loc[::10, "TotalCharges"] = " "
+    incoming.loc[::4, "PaymentMethod"] = "Crypto"
+    incoming.loc[0, "tenure"] = "abc"
+    path = tmp_path / "incoming.csv"
+    incoming.drop(columns=["gender"]).to_csv(path, index=False)
+
+    report = profile_file(path, reference, chunk_size=64)
+    assert report["rows"] == len(incoming)
+    assert report["status"] == "schema_error"
+    assert report["missing_columns"] == ["gender"]
+    assert report["total_charges_blank_rate"] == 0.1
+    assert report["fields"]["tenure"]["invalid_rate"] == 1 / len(incoming)
+    payment = report["fields"]["PaymentMethod"]
+    assert payment["unseen_rate"] == 0.25
+    assert payment["top_unseen"] == {"Crypto": 75}
+    assert report_metrics(report)["unseen_rate_PaymentMethod"] == 0.25
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.models.evaluate import (
+    bootstrap_metrics,
+    compute_metrics,
+    confidence_intervals,
+    slice_metrics,
+)
+
+
+def _scores(n=800, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    proba = np.round(np.clip(0.3 * y + 0.7 * rng.random(n), 0, 1), 2)  # ex aequo
+    return y, proba
+
+
+def test_slice_metrics_match_sklearn():
+    y, proba = _scores()
+    segments = pd.DataFrame(
+        {"Contract": np.where(np.arange(len(y)) % 3, "Month-to-month", "Two year")}
+    )
+    for row in slice_metrics(segments, y, proba):
+        mask = segments["Contract"].to_numpy() == row["value"]
+        ref = compute_metrics(y[mask], proba[mask])
+        for k in ("auc", "ap", "f1"):
+            assert abs(row[k] - ref[k]) < 1e-9
+
+
+def test_bootstrap_intervals_cover_point_estimate():
+    y, proba = _scores()
+    samples = bootstrap_metrics(y, proba, n_boot=200)
+    assert samples["auc"].shape == (200,)
+    point = compute_metrics(y, proba)
+    cis = confidence_intervals(samples)
+    for k in ("auc", "ap", "f1"):
+        assert cis[f"{k}_ci_low"] <= point[k] <= cis[f"{k}_ci_high"]
@@ -0,0 +1,59 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.features.build_features import TelcoCleaner
+from src.models.explain import ShapExplainer, derived_sources, field_projection
+from src.utils.paths import DATA_DIR, PROCESSED_DIR
+
+
+def _artifacts():
+    df = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    return df, TelcoCleaner().fit(df), joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+
+
+def test_linear_contributions_are_additive_per_raw_field():
+    df, cleaner, preprocessor = _artifacts()
+    model = joblib.load(PROCESSED_DIR / "model.joblib")
+    explainer = ShapExplainer(model, preprocessor, cleaner, cache_size=4)
+
+    contributions = explainer.explain(df)
+    assert set(contributions.columns) == set(df.columns)
+    proba = model.predict_proba(preprocessor.transform(cleaner.transform(df)))[:, 1]
+    np.testing.assert_allclose(explainer.churn_proba(contributions), proba, atol=1e-10)
+
+    # Deuxieme appel servi (en partie) par le cache borne, resultat identique
+    np.testing.assert_allclose(explainer.explain(df).to_numpy(), contributions.to_numpy())
+    assert len(explainer._cache) == 4
+
+
+def test_tree_contributions_are_additive():
+    import lightgbm as lgb
+
+    df, cleaner, preprocessor = _artifacts()
+    rng = np.random.default_rng(0)
+    big = pd.concat([df] * 30, ignore_index=True)
+    big["tenure"] = rng.integers(0, 72, len(big))
+    x = preprocessor.transform(cleaner.transform(big))
+    model = lgb.LGBMClassifier(n_estimators=30, verbose=-1).fit(x, (big["tenure"] < 20).astype(int))
+
+    explainer = ShapExplainer(model, preprocessor, cleaner)
+    contributions = explainer.explain(big)
+    np.testing.assert_allclose(
+        explainer.churn_proba(contributions), model.predict_proba(x)[:, 1], atol=1e-8
+    )
+
+
+def test_derived_fields_follow_the_fitted_cleaner_plan():
+    df, cleaner, preprocessor = _artifacts()
+    sources = derived_sources(cleaner)
+    assert sources["num_services"] == tuple(cleaner.service_cols_)
+    assert sources["total_spend_proxy"] == ("tenure", "MonthlyCharges")
+
+    # Un service de moins dans le plan: sa colonne ne recoit plus sa part de num_services
+    before, fields = field_projection(preprocessor, cleaner)
+    cleaner.service_cols_ = [c for c in cleaner.service_cols_ if c != "TechSupport"]
+    after, _ = field_projection(preprocessor, cleaner)
+    np.testing.assert_allclose(after.sum(axis=1), 1.0)
+    i = fields.index("TechSupport")
+    assert np.isclose(before[:, i].sum() - after[:, i].sum(), 1 / 7)
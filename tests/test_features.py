@@ -20,3 +20,32 @@ def test_cleaner_creates_features() -> None:
     assert "num_services" in out.columns
     assert "total_spend_proxy" in out.columns
     assert out["TotalCharges"].dtype.kind in ("f", "i")
+
+
+def test_cleaner_is_batch_independent() -> None:
+    from src.data.synthetic import generate_customers
+
+    raw = generate_customers(200, seed=3)
+    raw["TotalCharges"] = raw["TotalCharges"].astype(str)
+    cl = TelcoCleaner().fit(raw)
+    full = cl.transform(raw)
+    # Une ligne seule donne le meme resultat que dans le batch complet
+    for i in (0, 57, 199):
+        pd.testing.assert_frame_equal(cl.transform(raw.iloc[[i]]), full.iloc[[i]])
+    # Lot homogene: InternetService reste categoriel, TotalCharges vide -> NaN
+    batch = raw.head(3).assign(InternetService="No", TotalCharges=" ")
+    out = cl.transform(batch)
+    assert (out["InternetService"] == "No").all()
+    assert out["TotalCharges"].isna().all()
+
+
+def test_cleaner_accepts_column_dict() -> None:
+    from src.data.synthetic import generate_customers
+
+    raw = generate_customers(20, seed=4)
+    cl = TelcoCleaner().fit(raw)
+    frame = cl.transform(raw)
+    columns = cl.transform({c: raw[c].tolist() for c in raw.columns})
+    assert list(columns) == list(frame.columns)
+    for c in frame.columns:
+        assert list(pd.Series(columns[c]).astype(str)) == list(frame[c].astype(str))
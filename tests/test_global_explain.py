@@ -0,0 +1,37 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.features.build_features import TelcoCleaner
+from src.models.calibration import fit_calibrator
+from src.models.global_explain import GlobalExplanations, compute_global_explanations
+from src.utils.paths import DATA_DIR, PROCESSED_DIR
+
+
+def test_partial_dependence_tables_match_direct_scoring(tmp_path):
+    df = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    cleaner = TelcoCleaner().fit(df)
+    preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+    model = joblib.load(PROCESSED_DIR / "model.joblib")
+
+    tables = compute_global_explanations(model, df, cleaner, preprocessor, n_grid=5)
+    tables = GlobalExplanations.load(tables.save(tmp_path / "global.npz"))
+
+    grid, curve = tables.curve("MonthlyCharges", "Two year")
+    forced = df.assign(MonthlyCharges=grid[2], Contract="Two year")
+    direct = model.predict_proba(preprocessor.transform(cleaner.transform(forced)))[:, 1].mean()
+    assert np.isclose(curve[2], direct)
+    assert np.isclose(tables.lookup("MonthlyCharges", grid[2], "Two year"), direct)
+    assert tables.pdp_contract["tenure"].shape == (3, len(tables.grids["tenure"]))
+    assert set(tables.fields) == set(df.columns)
+
+    # Calibration appliquee ligne a ligne avant la moyenne (echelle du score affiche)
+    raw = model.predict_proba(preprocessor.transform(cleaner.transform(df)))[:, 1]
+    calibrator = fit_calibrator(np.arange(len(df)) % 2, raw)
+    calibrated = compute_global_explanations(
+        model, df, cleaner, preprocessor, n_grid=5, calibrator=calibrator
+    )
+    scores = model.predict_proba(preprocessor.transform(cleaner.transform(forced)))[:, 1]
+    assert np.isclose(
+        calibrated.curve("MonthlyCharges", "Two year")[1][2], calibrator.transform(scores).mean()
+    )
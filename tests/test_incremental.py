@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models.incremental import IncrementalConfig, check_triggers, continue_training
+
+
+def _data(n: int = 600, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, 5))
+    y = (x[:, 0] + 0.5 * x[:, 1] + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    return x, y
+
+
+def test_continue_training_extends_current_model():
+    lgb = pytest.importorskip("lightgbm")
+    x, y = _data()
+    x_new, y_new = _data(seed=1)
+    config = IncrementalConfig(rounds=15)
+
+    base = lgb.LGBMClassifier(n_estimators=40, verbose=-1).fit(x, y)
+    updated = continue_training(base, x_new, y_new, config)
+    assert updated.booster_.num_trees() == 55
+    assert base.booster_.num_trees() == 40
+
+    linear = LogisticRegression(max_iter=500).fit(x, y)
+    refit = continue_training(linear, x_new, y_new, config, history=(x, y))
+    assert refit.coef_.shape == linear.coef_.shape
+    assert np.allclose(refit.coef_, linear.coef_, atol=0.5)
+
+
+def test_full_retrain_only_on_drift_or_degradation():
+    config = IncrementalConfig(max_auc_drop=0.03)
+    stable = {"status": "stable", "features": {"tenure": {"status": "stable"}}}
+    drift = {"status": "drift", "features": {"tenure": {"status": "drift"}}}
+
+    assert check_triggers(0.80, 0.81, stable, config).mode == "incremental"
+    assert check_triggers(0.80, 0.81, None, config).mode == "incremental"
+    decision = check_triggers(0.80, 0.81, drift, config)
+    assert decision.mode == "full" and "tenure" in decision.reasons[0]
+    assert check_triggers(0.70, 0.81, stable, config).mode == "full"
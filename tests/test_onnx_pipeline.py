@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.build_features import TelcoCleaner
+from src.models.onnx_pipeline import OnnxPipeline, export_pipeline
+from src.utils.paths import DATA_DIR, PROCESSED_DIR
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+
+def _raw() -> pd.DataFrame:
+    df = pd.read_csv(DATA_DIR / "synthetic_customers.csv")
+    df["TotalCharges"] = df["TotalCharges"].astype(str)
+    df.loc[0, "TotalCharges"] = " "
+    df.loc[1, "tenure"] = 0
+    return df
+
+
+def test_onnx_matches_sklearn_logreg(tmp_path) -> None:
+    df = _raw()
+    cleaner = TelcoCleaner().fit(df)
+    preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+    model = joblib.load(PROCESSED_DIR / "model.joblib")
+
+    expected = model.predict_proba(preprocessor.transform(cleaner.transform(df)))[:, 1]
+    path = export_pipeline(model, tmp_path / "pipeline.onnx", cleaner, preprocessor)
+    got = OnnxPipeline(path).predict_proba(df)[:, 1]
+    assert np.abs(got - expected).max() < 1e-6
+
+
+def test_onnx_matches_sklearn_gbdt(tmp_path) -> None:
+    lgb = pytest.importorskip("lightgbm")
+    df = _raw()
+    cleaner = TelcoCleaner().fit(df)
+    preprocessor = joblib.load(PROCESSED_DIR / "preprocessor.joblib")
+    X = preprocessor.transform(cleaner.transform(df))
+    y = np.arange(len(X)) % 2
+    model = lgb.LGBMClassifier(n_estimators=20, min_child_samples=2, verbose=-1).fit(X, y)
+
+    path = export_pipeline(model, tmp_path / "pipeline.onnx", cleaner, preprocessor)
+    got = OnnxPipeline(path).predict_proba(df)[:, 1]
+    assert np.abs(got - model.predict_proba(X)[:, 1]).max() < 1e-6
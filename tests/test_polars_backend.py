@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic import generate_customers
+from src.features.build_features import TelcoCleaner
+from src.features.categorical import NativeCategoricalEncoder
+
+pytest.importorskip("polars")
+from src.features import polars_backend  # noqa: E402
+
+
+def _raw_csv(tmp_path) -> str:
+    raw = generate_customers(1500, seed=2)
+    raw["TotalCharges"] = raw["TotalCharges"].astype(str)
+    raw.loc[0, "TotalCharges"] = " "
+    raw.loc[1, "tenure"] = -1
+    raw.loc[2, "Contract"] = np.nan
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+def test_polars_cleaning_matches_pandas(tmp_path):
+    path = _raw_csv(tmp_path)
+    cleaner = TelcoCleaner().fit(None)
+    expected = cleaner.transform(pd.read_csv(path))
+    got = polars_backend.to_pandas(polars_backend.transform(cleaner, polars_backend.scan_csv(path)))
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_polars_native_codes_match_encoder(tmp_path):
+    path = _raw_csv(tmp_path)
+    cleaner = TelcoCleaner().fit(None)
+    clean = cleaner.transform(pd.read_csv(path)).drop(columns=["customerID", "Churn"])
+    encoder = NativeCategoricalEncoder().fit(clean.iloc[100:])
+    frame = polars_backend.transform(cleaner, polars_backend.scan_csv(path))
+    for expected, got in zip(
+        encoder.encode(clean), polars_backend.encode_native(encoder, frame), strict=True
+    ):
+        assert got.dtype == expected.dtype
+        np.testing.assert_array_equal(got, expected)
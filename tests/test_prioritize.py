@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from src.models.prioritize import prioritize, top_indices
+
+
+class _Scorer:
+    """Proba = colonne `p` du bloc."""
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        return df["p"].to_numpy(dtype=np.float64)
+
+
+def _chunks(df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+def test_streamed_topk_matches_full_sort():
+    rng = np.random.default_rng(0)
+    n, k = 5000, 100
+    df = pd.DataFrame(
+        {
+            "customerID": [f"c{i}" for i in range(n)],
+            "p": rng.integers(0, 200, n) / 200,  # nombreux ex aequo
+            "MonthlyCharges": rng.uniform(20, 120, n),
+        }
+    )
+    for by, col in (("proba", "p"), ("expected_value", None)):
+        ranked, n_rows = prioritize(_chunks(df, 700), _Scorer(), k, by=by)
+        score = df["p"] if col else df["p"] * df["MonthlyCharges"]
+        expected = df.assign(s=score).sort_values("s", ascending=False, kind="stable").head(k)
+        assert n_rows == n
+        assert ranked["customerID"].tolist() == expected["customerID"].tolist()
+        assert ranked["rank"].tolist() == list(range(1, k + 1))
+
+
+def test_top_indices_keeps_file_order_on_ties():
+    scores = np.array([0.5, 0.9, 0.5, 0.5, 0.1])
+    assert top_indices(scores, 3).tolist() == [0, 1, 2]
+    assert top_indices(scores, 10).tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+from src.utils.profiling import Profiler
+
+
+def test_disabled_profiler_is_noop(tmp_path):
+    profiler = Profiler("run", enabled=False, out_dir=tmp_path)
+    objective = lambda trial: 1.0  # noqa: E731
+    assert profiler.wrap_trial(objective) is objective
+    with profiler.stage("a"):
+        profiler.lap("b")
+    assert profiler.finish() is None
+    assert profiler.stages == []
+    assert not any(tmp_path.iterdir())
+
+
+def test_stages_trials_and_summary(tmp_path):
+    profiler = Profiler("run", enabled=True, memory="tracemalloc", out_dir=tmp_path)
+    objective = profiler.wrap_trial(lambda trial: float(len(bytearray(2**20))))
+    with profiler.stage("optuna"):
+        for number in range(2):
+            objective(SimpleNamespace(number=number))
+    profiler.lap("refit")
+    profiler.lap("export")
+    summary = profiler.finish(log_mlflow=False)
+
+    names = [s["name"] for s in summary["stages"]]
+    assert names == ["optuna/trial_0", "optuna/trial_1", "optuna", "refit", "export"]
+    trial = summary["stages"][0]
+    assert trial["peak_mb"] >= 1.0 and trial["wall_s"] >= 0.0
+    # Le pic d'un essai remonte vers l'etape englobante
+    assert summary["stages"][2]["peak_mb"] >= trial["peak_mb"]
+
+    metrics = profiler.metrics()
+    assert "profile_optuna_wall_s" in metrics and "profile_refit_cpu_s" in metrics
+    assert "profile_optuna_trial_0_wall_s" not in metrics
+    assert metrics["profile_trial_peak_mb_max"] >= 1.0
+    saved = json.loads((tmp_path / "run_profile.json").read_text())
+    assert saved["name"] == "run"
+
+
+def test_cprofile_dump(tmp_path):
+    profiler = Profiler("run", enabled=True, memory="none", dump="cprofile", out_dir=tmp_path)
+    profiler.lap("work")
+    sum(range(1000))
+    profiler.finish(log_mlflow=False)
+    assert (tmp_path / "run.prof").exists()
+    assert "cumulative" in (tmp_path / "run_cprofile.txt").read_text()
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from src.serving import routing
+from src.serving.routing import ModelRouter, anchor_variant, parse_variants
+
+
+def test_router_splits_traffic_and_records_shadow_stats():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(200, 3))
+    y = (x[:, 0] > 0).astype(int)
+    models = {
+        "production": LogisticRegression().fit(x, y),
+        "staging": LogisticRegression(C=0.01).fit(x, y),
+    }
+    router = ModelRouter(models, {"production": 0.8, "staging": 0.2}, ["staging"], seed=1)
+
+    served = [router.choose() for _ in range(2000)]
+    assert abs(served.count("staging") / len(served) - 0.2) < 0.03
+
+    proba = router.score("production", x)
+    router.shadow_score("production", x, proba)
+    stats = router.snapshot()
+    assert stats["production"]["requests"] == 1
+    assert stats["staging"]["shadow_requests"] == 1
+    assert sum(stats["staging"]["score_hist"]) == len(x)
+    expected = np.abs(models["staging"].predict_proba(x)[:, 1] - proba).mean()
+    assert np.isclose(stats["staging"]["mean_abs_diff_vs_served"], expected)
+
+
+def test_parse_variants():
+    raw = json.dumps({"a": {"uri": "m.joblib", "weight": 1.0}, "b": {"uri": "n", "shadow": True}})
+    variants = parse_variants(raw)
+    assert [(v.name, v.weight, v.shadow) for v in variants] == [("a", 1.0, False), ("b", 0.0, True)]
+    assert parse_variants("") == []
+
+
+def test_anchor_variant_model_is_loaded_once(monkeypatch):
+    variants = {
+        "candidate": {"uri": "models:/telco-churn-classifier/Staging", "weight": 0.5},
+        "baseline": {"uri": "baseline.joblib", "weight": 0.5},
+    }
+    monkeypatch.setenv("MODEL_VARIANTS", json.dumps(variants))
+    # Modele principal absent des variantes: la premiere variante servie porte les artefacts
+    anchor = anchor_variant(parse_variants(), "models:/telco-churn-classifier/Production")
+    assert anchor.name == "candidate"
+
+    loaded = []
+    monkeypatch.setattr(routing, "load_variant_model", lambda uri: loaded.append(uri) or uri)
+    monkeypatch.setattr(routing, "load_variant_calibrator", lambda uri: None)
+    anchor_model = LogisticRegression()
+    router = ModelRouter.from_env(anchor_model, None, anchor.uri)
+    assert router.models["candidate"] is anchor_model
+    assert loaded == ["baseline.joblib"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.serving.score_store import ScoreStore, input_hashes
+
+
+def _customers() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "customerID": ["a", "b", "c"],
+            "Contract": ["Month-to-month", "Two year", "One year"],
+            "tenure": [1, 40, 12],
+            "TotalCharges": ["29.85", "1889.5", " "],
+        }
+    )
+
+
+def test_input_hashes_ignore_inferred_dtypes():
+    df = _customers()
+    typed = df.assign(
+        tenure=df["tenure"].astype(float),
+        TotalCharges=pd.to_numeric(df["TotalCharges"], errors="coerce"),
+    )
+    assert np.array_equal(input_hashes(df), input_hashes(typed))
+    changed = df.assign(tenure=[1, 41, 12])
+    assert (input_hashes(df) != input_hashes(changed)).tolist() == [False, True, False]
+
+
+def test_only_new_changed_or_outdated_rows_are_rescored(tmp_path):
+    store = ScoreStore(tmp_path / "scores.sqlite")
+    df = _customers()
+    ids, hashes = df["customerID"].to_numpy(), input_hashes(df)
+    assert np.isnan(store.cached(ids, hashes, "v1")).all()
+    store.upsert(ids, hashes, np.array([0.8, 0.1, 0.4]), "v1")
+
+    changed = df.assign(Contract=["Month-to-month", "Month-to-month", "One year"])
+    cached = store.cached(ids, input_hashes(changed), "v1")
+    assert np.isnan(cached).tolist() == [False, True, False]
+    assert cached[0] == 0.8
+    assert np.isnan(store.cached(ids, hashes, "v2")).all()
+
+    reader = ScoreStore(tmp_path / "scores.sqlite", read_only=True)
+    assert reader.get("c").churn_proba == 0.4
+    assert reader.get("z") is None
+    assert len(reader) == 3
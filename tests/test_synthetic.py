@@ -0,0 +1,23 @@
+from src.data.synthetic import generate_customers, resample_customers
+from src.serving.api import parse_records
+
+
+def test_synthetic_customers_match_record_schema():
+    df = generate_customers(2000, seed=3)
+    assert df["customerID"].is_unique
+    assert set(df["Churn"]) == {"Yes", "No"}
+    assert (df.loc[df["tenure"] == 0, "TotalCharges"] == " ").all()
+    no_internet = df["InternetService"] == "No"
+    assert (df.loc[no_internet, "OnlineSecurity"] == "No internet service").all()
+
+    records = df.drop(columns=["customerID", "Churn"]).to_json(orient="records")
+    assert len(parse_records.parse(records)) == len(df)
+    assert generate_customers(2000, seed=3).equals(df)
+
+
+def test_resampled_customers_keep_joint_categories():
+    reference = generate_customers(500, seed=4)
+    df = resample_customers(reference, 3000, seed=5)
+    combos = set(map(tuple, reference[["Contract", "InternetService", "Churn"]].to_numpy()))
+    assert set(map(tuple, df[["Contract", "InternetService", "Churn"]].to_numpy())) <= combos
+    assert df["tenure"].between(0, 72).all() and df["customerID"].is_unique
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+from src.models.thresholds import (
+    CostMatrix,
+    choose_operating_points,
+    metrics_at,
+    threshold_sweep,
+)
+
+
+def test_sweep_matches_sklearn_and_brute_force_cost():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 500)
+    proba = np.round(np.clip(0.3 * y + 0.7 * rng.random(500), 0, 1), 2)
+    costs = CostMatrix(tp=30.0, fp=5.0, fn=120.0, tn=0.0)
+    sweep = threshold_sweep(y, proba, costs)
+    for i, t in enumerate(sweep["thresholds"]):
+        preds = (proba >= t).astype(int)
+        assert np.isclose(sweep["precision"][i], precision_score(y, preds, zero_division=1))
+        assert np.isclose(sweep["recall"][i], recall_score(y, preds))
+        assert np.isclose(sweep["f1"][i], f1_score(y, preds))
+        tp, fp = int((preds & y).sum()), int((preds & (1 - y)).sum())
+        fn = int(y.sum()) - tp
+        assert np.isclose(sweep["cost"][i], (30 * tp + 5 * fp + 120 * fn) / len(y))
+
+    points = choose_operating_points(sweep, costs, moderate_recall=0.95)
+    assert points.moderate <= points.decision
+    assert points.metrics["expected_cost"] == sweep["cost"].min()
+    np.testing.assert_array_equal(points.risk_levels([0.0, points.decision]), [0, 2])
+
+    # Seuil fixe (evaluation sur le test set): memes metriques que le balayage
+    fixed = metrics_at(y, proba, points.decision, costs)
+    for k in ("expected_cost", "precision", "recall", "f1"):
+        assert np.isclose(fixed[k], points.metrics[k])
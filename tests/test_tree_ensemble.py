@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.tree_ensemble import TreeEnsemble
+
+
+def _data() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 10))
+    X[:, 3] = rng.integers(0, 2, 2000)
+    y = (X[:, 0] + X[:, 3] * X[:, 1] + rng.normal(size=2000) > 0).astype(int)
+    X_test = rng.normal(size=(500, 10))
+    X_test[:, 3] = rng.integers(0, 2, 500)
+    X_test[::25, 2] = np.nan
+    return X, y, X_test
+
+
+@pytest.mark.parametrize("lib", ["lightgbm", "xgboost", "catboost"])
+def test_tree_ensemble_matches_native(lib: str, tmp_path) -> None:
+    mod = pytest.importorskip(lib)
+    X, y, X_test = _data()
+    if lib == "lightgbm":
+        clf = mod.LGBMClassifier(n_estimators=50, num_leaves=16, verbose=-1)
+    elif lib == "xgboost":
+        clf = mod.XGBClassifier(n_estimators=50, max_depth=4, scale_pos_weight=2.0)
+    else:
+        clf = mod.CatBoostClassifier(
+            iterations=50, depth=4, verbose=False, allow_writing_files=False
+        )
+    clf.fit(X, y)
+
+    ens = TreeEnsemble.from_model(clf)
+    expected = clf.predict_proba(X_test)[:, 1]
+    assert np.abs(ens.predict_proba(X_test)[:, 1] - expected).max() < 1e-6
+
+    reloaded = TreeEnsemble.load(ens.save(tmp_path / "trees.npz"))
+    assert np.array_equal(reloaded.predict_proba(X_test), ens.predict_proba(X_test))
+
+
+@pytest.mark.parametrize("lib", ["lightgbm", "xgboost"])
+def test_tree_ensemble_infinite_inputs(lib: str) -> None:
+    mod = pytest.importorskip(lib)
+    X, y, X_test = _data()
+    X_test = np.nan_to_num(X_test, nan=0.0)
+    X_test[::3, 0] = np.inf
+    X_test[1::3, 1] = -np.inf
+    if lib == "lightgbm":
+        clf = mod.LGBMClassifier(n_estimators=30, num_leaves=16, verbose=-1)
+    else:
+        clf = mod.XGBClassifier(n_estimators=30, max_depth=4)
+    clf.fit(X, y)
+
+    ens = TreeEnsemble.from_model(clf)
+    expected = clf.predict_proba(X_test)[:, 1]
+    assert np.abs(ens.predict_proba(X_test)[:, 1] - expected).max() < 1e-6
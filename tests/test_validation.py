@@ -0,0 +1,34 @@
+import json
+
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from src.serving.api import parse_records
+from src.serving.schema import Record
+
+DATA = "data/synthetic_customers.csv"
+
+
+def _records() -> list[dict]:
+    df = pd.read_csv(DATA).astype({"TotalCharges": str})
+    return json.loads(df.to_json(orient="records"))
+
+
+def test_columnar_parse_matches_pydantic_models():
+    records = _records()
+    records[0].pop("TotalCharges")
+    df = parse_records.parse(json.dumps(records))
+
+    expected = pd.DataFrame([Record(**r).model_dump() for r in records])
+    pd.testing.assert_frame_equal(df, expected)
+    assert df["tenure"].dtype == "int64" and df["MonthlyCharges"].dtype == "float64"
+
+
+def test_errors_report_row_index_and_field():
+    records = _records()
+    records[2]["tenure"] = "abc"
+    del records[5]["Contract"]
+    with pytest.raises(ValidationError) as exc:
+        parse_records.parse(json.dumps(records))
+    assert [e["loc"] for e in exc.value.errors()] == [(2, "tenure"), (5, "Contract")]